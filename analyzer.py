@@ -6,9 +6,149 @@ class Symbol:
         self.node = node
         self.chestnut_type
 
+# Unary operations that only need the value of their operand. outer and
+# unshadow inspect the scopes themselves.
+VALUE_UNARY_OPERATIONS = ("Subtraction", "Not", "BitwiseNot", "Spread")
+
+INDEX_ASSIGNMENT_OPERATIONS = ("Assignment", "Addassign", "Subassign", "Mulassign", "Divassign")
+
+def statement_labels(node):
+    if isinstance(node.label, (list, tuple)):
+        return list(node.label)
+    return [node.label]
+
+# Nodes whose identifiers are looked up from wherever they end up running, or
+# in the scopes outside of the one they appear in.
+DYNAMIC_LOOKUP_NODES = (FnStatementNode, StructFnStatementNode, AnonymousFnExpressionNode)
+OUTWARD_UNARY_OPERATIONS = ("Outer", "Unshadow")
+
+def child_nodes(node):
+    if isinstance(node, (list, tuple)):
+        return node
+    if isinstance(node, dict):
+        return node.values()
+    if hasattr(node, "__dict__") and not isinstance(node, (Token, ChestnutAny)):
+        return vars(node).values()
+    return ()
+
+def identifier_names(node, names=None):
+    """
+        Collects the data of every Identifier token reachable from node.
+    """
+    if names is None:
+        names = set()
+    if isinstance(node, Token):
+        if node.label == "Identifier" and isinstance(node.data, str):
+            names.add(node.data)
+    for item in child_nodes(node):
+        identifier_names(item, names)
+    return names
+
+def body_identifier_names(node, names=None):
+    """
+        Collects the data of the Identifier tokens reachable from node outside
+        of the nested functions in it.
+    """
+    if names is None:
+        names = set()
+    if isinstance(node, DYNAMIC_LOOKUP_NODES):
+        return names
+    if isinstance(node, Token):
+        if node.label == "Identifier" and isinstance(node.data, str):
+            names.add(node.data)
+    for item in child_nodes(node):
+        body_identifier_names(item, names)
+    return names
+
+def dynamic_identifier_names(node, names=None):
+    """
+        Collects the identifiers reachable from node that are resolved outside
+        of the enclosing body whatever it declares: those inside nested
+        functions and those read through outer or unshadow.
+    """
+    if names is None:
+        names = set()
+    if isinstance(node, DYNAMIC_LOOKUP_NODES):
+        return identifier_names(node, names)
+    if isinstance(node, UnaryOperationNode) and node.op.label in OUTWARD_UNARY_OPERATIONS:
+        return identifier_names(node, names)
+    for item in child_nodes(node):
+        dynamic_identifier_names(item, names)
+    return names
+
+# Statements that may keep a reference to the scope they run in: function
+# definitions capture it, imports and struct definitions run code in it.
+SCOPE_CAPTURING_NODES = (FnStatementNode, ImportStatementNode, StructDefinitionNode)
+
+def captures_scope(node):
+    if isinstance(node, SCOPE_CAPTURING_NODES):
+        return True
+    return any(captures_scope(item) for item in child_nodes(node))
+
+def loop_nodes(node):
+    """
+        Yields every loop statement in a syntax tree, including nested ones.
+    """
+    if isinstance(node, BaseLoop):
+        yield node
+    for item in child_nodes(node):
+        yield from loop_nodes(item)
+
+def function_nodes(node):
+    """
+        Yields every function, struct method and anonymous function in a
+        syntax tree, including nested ones.
+    """
+    if isinstance(node, DYNAMIC_LOOKUP_NODES):
+        yield node
+    for item in child_nodes(node):
+        yield from function_nodes(item)
+
+class FunctionScopeInfo:
+    """
+        What the Analyzer could prove about the names used by one function body.
+    """
+
+    def __init__(self, statement):
+        self.statement = statement
+        # Names bound by parameters, let statements and for loops.
+        self.declared = set()
+        # Names read or assigned without a visible declaration in this body.
+        # They resolve dynamically through the caller's scopes.
+        self.free = set()
+        # Names that must stay in scope dictionaries: redeclared while
+        # visible, shadowed, constant, or the receiver of a struct method.
+        self.conflicts = set()
+        # Names used inside nodes the Analyzer doesn't follow. The ones that
+        # may not resolve in this body are free as well.
+        self.escaping = set()
+        # (token, address) for every identifier read or assigned in a scope
+        # of this body, and every loop_index read in one of its loops, the
+        # address counting scopes out from the innermost.
+        self.addresses = []
+        # Set when a statement may bind names the Analyzer can't see, so no
+        # address in the body can be trusted.
+        self.opaque = False
+        # Calls made by `return f(...)` outside of any loop, whose frame may
+        # replace the frame of this body.
+        self.tail_calls = []
+
+    def local_names(self, dynamic_names):
+        """
+            Returns the declared names that can live in host language locals,
+            given every name any body might look up dynamically.
+        """
+        return set(n for n in self.declared
+            if n.isidentifier()
+            and n not in self.conflicts
+            and n not in self.free
+            and n not in self.escaping
+            and n not in dynamic_names)
+
 class Analyzer:
     def __init__(self):
         self.scopes = [{}]
+        self.loop_depth = 0
 
     def push_scope(self):
         self.scopes.append({})
@@ -27,5 +167,261 @@ class Analyzer:
                 return scope
         return None
 
-    def analyze(self, ast):
-        pass
+    def analyze(self, node):
+        """
+            Resolves the lexical address of the identifiers in every function
+            body reachable from a top level node. Resolved tokens get an
+            address attribute the evaluator uses to index the scopes directly;
+            the rest keep an address of None and are looked up by name.
+
+            Function nodes also get the names their body may look up in the
+            scopes of its callers, and calls in tail position are marked so
+            the evaluator can run them in place of the caller's frame. Loops
+            whose body can't keep a reference to the scope of a pass are
+            marked so the evaluator can reuse one scope for every pass.
+        """
+        for loop in loop_nodes(node):
+            loop.reuse_scope = not captures_scope(loop.statements)
+        for statement in function_nodes(node):
+            info = self.analyze_function(statement)
+            # Nested functions record the names they look up themselves.
+            own_names = body_identifier_names((statement.parameters, statement.statements))
+            statement.free_names = frozenset(info.free & own_names)
+            for call in info.tail_calls:
+                call.tail = True
+            if info.opaque:
+                continue
+            for token, address in info.addresses:
+                token.address = address
+
+    def is_visible(self, name):
+        return self.find_first_scope_containing(name) is not None
+
+    def address_of(self, name):
+        for i in range(len(self.scopes) - 1, -1, -1):
+            if name in self.scopes[i]:
+                if self.scopes[i][name] is None:
+                    return None
+                return len(self.scopes) - 1 - i
+        return None
+
+    def declare(self, info, token, conflict=False, addressable=True):
+        name = token.data
+        if conflict or self.is_visible(name):
+            info.conflicts.add(name)
+        info.declared.add(name)
+        self.get_current()[name] = token if addressable else None
+
+    def use(self, info, token):
+        address = self.address_of(token.data)
+        if address is not None:
+            info.addresses.append((token, address))
+        elif not self.is_visible(token.data):
+            info.free.add(token.data)
+
+    def escape(self, info, node):
+        names = identifier_names(node)
+        info.escaping |= names
+        for name in names:
+            if not self.is_visible(name):
+                info.free.add(name)
+        dynamic_identifier_names(node, info.free)
+
+    def analyze_function(self, statement):
+        """
+            Walks a function body following the evaluator's block scoping and
+            returns a FunctionScopeInfo. Scopes outside of the body are never
+            visible here because the evaluator resolves them dynamically.
+        """
+        info = FunctionScopeInfo(statement)
+        saved_scopes = self.scopes
+        saved_loop_depth = self.loop_depth
+        self.scopes = [{}]
+        self.loop_depth = 0
+        for param in statement.parameters:
+            self.declare(info, param.name)
+            if param.default_value is not None:
+                # Defaults are evaluated before any parameter is bound, so
+                # their names resolve through the caller's scopes.
+                identifier_names(param.default_value, info.escaping)
+                identifier_names(param.default_value, info.free)
+        if isinstance(statement, StructFnStatementNode):
+            # Static calls run the body without binding the receiver.
+            self.declare(info, statement.target_struct.name, conflict=True, addressable=False)
+        self.analyze_statements(info, statement.statements)
+        self.scopes = saved_scopes
+        self.loop_depth = saved_loop_depth
+        return info
+
+    def analyze_block(self, info, statements):
+        self.push_scope()
+        self.analyze_statements(info, statements)
+        self.pop_scope()
+
+    def push_loop_scope(self, node):
+        self.push_scope()
+        self.get_current()["loop index"] = node
+
+    def analyze_loop_body(self, info, statements):
+        self.loop_depth += 1
+        self.analyze_block(info, statements)
+        self.loop_depth -= 1
+
+    def analyze_statements(self, info, statements):
+        for statement in statements:
+            self.analyze_statement(info, statement)
+
+    def analyze_statement(self, info, node):
+        if isinstance(node, ExpressionStatementNode):
+            expression = node.expression
+            if isinstance(expression, IndexAssignNode) and expression.op.label in INDEX_ASSIGNMENT_OPERATIONS:
+                self.analyze_expression(info, expression.identifier)
+                self.analyze_expression(info, expression.index)
+                self.analyze_expression(info, expression.value)
+            else:
+                self.analyze_expression(info, expression)
+        elif isinstance(node, LetStatementNode):
+            self.analyze_expression(info, node.expression)
+            for label in statement_labels(node):
+                self.declare(info, label)
+        elif isinstance(node, ConstantStatementNode):
+            self.analyze_expression(info, node.expression)
+            for label in statement_labels(node):
+                self.declare(info, label, conflict=True)
+        elif isinstance(node, ShadowStatementNode):
+            self.analyze_expression(info, node.expression)
+            for label in statement_labels(node):
+                # The shadowed value may come from any enclosing scope.
+                if not self.is_visible(label.data):
+                    info.free.add(label.data)
+                self.declare(info, label, conflict=True)
+        elif isinstance(node, AssignStatementNode):
+            self.analyze_expression(info, node.expression)
+            self.use(info, node.identifier)
+        elif isinstance(node, ReturnStatementNode):
+            self.analyze_expression(info, node.expression)
+            if isinstance(node.expression, CallStatementNode) and self.loop_depth == 0:
+                # Inside a loop the callee could read the loop's index.
+                info.tail_calls.append(node.expression)
+        elif isinstance(node, (BreakStatementNode, ContinueStatementNode)):
+            pass
+        elif isinstance(node, IfStatementNode):
+            self.analyze_expression(info, node.condition_expression)
+            self.analyze_block(info, node.block_statements)
+            for elif_block in node.elif_blocks:
+                self.analyze_expression(info, elif_block.condition_expression)
+                self.analyze_block(info, elif_block.block_statements)
+            if node.else_block:
+                self.analyze_block(info, node.else_block.block_statements)
+        elif isinstance(node, CaseStatementNode):
+            self.analyze_expression(info, node.subject)
+            for when_block in node.when_blocks:
+                for condition in when_block.conditions:
+                    self.analyze_expression(info, condition)
+                self.analyze_block(info, when_block.statements)
+            if node.otherwise:
+                self.analyze_block(info, node.otherwise.statements)
+        elif isinstance(node, WhileStatementNode):
+            self.push_loop_scope(node)
+            self.analyze_expression(info, node.condition)
+            self.analyze_loop_body(info, node.statements)
+            self.pop_scope()
+        elif isinstance(node, UntilStatementNode):
+            self.push_loop_scope(node)
+            self.analyze_loop_body(info, node.statements)
+            self.analyze_expression(info, node.condition)
+            self.pop_scope()
+        elif isinstance(node, LoopStatementNode):
+            self.push_loop_scope(node)
+            self.analyze_loop_body(info, node.statements)
+            self.pop_scope()
+        elif isinstance(node, ForStatementNode):
+            self.push_scope()
+            self.analyze_expression(info, node.subject)
+            # The subject is evaluated before the loop's index exists.
+            self.get_current()["loop index"] = node
+            self.push_scope()
+            self.declare(info, node.identifier)
+            self.loop_depth += 1
+            self.analyze_statements(info, node.statements)
+            self.loop_depth -= 1
+            self.pop_scope()
+            self.pop_scope()
+        elif isinstance(node, FnStatementNode):
+            self.escape(info, node)
+            self.declare(info, node.name, conflict=True)
+        elif isinstance(node, EnumStatementNode):
+            self.escape(info, node)
+            self.declare(info, node.identifier, conflict=True)
+        elif isinstance(node, StructFnStatementNode):
+            self.escape(info, node)
+        else:
+            # Imports and struct definitions bind names the Analyzer doesn't
+            # track in the current scope.
+            self.escape(info, node)
+            info.opaque = True
+
+    def analyze_expression(self, info, node):
+        if isinstance(node, ChestnutAny) or node is None:
+            return
+        if isinstance(node, Token):
+            if node.label == "Identifier":
+                self.use(info, node)
+        elif isinstance(node, BinaryOperationNode):
+            self.analyze_expression(info, node.left)
+            self.analyze_expression(info, node.right)
+        elif isinstance(node, UnaryOperationNode) and node.op.label in VALUE_UNARY_OPERATIONS:
+            self.analyze_expression(info, node.right)
+        elif isinstance(node, (TernaryExpressionNode, UseExpressionNode)):
+            self.analyze_expression(info, node.condition)
+            self.analyze_expression(info, node.left)
+            self.analyze_expression(info, node.right)
+        elif isinstance(node, (ListLiteralNode, TupleLiteralNode)):
+            for element in node.elements:
+                self.analyze_expression(info, element)
+        elif isinstance(node, MapLiteralNode):
+            for key, value in zip(node.keys, node.values):
+                self.analyze_expression(info, key)
+                self.analyze_expression(info, value)
+        elif isinstance(node, IndexAccessNode):
+            self.analyze_expression(info, node.target)
+            self.analyze_expression(info, node.index)
+        elif isinstance(node, CallStatementNode):
+            # The callee's name is looked up again while resolving overloads.
+            self.escape(info, node.identifier)
+            self.analyze_expression(info, node.identifier)
+            for param in node.params:
+                self.analyze_expression(info, param)
+        elif isinstance(node, PropertyAccessNode):
+            # Evaluated as a whole, but the target is an ordinary read.
+            self.escape(info, node)
+            self.analyze_expression(info, node.identifier)
+        elif isinstance(node, PropertyAssignmentNode):
+            self.escape(info, node)
+            self.analyze_expression(info, node.identifier)
+            self.analyze_expression(info, node.value_expression)
+        elif isinstance(node, LoopindexExpressionNode):
+            address = self.address_of("loop index")
+            if address is not None:
+                info.addresses.append((node, address))
+        else:
+            self.escape(info, node)
+
+    def dynamic_names(self, programs):
+        """
+            Returns every name that some code in the given ASTs may look up
+            through the scope chain at runtime rather than in its own body.
+            Declaring a local with one of these names could be observed by
+            a callee, so such locals are never moved out of the scopes.
+        """
+        names = set()
+        for ast in programs:
+            for node in ast:
+                if isinstance(node, (FnStatementNode, StructFnStatementNode)):
+                    names |= self.analyze_function(node).free
+                elif isinstance(node, StructDefinitionNode):
+                    for prop in node.properties:
+                        identifier_names(prop.attributes.get("default"), names)
+                elif not isinstance(node, (ImportStatementNode, EnumStatementNode)):
+                    identifier_names(node, names)
+        return names
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# Microbenchmark for Bytes.
+#
+# Reads a file of n megabytes with read_file_handle and File.read, then
+# slices, concatenates and decodes what was read. Each is timed, and the
+# memory the read takes measured, as Bytes and as the List of one UInt8 per
+# byte that reading a file made before.
+#
+# Usage: python3 bench/bytes.py [megabytes] [repeat]
+
+import os
+import sys
+import tempfile
+import tracemalloc
+
+from common import best_of
+from chestnut_types import ChestnutBytes, ChestnutFileHandle, ChestnutInteger, ChestnutList, ChestnutString, ChestnutUInt8
+from bridge import py_bridge
+
+def boxed_read_file(path, size):
+    # How __internal_read_file__ read binary files before.
+    with open(path, "rb") as f:
+        return ChestnutList([ ChestnutUInt8(b) for b in f.read(size) ])
+
+def bytes_read_file(path, size):
+    with open(path, "rb") as f:
+        return py_bridge.__internal_read_file__(ChestnutFileHandle(f), ChestnutInteger(size))[0]
+
+def boxed_fread(path, size):
+    # How __internal_fread__ and File.read read files before.
+    handle = py_bridge.libc.fopen(path.encode(), b"rb")
+    buf = py_bridge.ctypes.create_string_buffer(size)
+    read = py_bridge.libc.fread(buf, 1, size, handle)
+    py_bridge.libc.fclose(handle)
+    return ChestnutList([ ChestnutUInt8(b) for b in buf.raw[:read] ])
+
+def bytes_fread(path, size):
+    handle = py_bridge.__internal_fopen__(ChestnutString(path), ChestnutString("rb"))[0]
+    data = py_bridge.__internal_fread__(handle, ChestnutInteger(size))[0]
+    py_bridge.__internal_fclose__(handle)
+    return data
+
+def peak_memory(operation):
+    tracemalloc.start()
+    operation()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+def as_ints(result):
+    if isinstance(result, ChestnutBytes):
+        return bytes(result.buffer())
+    if isinstance(result, ChestnutList):
+        return bytes(item.value for item in result)
+    return result.value
+
+def compare(label, before, after, repeat):
+    before_time, expected = best_of(before, repeat)
+    after_time, result = best_of(after, repeat)
+    if as_ints(result) != as_ints(expected):
+        raise SystemExit(f"{label} gave different results as Bytes")
+    print(f"  {label:18s} List {before_time:7.3f}s  Bytes {after_time:7.3f}s  {before_time / after_time:7.1f}x")
+
+if __name__ == "__main__":
+    megabytes = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    size = megabytes * 1024 * 1024
+    # UTF-8 text, so decoding it has work to do.
+    text = ("chestnut 🌰 castaña châtaigne " * (size // 32 + 1)).encode("utf-8")[:size]
+    with tempfile.NamedTemporaryFile(delete=False) as f:
+        f.write(text)
+        path = f.name
+    try:
+        print(f"Reading {megabytes}MB")
+        for label, before, after in [("read_file_handle", boxed_read_file, bytes_read_file), ("File.read", boxed_fread, bytes_fread)]:
+            compare(label, lambda: before(path, size), lambda: after(path, size), repeat)
+            before_peak = peak_memory(lambda: before(path, size))
+            after_peak = peak_memory(lambda: after(path, size))
+            print(f"  {label:18s} List {before_peak / size:5.1f} bytes/byte  Bytes {after_peak / size:4.1f} bytes/byte")
+        boxed, native = boxed_read_file(path, size), bytes_read_file(path, size)
+        half = size // 2
+        print(f"What was read")
+        compare("slice", lambda: ChestnutList(boxed.value[1:half]), lambda: native.slice(1, half), repeat)
+        compare("concatenation", lambda: ChestnutList(boxed.value + boxed.value), lambda: native + native, repeat)
+        compare("decode", lambda: ChestnutString(bytes(b.value for b in boxed).decode("utf-8", "replace")),
+            lambda: native.decode("utf-8"), repeat)
+    finally:
+        os.remove(path)
@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+# Microbenchmark for the VM's explicit call stack.
+#
+# Times shallow call-heavy code on the recursive tree-walking evaluator and on
+# the VirtualMachine, which runs Chestnut calls on its own frame stack, then
+# checks how deep each engine recurses with its default maximum call depth.
+#
+# Usage: python3 bench/call_stack.py [repeat]
+
+import sys
+
+from common import load, parse, best_time
+from error import RuntimeException
+from evaluator import Evaluator, RecursionLimit
+from vm import VirtualMachine
+
+SOURCE = """
+fn add(a : Integer, b : Integer)
+    return a + b
+endfn
+
+fn calls()
+    let total = 0
+    while loop_index < 20000
+        total = add(total, 1)
+    endwhile
+    return total
+endfn
+
+fn fib(n : Integer)
+    if n < 2
+        return n
+    endif
+    return fib(n - 1) + fib(n - 2)
+endfn
+
+fn down(n : Integer)
+    if n > 0
+        return down(n - 1)
+    endif
+    return n
+endfn
+"""
+
+ENGINES = [("tree", Evaluator), ("vm", VirtualMachine)]
+SHALLOW = ["calls()", "fib(16)"]
+DEEP = [500, 5000, 50000]
+
+def deepest(evaluator):
+    reached = 0
+    for depth in DEEP:
+        evaluator.call_depth = 0
+        try:
+            with RecursionLimit(evaluator):
+                evaluator.evaluate(parse(f"down({depth})"))
+        except RuntimeException:
+            break
+        reached = depth
+    return reached
+
+if __name__ == "__main__":
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    for source in SHALLOW:
+        times = [ (name, best_time(load(SOURCE, engine), source, repeat)[0]) for name, engine in ENGINES ]
+        print(source)
+        for name, best in times:
+            print(f"  {name:5s} {best:8.3f}s  {times[0][1] / best:5.2f}x")
+    for name, engine in ENGINES:
+        print(f"deepest recursion ({name}): {deepest(load(SOURCE, engine))}")
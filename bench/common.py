@@ -0,0 +1,50 @@
+# Helpers shared by the benchmarks: timing Python callables, loading Chestnut
+# source into an evaluator and timing an expression evaluated on it.
+#
+# Importing this module puts the repository root on sys.path, so benchmarks
+# import it before the interpreter's own modules.
+
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+sys.path.insert(0, ROOT)
+
+from lexer import lex
+from parser import Parser
+from analyzer import Analyzer
+from evaluator import Evaluator, RecursionLimit
+
+def load(source, evaluator_class=Evaluator, filename="<bench>"):
+    # Analyzes and evaluates source, so its definitions are bound in the
+    # global scope of the evaluator returned.
+    evaluator = evaluator_class()
+    ast = Parser(lex(source, filename)).parse_program()
+    analyzer = Analyzer()
+    for node in ast:
+        analyzer.analyze(node)
+    for node in ast:
+        evaluator.evaluate(node)
+    return evaluator
+
+def parse(expression):
+    return Parser(lex(expression, "<bench>"), 1).parse_expression()
+
+def best_of(operation, repeat):
+    # Calls operation repeat times. Returns the fastest time and what the
+    # last call returned.
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = operation()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+def best_time(evaluator, expression, repeat):
+    # Evaluates expression repeat times. Returns the fastest time and what
+    # the last evaluation gave.
+    call = parse(expression)
+    with RecursionLimit(evaluator):
+        return best_of(lambda: evaluator.evaluate(call), repeat)
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+# Microbenchmark for return, break and continue in tight loops.
+#
+# Compares statements that return completion signals to block runners
+# against the previous control flow, which raised and caught a Python
+# exception for every return, break and continue.
+#
+# Usage: python3 bench/control_flow.py [repeat]
+
+import sys
+
+from common import load, best_time
+import evaluator as ev
+from evaluator import Evaluator
+
+SOURCE = """
+fn first_multiple(n : Integer, of : Integer)
+    while loop_index < n
+        if loop_index > 0
+            if loop_index % of == 0
+                return loop_index
+            endif
+        endif
+    endwhile
+    return n
+endfn
+
+fn early_return()
+    let total = 0
+    while loop_index < 2000
+        total = total + first_multiple(10, 3)
+    endwhile
+    return total
+endfn
+
+fn skip_evens()
+    let odd = 0
+    while loop_index < 20000
+        if loop_index % 2 == 0
+            continue
+        endif
+        odd = odd + 1
+    endwhile
+    return odd
+endfn
+
+fn stop_early()
+    let passes = 0
+    while loop_index < 2000
+        loop
+            if loop_index == 5
+                break
+            endif
+            passes = passes + 1
+        endloop
+    endwhile
+    return passes
+endfn
+"""
+
+BENCHMARKS = ["early_return", "skip_evens", "stop_early"]
+
+class LegacyReturn(BaseException):
+    def __init__(self, value):
+        self.value = value
+
+class LegacyBreak(BaseException):
+    pass
+
+class LegacyContinue(BaseException):
+    pass
+
+class LegacyControlFlowEvaluator(Evaluator):
+    def visit_ReturnStatementNode(self, node):
+        value = None
+        if self.returns_value(node):
+            value = self.evaluate(node.expression)
+        raise LegacyReturn(value)
+
+    def visit_BreakStatementNode(self, node):
+        raise LegacyBreak()
+
+    def visit_ContinueStatementNode(self, node):
+        raise LegacyContinue()
+
+    def run_function_body(self, func):
+        try:
+            for s in func.statement.statements:
+                self.evaluate(s)
+        except LegacyReturn as val:
+            return ev.ReturnValue(val.value)
+        return None
+
+    def run_block(self, statements):
+        self.push_scope()
+        for statement in statements:
+            self.evaluate(statement)
+        self.pop_scope()
+
+    def legacy_loop(self, node, condition):
+        self.push_scope()
+        loop = ev.LoopState(self.current_scope(), False)
+        base_loop_scopes = len(self.scopes)
+        while condition():
+            self.push_scope()
+            try:
+                for statement in node.statements:
+                    self.evaluate(statement)
+            except LegacyBreak:
+                while len(self.scopes) > base_loop_scopes:
+                    self.pop_scope()
+                break
+            except LegacyContinue:
+                loop.index += 1
+                while len(self.scopes) > base_loop_scopes:
+                    self.pop_scope()
+                continue
+            self.pop_scope()
+            loop.index += 1
+        self.pop_scope()
+        del loop.root["loop index"]
+
+    def visit_WhileStatementNode(self, node):
+        self.legacy_loop(node, lambda: self.evaluate(node.condition))
+
+    def visit_LoopStatementNode(self, node):
+        self.legacy_loop(node, lambda: True)
+
+if __name__ == "__main__":
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    for name in BENCHMARKS:
+        before, expected = best_time(load(SOURCE, LegacyControlFlowEvaluator), f"{name}()", repeat)
+        after, result = best_time(load(SOURCE), f"{name}()", repeat)
+        if result != expected:
+            raise SystemExit(f"{name}: signals returned {result}, exceptions returned {expected}")
+        print(f"{name}")
+        print(f"  before (exceptions): {before:8.3f}s")
+        print(f"  after  (signals):    {after:8.3f}s")
+        print(f"  speedup: {before / after:.2f}x")
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+# Compares wall-clock time of the execution engines on Chestnut scripts.
+#
+# Each script is run through the chestnut entry point once per engine and
+# repetition; the best time per engine is reported along with its speedup
+# over the tree-walking evaluator. The `compiled` engine transpiles the script
+# with `chestnut compile` once, then times importing and running the generated
+# module, so CPython's cached bytecode for it is used after the first run.
+#
+# Usage: python3 bench/engines.py [--repeat N] [--engines tree,vm,...] [script.nuts ...]
+
+import os
+import subprocess
+import sys
+import tempfile
+
+from common import ROOT, best_of
+
+DEFAULT_SCRIPTS = ["examples/fib.nuts", "test/sha256.nuts"]
+
+def compile_script(script, output_dir):
+    module = os.path.join(output_dir, os.path.basename(script)[:-len(".nuts")] + "_nuts.py")
+    subprocess.run(
+        [sys.executable, os.path.join(ROOT, "chestnut"), "compile", script, "-o", module],
+        cwd=ROOT, check=True
+    )
+    return module
+
+def run(engine, script, module=None):
+    command = [sys.executable, os.path.join(ROOT, "chestnut"), f"--engine={engine}", script]
+    env = None
+    if engine == "compiled":
+        name = os.path.basename(module)[:-len(".py")]
+        command = [sys.executable, "-c", f"import {name}; {name}.main([])"]
+        env = dict(os.environ, PYTHONPATH=os.path.dirname(module))
+    subprocess.run(command, cwd=ROOT, env=env, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, check=True)
+
+if __name__ == "__main__":
+    argv = sys.argv[1:]
+    repeat = 3
+    engines = ["tree", "vm", "closure", "compiled"]
+    while len(argv) > 0 and argv[0].startswith("--"):
+        option = argv.pop(0)
+        if option == "--repeat":
+            repeat = int(argv.pop(0))
+        elif option == "--engines":
+            engines = argv.pop(0).split(",")
+    scripts = argv if len(argv) > 0 else DEFAULT_SCRIPTS
+
+    output_dir = tempfile.mkdtemp()
+    for script in scripts:
+        print(script)
+        module = compile_script(script, output_dir) if "compiled" in engines else None
+        baseline = None
+        for engine in engines:
+            best, _ = best_of(lambda: run(engine, script, module), repeat)
+            if baseline is None:
+                baseline = best
+            print(f"  {engine:10s} {best:8.3f}s  {baseline / best:5.2f}x")
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+# Microbenchmark for Evaluator.evaluate dispatch.
+#
+# Compares the cached per-class dispatch table against the previous
+# name-formatting/hasattr/getattr dispatch and reports nodes per second.
+#
+# Usage: python3 bench/evaluate_dispatch.py [iterations]
+
+import sys
+
+from common import parse, best_of
+from parser import BinaryOperationNode, UnaryOperationNode
+import evaluator as ev
+from evaluator import Evaluator
+
+class LegacyDispatchEvaluator(Evaluator):
+    def evaluate(self, node):
+        ev._VMS.clear()
+        ev._VMS.append(self)
+        visitor_method = f"visit_{node.__class__.__name__}"
+        if hasattr(self, visitor_method):
+            return getattr(self, visitor_method)(node)
+        raise ev.RuntimeException(f"Can't evaluate unknown node type {type(node)}")
+
+def count_nodes(node):
+    if isinstance(node, BinaryOperationNode):
+        return 1 + count_nodes(node.left) + count_nodes(node.right)
+    if isinstance(node, UnaryOperationNode):
+        return 1 + count_nodes(node.right)
+    return 1
+
+def run(evaluator_class, expression, iterations):
+    evaluator = evaluator_class()
+    evaluate = evaluator.evaluate
+    nodes = count_nodes(expression) * iterations
+
+    def evaluate_all():
+        for _ in range(iterations):
+            evaluate(expression)
+
+    elapsed, _ = best_of(evaluate_all, 1)
+    return nodes / elapsed
+
+if __name__ == "__main__":
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    expression = parse("((1 + 2) * 3 - 4) % 5 + (6 << 1) - (7 & 3) + -8")
+
+    before = run(LegacyDispatchEvaluator, expression, iterations)
+    after = run(Evaluator, expression, iterations)
+
+    print(f"Nodes per expression: {count_nodes(expression)}, iterations: {iterations}")
+    print(f"before (name dispatch):  {before:12,.0f} nodes/s")
+    print(f"after  (dispatch table): {after:12,.0f} nodes/s")
+    print(f"speedup: {after / before:.2f}x")
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# Microbenchmark for the native hashing of lib/hash.nuts.
+#
+# Hashes messages of a few sizes with the sha256 written in Chestnut and with
+# Hasher.new("sha256"), and keys with the FNV-1a loop HashMap.hash ran in
+# Chestnut and with fnv1a(). Then measures the memory hashing a file with
+# update() takes against reading it whole.
+#
+# Usage: python3 bench/hashing.py [megabytes] [repeat]
+
+import os
+import sys
+import tempfile
+import tracemalloc
+
+from common import load, best_time
+from chestnut_types import ChestnutFileHandle, ChestnutHasher
+
+SOURCE = """
+import "hash"
+
+fn chestnut_sha256(message : String) returns String
+    return int_list_to_hex_string(sha256(message))
+endfn
+
+fn native_sha256(message : String) returns String
+    return Hasher.new("sha256").update(message).hexdigest()
+endfn
+
+# HashMap.hash before it used fnv1a().
+fn chestnut_fnv1a(keys : List) returns List
+    let hashes = []
+    for keys as key
+        let idx = uint64(14695981039346656037)
+        constant FNV_prime = uint64(1099511628211)
+        for uint64(key) as byte
+            idx = uint64(idx ^ byte)
+            idx = idx * FNV_prime
+        endfor
+        push(hashes, idx)
+    endfor
+    return hashes
+endfn
+
+fn native_fnv1a(keys : List) returns List
+    let hashes = []
+    for keys as key
+        push(hashes, fnv1a(key))
+    endfor
+    return hashes
+endfn
+"""
+
+def compare(evaluator, label, before, after, repeat):
+    before_time, expected = best_time(evaluator, before, repeat)
+    after_time, result = best_time(evaluator, after, repeat)
+    expected, result = str(expected), str(result)
+    if result != expected:
+        raise SystemExit(f"{label} gave {result[:40]} natively, {expected[:40]} in Chestnut")
+    print(f"  {label:22s} Chestnut {before_time:7.3f}s  native {after_time:7.4f}s  {before_time / after_time:8.1f}x")
+
+def peak_memory(operation):
+    tracemalloc.start()
+    result = operation()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak, result
+
+if __name__ == "__main__":
+    megabytes = int(sys.argv[1]) if len(sys.argv) > 1 else 64
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    evaluator = load(SOURCE, filename="hashing.nuts")
+    print("sha256")
+    for size in (64, 1024, 4096):
+        message = ("chestnut " * size)[:size]
+        compare(evaluator, f"{size} byte message", f'chestnut_sha256("{message}")', f'native_sha256("{message}")', repeat)
+    print("FNV-1a")
+    keys = ", ".join(f'"key {index}"' for index in range(1000))
+    compare(evaluator, "1000 keys", f"chestnut_fnv1a([{keys}])", f"native_fnv1a([{keys}])", repeat)
+    with tempfile.NamedTemporaryFile(delete=False) as f:
+        f.write(os.urandom(megabytes * 1024 * 1024))
+        path = f.name
+    try:
+        def whole():
+            with open(path, "rb") as f:
+                hasher = ChestnutHasher("sha256")
+                hasher.value.update(f.read())
+                return hasher.hexdigest().value
+        def chunked():
+            with open(path, "rb") as f:
+                hasher = ChestnutHasher("sha256")
+                hasher.update(ChestnutFileHandle(f))
+                return hasher.hexdigest().value
+        whole_peak, expected = peak_memory(whole)
+        chunked_peak, result = peak_memory(chunked)
+        if result != expected:
+            raise SystemExit(f"Hashing the file a chunk at a time gave {result}, {expected} whole")
+        print(f"Hashing a {megabytes}MB file")
+        print(f"  read whole {whole_peak / 1048576:7.1f}MB  update(handle) {chunked_peak / 1048576:5.1f}MB")
+    finally:
+        os.remove(path)
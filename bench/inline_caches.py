@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# Microbenchmark for the inline caches of property accesses and assignments.
+#
+# Walks a list of struct instances, reading and writing a field of each, from
+# a monomorphic site (one struct type), a polymorphic one (three types) and a
+# megamorphic one (eight types, more than a cache keeps). Each site is timed
+# without inline caches, with room for one receiver class like a monomorphic
+# cache, and with the default number of entries, and reports the share of
+# property lookups the caches answered.
+#
+# Usage: python3 bench/inline_caches.py [n] [repeat]
+
+import sys
+
+from common import load, best_time
+from evaluator import Evaluator, ChestnutInteger, ChestnutList
+
+STRUCT_TYPES = 8
+
+SOURCE = "".join(f"""
+struct Point{i}
+    x : Integer
+    y : Integer
+endstruct
+""" for i in range(STRUCT_TYPES)) + """
+fn walk(items : List)
+    let total = 0
+    for items as item
+        item.x = item.x + item.y
+        total += item.x
+    endfor
+    return total
+endfn
+"""
+
+SITES = [("monomorphic", 1), ("polymorphic", 3), ("megamorphic", STRUCT_TYPES)]
+
+def sized(size):
+    class Sized(Evaluator):
+        INLINE_CACHE_SIZE = size
+    return Sized
+
+CONFIGURATIONS = [
+    ("no cache", sized(0)),
+    ("1 entry", sized(1)),
+    (f"{Evaluator.INLINE_CACHE_SIZE} entries", Evaluator),
+]
+
+def items(evaluator, types, n):
+    structs = [ evaluator.scopes[0][f"Point{i}"] for i in range(types) ]
+    elements = []
+    for i in range(n):
+        instance = structs[i % types].constructor()
+        instance.x = ChestnutInteger(i)
+        instance.y = ChestnutInteger(1)
+        elements.append(instance)
+    return ChestnutList(elements)
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    for site, types in SITES:
+        print(f"{site} ({types} struct type{'s' if types > 1 else ''})")
+        baseline = expected = None
+        for label, evaluator_class in CONFIGURATIONS:
+            evaluator = load(SOURCE, evaluator_class)
+            evaluator.scopes[0]["items"] = items(evaluator, types, n)
+            best, result = best_time(evaluator, "walk(items)", repeat)
+            if expected is None:
+                baseline, expected = best, result
+            elif result != expected:
+                raise SystemExit(f"{site} with {label} returned {result}, expected {expected}")
+            stats = evaluator.inline_cache_stats()["property"]
+            hit_rate = stats["hits"] / max(1, stats["hits"] + stats["misses"])
+            print(f"  {label:10s} {best:8.3f}s  {baseline / best:5.2f}x  {hit_rate:6.1%} hits")
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# Microbenchmark for the interned Chestnut values.
+#
+# Runs a string split and a count with small integers, true and false and
+# one character strings shared, and again with every Integer, Boolean and
+# String made afresh as before. Reports how many distinct objects the
+# constructors of those types returned during each run, and the time it took.
+#
+# Usage: python3 bench/interning.py [n] [repeat]
+
+import sys
+
+from common import load, parse, best_time
+import chestnut_types
+from chestnut_types import ChestnutInteger, ChestnutBoolean, ChestnutString, interned
+
+SOURCE = """
+fn split_words(text : String)
+    return length(split(text, " "))
+endfn
+
+fn count(n : Integer)
+    let total = 0
+    let rounds = 0
+    while rounds < n / 1000
+        let i = 0
+        while i < 1000
+            if i % 3 == 0
+                total += 1
+            endif
+            i += 1
+        endwhile
+        rounds += 1
+    endwhile
+    return total
+endfn
+"""
+
+COUNTED_TYPES = [ChestnutInteger, ChestnutBoolean, ChestnutString]
+
+class NothingShared:
+    # Stands in for the table of one character Strings, keeping none.
+    def __getitem__(self, code_point):
+        return None
+
+    def __setitem__(self, code_point, string):
+        pass
+
+def boolean_afresh(cls, token=None):
+    if token.__class__ is not bool and hasattr(token, "data"):
+        return interned(cls, token.data)
+    return interned(cls, bool(token))
+
+class Interning:
+    # Turns the interning of values off, the way the constructors behaved
+    # before, and back on.
+    def __init__(self, shared):
+        self.shared = shared
+
+    def __enter__(self):
+        if not self.shared:
+            self.saved = (chestnut_types.SMALL_INT_MIN, chestnut_types.SMALL_INT_MAX,
+                chestnut_types.ONE_CHARACTER_STRINGS, ChestnutBoolean.__new__)
+            chestnut_types.SMALL_INT_MIN, chestnut_types.SMALL_INT_MAX = 1, 0
+            chestnut_types.ONE_CHARACTER_STRINGS = NothingShared()
+            ChestnutBoolean.__new__ = boolean_afresh
+
+    def __exit__(self, *exc):
+        if not self.shared:
+            (chestnut_types.SMALL_INT_MIN, chestnut_types.SMALL_INT_MAX,
+                chestnut_types.ONE_CHARACTER_STRINGS, ChestnutBoolean.__new__) = self.saved
+
+class Allocations:
+    # Counts the distinct objects the constructors of COUNTED_TYPES return,
+    # keeping each alive so the id of a freed one isn't reused.
+    def __enter__(self):
+        self.made = {}
+        self.constructors = []
+        for cls in COUNTED_TYPES:
+            constructor = cls.__new__
+            self.constructors.append((cls, constructor))
+            def counted(cls, token=None, constructor=constructor):
+                value = constructor(cls, token)
+                self.made[id(value)] = value
+                return value
+            cls.__new__ = counted
+        return self
+
+    def __exit__(self, *exc):
+        for cls, constructor in self.constructors:
+            cls.__new__ = constructor
+        self.count = len(self.made)
+        self.made = None
+
+def run(evaluator, source, repeat, shared):
+    call = parse(source)
+    with Interning(shared):
+        best, result = best_time(evaluator, source, repeat)
+        with Allocations() as allocations:
+            evaluator.evaluate(call)
+    return best, allocations.count, str(result)
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    words = " ".join(f"word{i % 100}" for i in range(n // 8))
+    evaluator = load(SOURCE)
+    for source in [f'split_words("{words}")', f"count({n})"]:
+        print(source if len(source) < 40 else source[:36] + '...")')
+        before, before_made, expected = run(evaluator, source, repeat, False)
+        after, after_made, result = run(evaluator, source, repeat, True)
+        if result != expected:
+            raise SystemExit(f"{source} returned {result} with interning, {expected} without")
+        print(f"  made afresh: {before:8.3f}s  {before_made:9,} objects")
+        print(f"  interned:    {after:8.3f}s  {after_made:9,} objects")
+        print(f"  {before_made / max(1, after_made):.1f}x fewer objects, {before / after:.2f}x faster")
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# Microbenchmark for the loop engine.
+#
+# Times loops in the style of examples/loop.nuts on the Evaluator against a
+# copy of the previous loop code, which kept loop_index as a Chestnut Integer
+# in the loop's root scope, looked it up through every scope on each read and
+# pushed a new scope for every pass. The VM and closure engines share the new
+# loop state and are timed for comparison.
+#
+# Usage: python3 bench/loops.py [n] [repeat]
+
+import sys
+
+from common import load, best_time
+from evaluator import *
+from vm import VirtualMachine
+from closures import ClosureEvaluator
+
+SOURCE = """
+fn nested(n : Integer)
+    let total = 0
+    while loop_index < n
+        for range(0, 9) as j
+            total += loop_index + j
+        endfor
+    endwhile
+    return total
+endfn
+
+fn counted(n : Integer)
+    let total = 0
+    loop
+        if loop_index == n
+            break
+        endif
+        let step = loop_index * 2
+        total += step
+    endloop
+    return total
+endfn
+
+fn repeated(n : Integer)
+    let total = 0
+    do
+        total += 1
+    until loop_index == n - 1
+    return total
+endfn
+"""
+
+class LegacyEvaluator(Evaluator):
+    # The loop code as it was before loops kept a LoopState.
+
+    def run_loop_pass(self, statements, root_loop_scope, base_loop_scopes):
+        evaluate = self.evaluate
+        for statement in statements:
+            signal = evaluate(statement)
+            if isinstance(signal, Signal):
+                if signal is CONTINUE_LOOP:
+                    break
+                if signal is BREAK_LOOP:
+                    del self.scopes[base_loop_scopes:]
+                return signal
+        del self.scopes[base_loop_scopes:]
+        root_loop_scope["loop index"] = root_loop_scope["loop index"] + ChestnutInteger(1)
+        return None
+
+    def run_loop(self, node, condition, elements=None):
+        root_loop_scope = self.current_scope()
+        root_loop_scope["loop index"] = ChestnutInteger(0)
+        base_loop_scopes = len(self.scopes)
+        passes = iter(elements) if elements is not None else None
+        while True:
+            if passes is not None:
+                elem = next(passes, passes)
+                if elem is passes:
+                    break
+            elif not condition(root_loop_scope):
+                break
+            self.push_scope()
+            if passes is not None:
+                self.current_scope()[node.identifier.data] = elem
+            signal = self.run_loop_pass(node.statements, root_loop_scope, base_loop_scopes)
+            if signal is not None:
+                if signal is BREAK_LOOP:
+                    break
+                return signal
+        self.pop_scope()
+        del root_loop_scope["loop index"]
+
+    def visit_LoopStatementNode(self, node):
+        self.push_scope()
+        return self.run_loop(node, lambda root: True)
+
+    def visit_WhileStatementNode(self, node):
+        self.push_scope()
+        return self.run_loop(node, lambda root: self.evaluate(node.condition))
+
+    def visit_UntilStatementNode(self, node):
+        self.push_scope()
+        return self.run_loop(node, lambda root:
+            root["loop index"].value == 0 or not self.evaluate(node.condition))
+
+    def visit_ForStatementNode(self, node):
+        self.push_scope()
+        return self.run_loop(node, None, self.evaluate(node.subject))
+
+    def visit_LoopindexExpressionNode(self, node):
+        scope = self.find_first_scope_containing("loop index")
+        if scope is None:
+            raise Exception(f"`loop_index` keyword must be used inside a loop")
+        return scope["loop index"]
+
+ENGINES = [
+    ("tree (before)", LegacyEvaluator),
+    ("tree", Evaluator),
+    ("vm", VirtualMachine),
+    ("closure", ClosureEvaluator),
+]
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    for source in [f"nested({n})", f"counted({n * 10})", f"repeated({n * 10})"]:
+        print(source)
+        baseline = expected = None
+        for name, engine in ENGINES:
+            best, result = best_time(load(SOURCE, engine), source, repeat)
+            if expected is None:
+                baseline, expected = best, result
+            elif result != expected:
+                raise SystemExit(f"{name} returned {result} for {source}, expected {expected}")
+            print(f"  {name:14s} {best:8.3f}s  {baseline / best:5.2f}x")
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+# Microbenchmark for the native Map.
+#
+# Sets n keys, then gets every one of them, in the HashMap lib/collections.nuts
+# had before, whose buckets were Lists of KVs searched and rehashed in
+# Chestnut, in the HashMap that wraps a Map now, and in a Map with index
+# syntax. The HashMap of before is timed on its own, smaller, number of keys
+# and its time scaled to n.
+#
+# Usage: python3 bench/map.py [n] [n for the HashMap of before] [repeat]
+
+import sys
+
+from common import load, parse, best_time
+
+SOURCE = """
+import "collections"
+
+# HashMap as it was before it kept its keys in a Map.
+struct BucketHashMap
+    buckets : List
+    size : Integer
+    initial_size : Integer
+    keys : Integer
+    keys_list : List
+endstruct
+
+fn (BucketHashMap) new(initial_size : Integer = 7) returns BucketHashMap
+    let hm = BucketHashMap()
+    hm.buckets = []
+    hm.size = initial_size
+    hm.initial_size = initial_size
+    hm.keys = 0
+    hm.keys_list = []
+    hm.resize(initial_size)
+    return hm
+endfn
+
+fn (h : BucketHashMap) resize(new_size : Integer)
+    let old_buckets = null
+    if length(h.buckets) != 0
+        old_buckets = h.buckets
+    endif
+    let buckets = []
+    for range(0, 2**new_size) as bucket
+        push(buckets, [])
+    endfor
+    h.size = new_size
+    h.keys = 0
+    h.buckets = buckets
+    if old_buckets != null
+        for old_buckets as bucket
+            for bucket as entry
+                h.set(entry.key, entry.value)
+            endfor
+        endfor
+    endif
+endfn
+
+fn (h : BucketHashMap) hash(key : String) returns Integer
+    return __internal_fnv1a__(key) & (uint64(2 ** h.size) - uint64(1))
+endfn
+
+fn (h : BucketHashMap) set(key : String, value : Any)
+    if h.keys * 4 > 2 ** h.size * 3 and h.size < 63
+        h.resize(h.size + 1)
+    endif
+    let bucket_index = h.hash(key)
+    let found = false
+    for h.buckets[bucket_index] as item
+        if item.key == key
+            item.value = value
+            found = true
+            break
+        endif
+    endfor
+    if not found
+        h.keys = h.keys + 1
+        push(h.keys_list, key)
+        push(h.buckets[bucket_index], KV.new(key, value))
+    endif
+endfn
+
+fn (h : BucketHashMap) get(key : String, default : Any = null) returns Any
+    let bucket_index = h.hash(key)
+    let kv_value = null
+    let found = false
+    for h.buckets[bucket_index] as item
+        if item.key == key
+            kv_value = item.value
+            found = true
+            break
+        endif
+    endfor
+    return use kv_value over default unless not found
+endfn
+
+fn (h : BucketHashMap) get_keys() returns List
+    return h.keys_list
+endfn
+
+fn make_keys(n : Integer) returns List
+    let keys = []
+    for range(1, n) as i
+        push(keys, "key {{ i }}")
+    endfor
+    return keys
+endfn
+
+fn set_bucket_hashmap(keys : List) returns BucketHashMap
+    let h = BucketHashMap.new()
+    for keys as key
+        h.set(key, loop_index)
+    endfor
+    return h
+endfn
+
+fn set_hashmap(keys : List) returns HashMap
+    let h = HashMap.new()
+    for keys as key
+        h.set(key, loop_index)
+    endfor
+    return h
+endfn
+
+fn set_map(keys : List) returns Map
+    let m = {}
+    for keys as key
+        m[key] = loop_index
+    endfor
+    return m
+endfn
+
+fn get_bucket_hashmap(h : BucketHashMap, keys : List) returns Integer
+    let total = 0
+    for keys as key
+        total += h.get(key)
+    endfor
+    return total
+endfn
+
+fn get_hashmap(h : HashMap, keys : List) returns Integer
+    let total = 0
+    for keys as key
+        total += h.get(key)
+    endfor
+    return total
+endfn
+
+fn get_map(m : Map, keys : List) returns Integer
+    let total = 0
+    for keys as key
+        total += m[key]
+    endfor
+    return total
+endfn
+"""
+
+def measure(evaluator, kind, keys, repeat):
+    # Sets the keys bound to the name given, then gets them all. Returns the
+    # times each took, the sum of what was got and the keys that were set.
+    set_time, filled = best_time(evaluator, f"set_{kind}({keys})", repeat)
+    evaluator.scopes[0]["bench_filled"] = filled
+    get_time, total = best_time(evaluator, f"get_{kind}(bench_filled, {keys})", repeat)
+    if kind == "map":
+        set_keys = filled.keys()
+    else:
+        set_keys = evaluator.evaluate(parse("bench_filled.get_keys()"))
+    return set_time, get_time, total.value, [ str(key) for key in set_keys ]
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    before_n = int(sys.argv[2]) if len(sys.argv) > 2 else 20000
+    repeat = int(sys.argv[3]) if len(sys.argv) > 3 else 1
+    evaluator = load(SOURCE, filename="map.nuts")
+    scope = evaluator.scopes[0]
+    scope["bench_keys"] = evaluator.evaluate(parse(f"make_keys({n})"))
+    scope["bench_before_keys"] = evaluator.evaluate(parse(f"make_keys({before_n})"))
+    expected_keys = [ str(key) for key in scope["bench_keys"] ]
+    expected_total = n * (n - 1) // 2
+
+    before_set, before_get, total, set_keys = measure(evaluator, "bucket_hashmap", "bench_before_keys", repeat)
+    # Its get_keys() repeated the keys set before each resize.
+    if total != before_n * (before_n - 1) // 2 or set(set_keys) != set(expected_keys[:before_n]):
+        raise SystemExit("The HashMap of before didn't keep the keys it was given")
+    scale = n / before_n
+    before_set *= scale
+    before_get *= scale
+
+    print(f"{n} keys")
+    for label, kind in [("HashMap", "hashmap"), ("Map", "map")]:
+        set_time, get_time, total, set_keys = measure(evaluator, kind, "bench_keys", repeat)
+        if total != expected_total or set_keys != expected_keys:
+            raise SystemExit(f"{label} gave {total}, {expected_total} expected")
+        print(f"  {label:8s} set  before {before_set:8.2f}s  now {set_time:6.2f}s  {before_set / set_time:6.1f}x")
+        print(f"  {label:8s} get  before {before_get:8.2f}s  now {get_time:6.2f}s  {before_get / get_time:6.1f}x")
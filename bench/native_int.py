@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# Microbenchmark for the wide Integer types backed by chestnut_native.
+#
+# Runs fibonacci from examples/fib.nuts, which adds UInt1024s, and a chain of
+# additions, subtractions and multiplications on every width from 128 to
+# 1024 bits, signed and unsigned. Each is timed with the arithmetic of
+# c/lib/int.c and again with the Python ints the types fall back to when the
+# extension isn't built.
+#
+# Usage: python3 generate_bindings.py && python3 bench/native_int.py [n] [repeat]
+
+import os
+import sys
+
+from common import ROOT, load, best_of, best_time
+import chestnut_types
+from chestnut_types import NATIVE_INTEGER_TYPES
+
+NATIVE_ATTRIBUTES = ["__add__", "__sub__", "__mul__", "__getattr__"]
+
+class PythonInts:
+    # Takes the native arithmetic off the wide types for a while, leaving the
+    # operations they inherit on Python ints.
+    def __init__(self, native):
+        self.native = native
+
+    def __enter__(self):
+        self.saved = []
+        if not self.native:
+            for number_class in NATIVE_INTEGER_TYPES:
+                for name in NATIVE_ATTRIBUTES:
+                    self.saved.append((number_class, name, number_class.__dict__[name]))
+                    delattr(number_class, name)
+
+    def __exit__(self, *exc):
+        for number_class, name, attribute in self.saved:
+            setattr(number_class, name, attribute)
+
+def fibonacci(evaluator, n, repeat, native):
+    with PythonInts(native):
+        best, result = best_time(evaluator, f"fibonacci({n})", repeat)
+        result = str(result)
+    return best, result
+
+def chain(number_class, n, repeat, native):
+    # The operations of `total = (total + a) * b - a`, wrapping as they go.
+    width = number_class.BIT_WIDTH
+
+    def run():
+        total = number_class(1)
+        for _ in range(n):
+            total = (total + a) * b - a
+        return total
+
+    with PythonInts(native):
+        a = number_class((1 << (width - 3)) + 12345)
+        b = number_class((1 << (width // 2)) + 7)
+        best, total = best_of(run, repeat)
+        result = str(total)
+    return best, result
+
+def compare(label, measure):
+    before, expected = measure(False)
+    after, result = measure(True)
+    if result != expected:
+        raise SystemExit(f"{label} gave {result[:40]} natively, {expected[:40]} with Python ints")
+    print(f"  {label:16s} python {before:7.3f}s  native {after:7.3f}s  {before / after:5.2f}x")
+
+if __name__ == "__main__":
+    if chestnut_types.chestnut_native is None:
+        raise SystemExit("chestnut_native isn't built, run python3 generate_bindings.py")
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    with open(os.path.join(ROOT, "examples", "fib.nuts")) as f:
+        evaluator = load(f.read(), filename="fib.nuts")
+    print("examples/fib.nuts")
+    for count in (100, 1000, n):
+        compare(f"fibonacci({count})", lambda native: fibonacci(evaluator, count, repeat, native))
+    print(f"{n} passes of (total + a) * b - a")
+    for number_class in NATIVE_INTEGER_TYPES:
+        label = number_class.__name__.replace("Chestnut", "")
+        compare(label, lambda native: chain(number_class, n, repeat, native))
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+# Microbenchmark for the numeric types.
+#
+# Times arithmetic and comparisons on every Integer width, signed and
+# unsigned, and on Float, against copies of the previous operations. Those
+# converted both operands to strings on every operation to spot NaN and
+# undefined, compared type names to check the operands matched and looked up
+# the mask of the result's type again each time one was made.
+#
+# Usage: python3 bench/numeric.py [n] [repeat]
+
+import sys
+from functools import wraps
+
+from common import best_of
+import chestnut_types
+from chestnut_types import *
+
+def legacy_comparison_operation(op_symbol, op_name, reverse=False):
+    def decorator(func):
+        @wraps(func)
+        def wrapper(self, other):
+            self_str = self.__str__()
+            other_str = other.__str__()
+            values = ["NaN", "undefined"]
+            if self_str in values or other_str in values:
+                return ChestnutBoolean(False)
+            self.__typecheck__(other, op_name)
+            left = self.value if not reverse else other.value
+            right = other.value if not reverse else self.value
+            return ChestnutBoolean(left.__getattribute__(op_symbol)(right))
+        return wrapper
+    return decorator
+
+def legacy_numeric_operation(op_symbol, op_name, reverse=False):
+    def decorator(func):
+        @wraps(func)
+        def wrapper(self, other):
+            self_str = self.__str__()
+            other_str = other.__str__()
+            values = ["NaN", "undefined"]
+            if self_str in values or other_str in values:
+                return CHESTNUT_NAN
+            if not isinstance(other, ChestnutAny):
+                other = self.__class__(other)
+            if func.__name__ == "__add__" and isinstance(other, ChestnutString):
+                return NotImplemented
+            self.__typecheck__(other, op_name)
+            if func.__name__.endswith("div__") or func.__name__.endswith("mod__"):
+                divisor = self if reverse else other
+                if divisor.value == 0:
+                    return CHESTNUT_NAN
+            left = self.value if not reverse else other.value
+            right = other.value if not reverse else self.value
+            return type(self)(left.__getattribute__(op_symbol)(right))
+        return wrapper
+    return decorator
+
+class LegacyNumber:
+    # The operations of the numeric types as they were before.
+
+    def __new__(cls, token=None):
+        return object.__new__(cls)
+
+    def __init__(self, token):
+        if isinstance(token, ChestnutNumber):
+            token = int(token.value)
+        if isinstance(token, int):
+            max_bits = self.BIT_WIDTH
+            if max_bits != -1:
+                if hasattr(self, "MASK"):
+                    mask = self.MASK
+                else:
+                    mask = (1 << max_bits) - 1
+                token = token & mask
+                if not hasattr(self, "MASK"):
+                    sign_bit_mask = 1 << (max_bits - 1)
+                    if token & sign_bit_mask:
+                        token = token - (1 << max_bits)
+        ChestnutAny.__init__(self, token)
+
+    def __typecheck__(self, other, op):
+        if isinstance(other, ChestnutNaN):
+            return
+        other_type = type(other).__name__
+        if isinstance(other, ChestnutAny):
+            other_type = other.gettype()
+        if not type(self) == type(other):
+            raise TypeException(f"Attempted to {op} {self.gettype()} and {other_type}")
+
+    def __eq__(self, other):
+        if isinstance(self, ChestnutNull) or isinstance(other, ChestnutNull):
+            return ChestnutBoolean(isinstance(self, ChestnutNull) and isinstance(other, ChestnutNull))
+        if not isinstance(other, ChestnutAny):
+            raise Exception(f"Chestnut types must compare to Chestnut types. Given { type(other) }")
+        self.__typecheck__(other, "equals")
+        return ChestnutBoolean(self.value == other.value)
+
+    @legacy_numeric_operation("__add__", "add")
+    def __add__(self, other): pass
+
+    @legacy_numeric_operation("__sub__", "sub")
+    def __sub__(self, other): pass
+
+    @legacy_numeric_operation("__mul__", "multiply")
+    def __mul__(self, other): pass
+
+    @legacy_numeric_operation("__mod__", "mod")
+    def __mod__(self, other): pass
+
+    @legacy_comparison_operation("__le__", "less than or equal to")
+    def __le__(self, other): pass
+
+class LegacyInteger(LegacyNumber):
+    @legacy_numeric_operation("__floordiv__", "divide")
+    def __floordiv__(self, other): pass
+
+class LegacyFloat(LegacyNumber):
+    def __init__(self, token):
+        ChestnutAny.__init__(self, token)
+
+    @legacy_numeric_operation("__truediv__", "divide")
+    def __truediv__(self, other): pass
+
+def legacy(number_class):
+    base = LegacyFloat if issubclass(number_class, ChestnutFloat) else LegacyInteger
+    return type(f"Legacy{number_class.__name__}", (base, number_class), {})
+
+NUMBER_TYPES = [ChestnutInteger] + [
+    getattr(chestnut_types, f"Chestnut{prefix}{width}")
+    for prefix in ("Int", "UInt")
+    for width in (8, 16, 32, 64, 128, 256, 512, 1024)
+] + [ChestnutFloat]
+
+def operands(number_class):
+    if issubclass(number_class, ChestnutFloat):
+        return 12345.678, 3.25
+    width = number_class.BIT_WIDTH if number_class.BIT_WIDTH != -1 else 64
+    # Values near the top of the type so results wrap.
+    return (1 << (width - 2)) + 12345, (1 << (width // 2)) + 7
+
+def arithmetic(a, b, n):
+    # The operations of expressions like `(a + b) * b % a - b`, `a / b`,
+    # `a <= b` and `a == b`.
+    divide = a.__truediv__ if isinstance(a, ChestnutFloat) else a.__floordiv__
+    for _ in range(n):
+        total = a + b
+        product = total * b
+        remainder = product % a
+        difference = remainder - b
+        quotient = divide(b)
+        less = a <= b
+        equal = a == b
+    return difference, quotient, less, equal
+
+def run(number_class, n, repeat):
+    left, right = operands(number_class)
+    a, b = number_class(left), number_class(right)
+    best, result = best_of(lambda: arithmetic(a, b, n), repeat)
+    return best, [ str(value) for value in result ]
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    print(f"{n} passes of 7 operations")
+    for number_class in NUMBER_TYPES:
+        before, expected = run(legacy(number_class), n, repeat)
+        after, result = run(number_class, n, repeat)
+        if result != expected:
+            raise SystemExit(f"{number_class.__name__} gave {result}, before {expected}")
+        name = number_class.__name__.replace("Chestnut", "")
+        print(f"  {name:10s} before {before:7.3f}s  after {after:7.3f}s  {before / after:5.2f}x")
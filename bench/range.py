@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# Microbenchmark for the lazy range type.
+#
+# Compares iterating range(), which now returns a Range that makes each
+# integer as it is read, against the previous Chestnut implementation that
+# pushed every integer into a List up front. Reports the time and the peak
+# memory Python allocated while each loop ran.
+#
+# Usage: python3 bench/range.py [n] [repeat]
+
+import sys
+import tracemalloc
+
+from common import load, parse, best_time
+
+SOURCE = """
+fn legacy_range (start : Integer, end : Integer) returns List
+    let r = []
+
+    if start <= end
+        let i = start
+        while i <= end
+            push(r, i)
+            i += 1
+        endwhile
+    elif start >= end
+        let i = start
+        while i >= end
+            push(r, i)
+            i -= 1
+        endwhile
+    else
+        push(r, start)
+    endif
+    return r
+endfn
+
+fn sum_legacy(n : Integer)
+    let total = 0
+    for legacy_range(0, n) as i
+        total += i
+    endfor
+    return total
+endfn
+
+fn sum_range(n : Integer)
+    let total = 0
+    for range(0, n) as i
+        total += i
+    endfor
+    return total
+endfn
+"""
+
+def run(evaluator, source, repeat):
+    best, result = best_time(evaluator, source, repeat)
+    call = parse(source)
+    tracemalloc.start()
+    evaluator.evaluate(call)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak, result
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    evaluator = load(SOURCE)
+    before, before_peak, expected = run(evaluator, f"sum_legacy({n})", repeat)
+    after, after_peak, result = run(evaluator, f"sum_range({n})", repeat)
+    if result != expected:
+        raise SystemExit(f"range returned {result}, the List range returned {expected}")
+    print(f"for range(0, {n})")
+    print(f"  before (List):  {before:8.3f}s  peak {before_peak / 1024:10.1f} KiB")
+    print(f"  after  (Range): {after:8.3f}s  peak {after_peak / 1024:10.1f} KiB")
+    print(f"  speedup: {before / after:.2f}x")
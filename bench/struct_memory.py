@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+# Memory benchmark for struct instances.
+#
+# Creates N instances of the KV struct from lib/collections.nuts and reports
+# the bytes allocated per instance. The previous per-instance __dict__ layout
+# (with its own static/publics/privates lists) is measured for comparison.
+#
+# Usage: python3 bench/struct_memory.py [instances]
+
+import gc
+import sys
+import tracemalloc
+
+from common import load
+from chestnut_types import ChestnutStruct, CHESTNUT_NULL
+
+class LegacyStruct(ChestnutStruct):
+    # Subclasses without __slots__ get a __dict__, like structs used to.
+    def __init__(self, fields):
+        ChestnutStruct.__init__(self, CHESTNUT_NULL)
+        for name, default_value in fields:
+            setattr(self, name, default_value)
+        self.static = []
+        self.publics = [name for name, _ in fields]
+        self.privates = []
+
+def measure(factory, count):
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    instances = [factory() for _ in range(count)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    # Don't count the list holding the instances.
+    total = after - before - sys.getsizeof(instances)
+    del instances
+    return total / count
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+
+    evaluator = load('import "collections"')
+    kv = evaluator.find_first_scope_containing("KV")["KV"]
+    fields = tuple(kv.fields)
+
+    legacy = measure(lambda: LegacyStruct(fields), count)
+    slotted = measure(kv.constructor, count)
+
+    print(f"Instances: {count:,} of struct KV ({len(fields)} fields)")
+    print(f"before (__dict__ layout): {legacy:8.1f} bytes/instance")
+    print(f"after  (slot layout):     {slotted:8.1f} bytes/instance")
+    print(f"reduction: {legacy / slotted:.2f}x")
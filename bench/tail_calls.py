@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# Microbenchmark for tail call elimination.
+#
+# Times a tail-recursive count against the same count written as a while
+# loop, with and without tail calls replacing the caller's frame, and reports
+# the deepest scope stack each run reached.
+#
+# Usage: python3 bench/tail_calls.py [n] [repeat]
+
+import sys
+
+from common import load, best_time
+from evaluator import Evaluator
+from vm import VirtualMachine
+
+SOURCE = """
+fn count(n : Integer, total : Integer)
+    if n == 0
+        return total
+    endif
+    return count(n - 1, total + 1)
+endfn
+
+fn count_loop(n : Integer)
+    let total = 0
+    while loop_index < n
+        total = total + 1
+    endwhile
+    return total
+endfn
+"""
+
+def measured(evaluator_class, eliminate):
+    class Measured(evaluator_class):
+        # Records the deepest scope stack a call reached.
+        peak_scopes = 0
+
+        def call_frame(self, node, callable, finalized_args):
+            frame = super().call_frame(node, callable, finalized_args)
+            self.peak_scopes = max(self.peak_scopes, len(self.scopes))
+            return frame
+
+        def replace_frame(self, frame, callee):
+            return eliminate and super().replace_frame(frame, callee)
+    return Measured
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    for name, engine in [("tree", Evaluator), ("vm", VirtualMachine)]:
+        print(name)
+        cases = [
+            ("while loop", measured(engine, True), f"count_loop({n})"),
+            ("tail calls kept", measured(engine, False), f"count({n}, 0)"),
+            ("tail calls eliminated", measured(engine, True), f"count({n}, 0)"),
+        ]
+        for label, evaluator_class, source in cases:
+            evaluator = load(SOURCE, evaluator_class)
+            evaluator.set_max_call_depth(n + 100)
+            best, result = best_time(evaluator, source, repeat)
+            if result.value != n:
+                raise SystemExit(f"{source} returned {result}")
+            print(f"  {label:22s} {best:8.3f}s  peak scopes {evaluator.peak_scopes}")
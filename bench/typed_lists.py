@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+# Microbenchmark for the typed, array-backed Lists.
+#
+# Measures the memory a List of n UInt8s, like bytes() and file reads make,
+# and of n UInt32s, like the word schedules of lib/hash.nuts, takes per
+# element as an ordinary List of Chestnut values and as a typed list. Then
+# times fill, copy, elementwise xor/and/add and sum on both.
+#
+# Usage: python3 bench/typed_lists.py [n] [repeat]
+
+import random
+import sys
+import tracemalloc
+from array import array
+
+from common import best_of
+from chestnut_types import ChestnutList, ChestnutUInt8, ChestnutUInt32, TYPED_LIST_CODES
+
+def boxed(number_type, numbers):
+    # An ordinary List of the numbers, the way they were made before.
+    return ChestnutList([ number_type(number) for number in numbers ])
+
+def typed(number_type, numbers):
+    # Made from an array of the numbers, like bytes() makes one from bytes.
+    return ChestnutList(array(TYPED_LIST_CODES[number_type], numbers), number_type)
+
+def memory(make, number_type, numbers):
+    tracemalloc.start()
+    made = make(number_type, numbers)
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    assert len(made) == len(numbers)
+    return size / len(numbers)
+
+OPERATIONS = [
+    ("fill", lambda a, b: a.fill(ChestnutUInt32(7)) or a),
+    ("copy", lambda a, b: a.copy()),
+    ("elementwise_xor", lambda a, b: a.elementwise_xor(b)),
+    ("elementwise_and", lambda a, b: a.elementwise_and(b)),
+    ("elementwise_add", lambda a, b: a.elementwise_add(b)),
+    ("sum", lambda a, b: a.sum()),
+]
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    rng = random.Random(0)
+    octets = bytes(rng.getrandbits(8) for _ in range(n))
+    words = [ rng.getrandbits(32) for _ in range(n) ]
+    print(f"Memory per element of {n} elements")
+    for label, number_type, numbers in [("UInt8", ChestnutUInt8, octets), ("UInt32", ChestnutUInt32, words)]:
+        before = memory(boxed, number_type, numbers)
+        after = memory(typed, number_type, numbers)
+        print(f"  {label:6s} List {before:6.1f} bytes  typed list {after:5.1f} bytes  {before / after:5.1f}x smaller")
+    print(f"Bulk operations on {n} UInt32s")
+    others = [ rng.getrandbits(32) for _ in range(n) ]
+    for label, operation in OPERATIONS:
+        a, b = boxed(ChestnutUInt32, words), boxed(ChestnutUInt32, others)
+        before, expected = best_of(lambda: operation(a, b), repeat)
+        a, b = typed(ChestnutUInt32, words), typed(ChestnutUInt32, others)
+        after, result = best_of(lambda: operation(a, b), repeat)
+        if str(result) != str(expected):
+            raise SystemExit(f"{label} gave {str(result)[:40]}, before {str(expected)[:40]}")
+        print(f"  {label:16s} List {before:7.3f}s  typed list {after:7.3f}s  {before / after:6.1f}x")
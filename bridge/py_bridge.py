@@ -1,7 +1,14 @@
 from chestnut_types import *
 from error import *
+from array import array
 import ctypes
 libc = ctypes.CDLL(None)
+# FILE pointers don't fit the C int ctypes assumes by default.
+libc.fopen.restype = ctypes.c_void_p
+libc.fopen.argtypes = [ctypes.c_char_p, ctypes.c_char_p]
+libc.fread.restype = ctypes.c_size_t
+libc.fread.argtypes = [ctypes.c_void_p, ctypes.c_size_t, ctypes.c_size_t, ctypes.c_void_p]
+libc.fclose.argtypes = [ctypes.c_void_p]
 
 def __internal_print__(*args):
     print(*args, end='', flush=True)
@@ -14,6 +21,9 @@ def __internal_printline__(*args):
 def __internal_length__(a):
     return ChestnutInteger(len(a))
 
+def __internal_range__(start, end):
+    return ChestnutRange(start, end)
+
 def __internal_readline__():
     return ChestnutString(input())
 
@@ -30,6 +40,35 @@ def __internal_remove__(l, i):
         index = i.value
     return l.pop(index)
 
+# The number types a typed_list can hold, by their Chestnut names.
+TYPED_LIST_TYPES = { number_type.__name__.replace("Chestnut", ""): number_type for number_type in TYPED_LIST_CODES }
+
+def __internal_typed_list__(type_name, size):
+    if not isinstance(type_name, ChestnutString) or type_name.value not in TYPED_LIST_TYPES:
+        raise TypeException(f"typed_list requires a fixed width number type, like \"UInt32\". Given {type_name}")
+    bound_type = TYPED_LIST_TYPES[type_name.value]
+    zeros = array(TYPED_LIST_CODES[bound_type], [0]) * size.value
+    return ChestnutList(zeros, bound_type)
+
+def __internal_fill__(l, value):
+    l.fill(value)
+    return CHESTNUT_NULL
+
+def __internal_copy__(l):
+    return l.copy()
+
+def __internal_elementwise_xor__(a, b):
+    return a.elementwise_xor(b)
+
+def __internal_elementwise_and__(a, b):
+    return a.elementwise_and(b)
+
+def __internal_elementwise_add__(a, b):
+    return a.elementwise_add(b)
+
+def __internal_sum__(l):
+    return l.sum()
+
 def __internal_type__(o):
     if isinstance(o, ChestnutAny):
         return f"{o.gettype()}"
@@ -52,10 +91,13 @@ def __internal_fclose__(handle):
 def __internal_fread__(handle, size):
     if not isinstance(handle, ChestnutInteger) or not isinstance(size, ChestnutInteger):
         return (CHESTNUT_NULL, ChestnutError("fread requires handle and size to be Integer"))
-    buf = ctypes.create_string_buffer(size.value)
-    read = libc.fread(ctypes.byref(buf), 1, size.value, handle.value)
-    data = buf.raw[:read]
-    return (ChestnutList([ChestnutUInt8(d) for d in data]), CHESTNUT_NULL)
+    # fread writes straight into the bytearray the Bytes keeps.
+    data = bytearray(size.value)
+    buf = (ctypes.c_char * size.value).from_buffer(data)
+    read = libc.fread(buf, 1, size.value, handle.value)
+    del buf
+    del data[read:]
+    return (ChestnutBytes(data), CHESTNUT_NULL)
 
 def __internal_open_file__(path, mode):
     if not isinstance(path, ChestnutString) or not isinstance(mode, ChestnutString):
@@ -81,13 +123,15 @@ def __internal_read_file__(handle, size):
         return ChestnutTuple((CHESTNUT_NULL, ChestnutError("Attempted to read from a closed file handle.")))
 
     try:
-        data = file_object.read(size.value)
         if "b" in file_object.mode:
-            d = []
-            for c in data:
-                d.append(ChestnutUInt8(int(c)))
-            return ChestnutTuple(ChestnutList(d), CHESTNUT_NULL)
+            if size.value < 0:
+                data = bytearray(file_object.read())
+            else:
+                data = bytearray(size.value)
+                del data[file_object.readinto(data):]
+            return ChestnutTuple(ChestnutBytes(data), CHESTNUT_NULL)
         else:
+            data = file_object.read(size.value)
             return ChestnutTuple((ChestnutString(data), CHESTNUT_NULL))
     except Exception as e:
         return ChestnutTuple((CHESTNUT_NULL, ChestnutError(f"File I/O error during read: {e}")))
@@ -101,7 +145,9 @@ def __internal_write_file__(handle, data):
         return ChestnutTuple(CHESTNUT_NULL, ChestnutError("Write attempted to closed file handle"))
     try:
         value = data
-        if isinstance(data, ChestnutAny):
+        if isinstance(data, ChestnutBytes):
+            value = data.buffer()
+        elif isinstance(data, ChestnutAny):
             value = data.value
         written = file_object.write(value)
         return ChestnutTuple(ChestnutInteger(written), CHESTNUT_NULL)
@@ -118,7 +164,7 @@ def __internal_delete_file__(path):
         return ChestnutTuple(CHESTNUT_NULL, ChestnutError(f"File I/O Error: File not found at {path.value}"))
     except Exception as e:
         return ChestnutTuple(CHESTNUT_NULL, ChestnutError(f"File I/O Error: Failed to delete file: {e}"))
-    return ChestnutTuple(ChestnutBoolean(True), CHESTNUT_NULL)
+    return ChestnutTuple(CHESTNUT_TRUE, CHESTNUT_NULL)
 
 def __internal_close_file__(handle):
     if not isinstance(handle, ChestnutFileHandle):
@@ -202,7 +248,7 @@ def __internal_to_uint8__(v):
         return ChestnutUInt8(v.value)
 
     if isinstance(v, ChestnutString):
-        bytes = ChestnutList([ ChestnutUInt8(x) for x in v.value.encode("utf-8") ])
+        bytes = ChestnutList(v.value.encode("utf-8"), ChestnutUInt8)
     return bytes
 
 def __internal_to_uint16__(v):
@@ -266,9 +312,98 @@ def __internal_to_uint128__(v):
     if isinstance(v, ChestnutString):
         return [ ChestnutUInt128(x.value) for x in __internal_to_uint8__(v) ]
 
+# The most zero bytes bytes(size) makes, so a mistaken size halts rather
+# than taking all the memory there is.
+BYTES_SIZE_LIMIT = 1 << 31
+
+def __internal_to_bytes__(v):
+    if isinstance(v, ChestnutString):
+        return ChestnutBytes(bytearray(v.value.encode("utf-8")))
+    if isinstance(v, ChestnutInteger):
+        if not 0 <= v.value <= BYTES_SIZE_LIMIT:
+            raise ValueException(f"bytes() makes 0 to {BYTES_SIZE_LIMIT} zero bytes, not {v.value}")
+        return ChestnutBytes(bytearray(v.value))
+    if isinstance(v, ChestnutBytes):
+        return v.copy()
+    if isinstance(v, ChestnutList):
+        return ChestnutBytes(v.array if isinstance(v, ChestnutTypedList) and v.items is None and v.typecode == "B" else v)
+    raise TypeException(f"Can't make Bytes from {v.gettype() if isinstance(v, ChestnutAny) else v}")
+
+def __internal_bytes_from_uint8_list__(l):
+    if isinstance(l, ChestnutBytes):
+        return l.copy()
+    if isinstance(l, ChestnutTypedList) and l.items is None and l.typecode == "B":
+        return ChestnutBytes(l.array)
+    try:
+        return ChestnutBytes(l)
+    except TypeException:
+        return CHESTNUT_NULL
+
+def __internal_bytes_slice__(b, start, end):
+    return b.slice(start.value, end.value)
+
+def __internal_bytes_extend__(b, l):
+    b.extend(l)
+    return CHESTNUT_NULL
+
+def __internal_bytes_to_string__(b):
+    # Formatted from the bytes, without a UInt8 for each.
+    return ChestnutString(str(list(b.buffer())))
+
+def __internal_bytes_decode__(b, encoding):
+    try:
+        return b.decode(encoding.value)
+    except LookupError:
+        return CHESTNUT_NULL
+
+def __internal_hasher_new__(algorithm):
+    return ChestnutHasher(algorithm.value)
+
+def __internal_hasher_update__(hasher, data):
+    hasher.update(data)
+    return CHESTNUT_NULL
+
+def __internal_hasher_digest__(hasher):
+    return hasher.digest()
+
+def __internal_hasher_hexdigest__(hasher):
+    return hasher.hexdigest()
+
+def __internal_hasher_copy__(hasher):
+    return hasher.copy()
+
+def __internal_fnv1a__(data):
+    hasher = ChestnutHasher("fnv1a")
+    hasher.update(data)
+    return ChestnutUInt64(hasher.value.hash)
+
+def __internal_map_get__(m, key, default):
+    return m.get(key, default)
+
+def __internal_map_set__(m, key, value):
+    m.set(key, value)
+    return CHESTNUT_NULL
+
+def __internal_map_has__(m, key):
+    return m.has(key)
+
+def __internal_map_unset__(m, key):
+    value = m.unset(key)
+    return CHESTNUT_NULL if value is None else value
+
+def __internal_map_keys__(m):
+    return m.keys()
+
+def __internal_map_values__(m):
+    return m.values()
+
 def __internal_from_bytes_to_string__(v):
     if isinstance(v, ChestnutInteger):
         return ChestnutString(v.value.decode("utf-8"))
+    if isinstance(v, ChestnutBytes):
+        return v.decode("utf-8")
+    if isinstance(v, ChestnutTypedList) and v.items is None and v.typecode == "B":
+        return ChestnutString(str(v.array, "utf-8", "replace"))
     if isinstance(v, ChestnutList):
         return ChestnutString("".join([ x.value for x in v.value]))
     
@@ -288,16 +423,18 @@ def __internal_get_time__():
     return ChestnutFloat(time.time())
 
 def __internal_will_halt__(func, *args):
+    from evaluator import get_current_vm
     try:
-        func(*args)
-        return ChestnutBoolean(False)
+        get_current_vm().call_value(func, args)
+        return CHESTNUT_FALSE
     except:
-        return ChestnutBoolean(True)
+        return CHESTNUT_TRUE
 
 def __internal_may_halt_or_return__(func, *args):
+    from evaluator import get_current_vm
     try:
-        res = func(*args)
-        return ChestnutTuple((res, CHESTNUT_NULL))
+        res = get_current_vm().call_value(func, args)
+        return ChestnutTuple(res, CHESTNUT_NULL)
     except:
         return ChestnutTuple(CHESTNUT_NULL, ChestnutError(f"A call to {func} has failed"))
 
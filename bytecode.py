@@ -0,0 +1,446 @@
+from parser import *
+from chestnut_types import *
+from token_types import *
+
+# Opcodes understood by the VirtualMachine in vm.py. Every instruction is an
+# (opcode, argument) pair; jump arguments are absolute instruction indexes.
+OPCODE_NAMES = [
+    "LOAD_CONST",         # push the constant at index arg of the CodeObject
+    "LOAD_NAME",          # push the value bound to identifier token arg
+    "LOAD_LOOP_INDEX",    # push the index of the innermost loop
+    "EVAL",               # push the tree-walking evaluation of node arg
+    "EXEC",               # evaluate node arg for its side effects only
+    "POP",                # discard the top of the stack
+    "BINARY_OP",          # pop right and left, push arg(left, right)
+    "UNARY_OP",           # replace the top of the stack with arg(top)
+    "BUILD_LIST",         # pop arg values into a List
+    "BUILD_TUPLE",        # pop arg values into a Tuple
+    "BUILD_MAP",          # pop arg key and value pairs into a Map
+    "INDEX",              # pop index and target, push target[index]
+    "INDEX_TARGET",       # check the target and index of index assignment arg
+    "STORE_INDEX",        # pop value, index and target of index assignment arg
+    "LOAD_PROPERTY",      # replace the top of the stack with its property arg
+    "PROPERTY_SLOT",      # check property assignment arg's target, push its slot
+    "STORE_PROPERTY",     # pop value, slot and target of property assignment arg
+    "ENTER_CALL",         # raise the call depth before a call's operands
+    "CALL",               # arg is (node, argc); pop arguments and callable
+    "TAIL_CALL",          # CALL for `return f(...)`; may replace the frame
+    "JUMP",               # continue at arg
+    "POP_JUMP_IF_FALSE",  # pop a condition, continue at arg if it is falsy
+    "POP_JUMP_IF_TRUE",   # pop a condition, continue at arg if it is truthy
+    "JUMP_IF_FALSE_OR_POP", # continue at arg if the top is falsy, else pop it
+    "JUMP_IF_TRUE_OR_POP",  # continue at arg if the top is truthy, else pop it
+    "JUMP_IF_NOT_NULL",   # continue at arg if the top isn't null, else pop it
+    "JUMP_IF_FIRST_PASS", # continue at arg on the first pass of an until loop
+    "CASE_MATCH",         # pop a value, continue at arg if it equals the subject
+    "PUSH_SCOPE",         # open a block scope
+    "POP_SCOPE",          # close a block scope
+    "LET_LABELS",         # check a let statement's labels, push them
+    "BIND_LET",           # pop the value and labels of a let statement
+    "CONSTANT_LABELS",    # check a constant statement's labels, push them
+    "BIND_CONSTANT",      # pop the value and labels of a constant statement
+    "SHADOW_LABELS",      # check a shadow statement's labels, push them
+    "BIND_SHADOW",        # pop the value and labels of a shadow statement
+    "ASSIGNMENT_SCOPE",   # find the scope assigned to by node arg, push it
+    "BIND_ASSIGNMENT",    # pop the value and scope of assignment node arg
+    "SETUP_LOOP",         # open a loop scope; arg is (top, body, exit, reuse_scope)
+    "SETUP_FOR",          # like SETUP_LOOP, iterating the popped subject
+    "FOR_ITER",           # arg is (identifier, exit); bind the next element
+    "PUSH_PASS_SCOPE",    # open the scope of a pass of the innermost loop
+    "NEXT_ITERATION",     # close the body scope and advance the loop index
+    "BREAK",              # leave the innermost loop
+    "CONTINUE",           # start the next pass of the innermost loop
+    "END_LOOP",           # close the loop scope
+    "RETURN_VALUE",       # return the top of the stack from the function
+    "RETURN_NONE",        # finish the function without a return value
+]
+
+for opcode, opcode_name in enumerate(OPCODE_NAMES):
+    globals()[opcode_name] = opcode
+
+# The jumps that skip the right operand of and/or once the left one decides
+# the result.
+SHORT_CIRCUIT_JUMPS = {
+    "And": JUMP_IF_FALSE_OR_POP,
+    "Or": JUMP_IF_TRUE_OR_POP,
+}
+
+LITERAL_TYPES = (
+    ChestnutInteger, ChestnutUInt8, ChestnutBoolean, ChestnutFloat,
+    ChestnutString, ChestnutNaN, ChestnutUndefined, ChestnutNull
+)
+
+def negate(value):
+    return value.__class__(-(value.value))
+
+def logical_not(value):
+    return ChestnutBoolean(not value)
+
+def bitwise_not(value):
+    return ~value
+
+def spread(value):
+    from evaluator import SpreadArgs
+    return SpreadArgs(value)
+
+UNARY_OPERATIONS = {
+    "Subtraction": negate,
+    "Not": logical_not,
+    "BitwiseNot": bitwise_not,
+    "Spread": spread,
+}
+
+class CodeObject:
+    """
+        The compiled instructions for one function body.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.instructions = []
+        # The values LOAD_CONST pushes, by index.
+        self.constants = []
+
+    def emit(self, opcode, arg=None):
+        self.instructions.append((opcode, arg))
+        return len(self.instructions) - 1
+
+    def add_constant(self, value):
+        self.constants.append(value)
+        return len(self.constants) - 1
+
+    def position(self):
+        return len(self.instructions)
+
+    def patch(self, index, arg):
+        self.instructions[index] = (self.instructions[index][0], arg)
+
+    def disassemble(self):
+        lines = []
+        for index, (opcode, arg) in enumerate(self.instructions):
+            if opcode == LOAD_CONST:
+                arg = f"{arg} ({self.constants[arg]!r})"
+            elif isinstance(arg, Token):
+                arg = arg.data
+            elif arg is not None and not isinstance(arg, (int, tuple)):
+                arg = arg.__class__.__name__ if hasattr(arg, "__dict__") else arg
+            lines.append(f"{index:5d} {OPCODE_NAMES[opcode]:20s} {'' if arg is None else arg}")
+        return "\n".join(lines)
+
+    def __repr__(self):
+        return f"CodeObject(<{self.name}>, {len(self.instructions)} instructions)"
+
+class BytecodeCompiler:
+    """
+        Compiles function bodies to CodeObjects for the VirtualMachine. Nodes
+        without a dedicated instruction sequence compile to EVAL or EXEC so
+        they keep the tree-walking semantics.
+    """
+
+    def __init__(self, evaluator):
+        self.evaluator = evaluator
+        self.code = None
+        self.loop_depth = 0
+
+    def compile_function(self, statement):
+        name = statement.name.data if hasattr(statement, "name") else statement.get_name()
+        self.code = CodeObject(name)
+        self.loop_depth = 0
+        for s in statement.statements:
+            self.compile_statement(s)
+        self.code.emit(RETURN_NONE)
+        return self.code
+
+    def emit(self, opcode, arg=None):
+        return self.code.emit(opcode, arg)
+
+    def compile_block(self, statements):
+        self.emit(PUSH_SCOPE)
+        for s in statements:
+            self.compile_statement(s)
+        self.emit(POP_SCOPE)
+
+    def compile_statement(self, node):
+        method = self.dispatch.get(node.__class__)
+        if method is None:
+            self.emit(EXEC, node)
+        else:
+            method(self, node)
+
+    def compile_expression(self, node):
+        if node.__class__ in LITERAL_TYPES:
+            self.load_const(self.evaluator.dispatch[node.__class__](node))
+        elif isinstance(node, Token) and node.label == "Identifier":
+            self.emit(LOAD_NAME, node)
+        else:
+            method = self.dispatch.get(node.__class__)
+            if method is None:
+                self.emit(EVAL, node)
+            else:
+                method(self, node)
+
+    def load_const(self, value):
+        self.emit(LOAD_CONST, self.code.add_constant(value))
+
+    def compile_ExpressionStatementNode(self, node):
+        self.compile_expression(node.expression)
+        self.emit(POP)
+
+    def compile_LetStatementNode(self, node):
+        self.emit(LET_LABELS, node)
+        self.compile_expression(node.expression)
+        self.emit(BIND_LET)
+
+    def compile_ConstantStatementNode(self, node):
+        self.emit(CONSTANT_LABELS, node)
+        self.compile_expression(node.expression)
+        self.emit(BIND_CONSTANT)
+
+    def compile_ShadowStatementNode(self, node):
+        self.emit(SHADOW_LABELS, node)
+        self.compile_expression(node.expression)
+        self.emit(BIND_SHADOW)
+
+    def compile_AssignStatementNode(self, node):
+        self.emit(ASSIGNMENT_SCOPE, node)
+        self.compile_expression(node.expression)
+        self.emit(BIND_ASSIGNMENT, node)
+
+    def compile_ReturnStatementNode(self, node):
+        try:
+            returns_value = self.evaluator.returns_value(node)
+        except Exception:
+            # Let the evaluator raise the same error when the return runs.
+            self.emit(EXEC, node)
+            return
+        if returns_value:
+            if isinstance(node.expression, CallStatementNode) and node.expression.tail:
+                # RETURN_VALUE only runs if the callee couldn't replace this frame.
+                self.compile_call(node.expression, TAIL_CALL)
+            else:
+                self.compile_expression(node.expression)
+            self.emit(RETURN_VALUE)
+        else:
+            self.load_const(None)
+            self.emit(RETURN_VALUE)
+
+    def compile_BreakStatementNode(self, node):
+        if self.loop_depth == 0:
+            # Outside of a loop in this body the signal ends the call, which
+            # reports it as an error.
+            self.emit(EXEC, node)
+        else:
+            self.emit(BREAK)
+
+    def compile_ContinueStatementNode(self, node):
+        if self.loop_depth == 0:
+            self.emit(EXEC, node)
+        else:
+            self.emit(CONTINUE)
+
+    def compile_IfStatementNode(self, node):
+        exits = []
+        branches = [(node.condition_expression, node.block_statements)]
+        for elif_block in node.elif_blocks:
+            branches.append((elif_block.condition_expression, elif_block.block_statements))
+        for condition, statements in branches:
+            self.compile_expression(condition)
+            skip = self.emit(POP_JUMP_IF_FALSE)
+            self.compile_block(statements)
+            exits.append(self.emit(JUMP))
+            self.code.patch(skip, self.code.position())
+        if node.else_block:
+            self.compile_block(node.else_block.block_statements)
+        for exit in exits:
+            self.code.patch(exit, self.code.position())
+
+    def compile_CaseStatementNode(self, node):
+        self.compile_expression(node.subject)
+        exits = []
+        for when_block in node.when_blocks:
+            matches = []
+            for condition in when_block.conditions:
+                self.compile_expression(condition)
+                matches.append(self.emit(CASE_MATCH))
+            no_match = self.emit(JUMP)
+            for match in matches:
+                self.code.patch(match, self.code.position())
+            self.emit(POP)
+            self.compile_block(when_block.statements)
+            exits.append(self.emit(JUMP))
+            self.code.patch(no_match, self.code.position())
+        self.emit(POP)
+        if node.otherwise:
+            self.compile_block(node.otherwise.statements)
+        for exit in exits:
+            self.code.patch(exit, self.code.position())
+
+    def compile_loop_body(self, statements):
+        body = self.code.position()
+        self.loop_depth += 1
+        for s in statements:
+            self.compile_statement(s)
+        self.loop_depth -= 1
+        self.emit(NEXT_ITERATION)
+        return body
+
+    def finish_loop(self, node, setup, top, body):
+        self.emit(JUMP, top)
+        exit = self.emit(END_LOOP)
+        self.code.patch(setup, (top, body, exit, node.reuse_scope))
+        return exit
+
+    def compile_WhileStatementNode(self, node):
+        setup = self.emit(SETUP_LOOP)
+        top = self.code.position()
+        self.compile_expression(node.condition)
+        test = self.emit(POP_JUMP_IF_FALSE)
+        self.emit(PUSH_PASS_SCOPE)
+        body = self.compile_loop_body(node.statements)
+        self.code.patch(test, self.finish_loop(node, setup, top, body))
+
+    def compile_UntilStatementNode(self, node):
+        setup = self.emit(SETUP_LOOP)
+        top = self.code.position()
+        first_pass = self.emit(JUMP_IF_FIRST_PASS)
+        self.compile_expression(node.condition)
+        test = self.emit(POP_JUMP_IF_TRUE)
+        self.code.patch(first_pass, self.code.position())
+        self.emit(PUSH_PASS_SCOPE)
+        body = self.compile_loop_body(node.statements)
+        self.code.patch(test, self.finish_loop(node, setup, top, body))
+
+    def compile_LoopStatementNode(self, node):
+        setup = self.emit(SETUP_LOOP)
+        top = self.code.position()
+        self.emit(PUSH_PASS_SCOPE)
+        body = self.compile_loop_body(node.statements)
+        self.finish_loop(node, setup, top, body)
+
+    def compile_ForStatementNode(self, node):
+        self.emit(PUSH_SCOPE)
+        self.compile_expression(node.subject)
+        setup = self.emit(SETUP_FOR)
+        top = self.code.position()
+        next_element = self.emit(FOR_ITER)
+        body = self.compile_loop_body(node.statements)
+        exit = self.finish_loop(node, setup, top, body)
+        self.code.patch(next_element, (node.identifier, exit))
+
+    def compile_LoopindexExpressionNode(self, node):
+        if node.address is None:
+            self.emit(EVAL, node)
+        else:
+            # The Analyzer resolved it to the innermost loop in this body,
+            # which is the innermost block the VM is running.
+            self.emit(LOAD_LOOP_INDEX)
+
+    def compile_BinaryOperationNode(self, node):
+        handler = self.evaluator.binary_handlers.get(node.op.label)
+        if handler is None:
+            self.emit(EVAL, node)
+            return
+        self.compile_expression(node.left)
+        jump = SHORT_CIRCUIT_JUMPS.get(node.op.label)
+        if jump is not None:
+            exit = self.emit(jump)
+            self.compile_expression(node.right)
+            self.code.patch(exit, self.code.position())
+            return
+        self.compile_expression(node.right)
+        self.emit(BINARY_OP, handler)
+
+    def compile_UnaryOperationNode(self, node):
+        operation = UNARY_OPERATIONS.get(node.op.label)
+        if operation is None:
+            # outer and unshadow inspect the scopes rather than a value.
+            self.emit(EVAL, node)
+            return
+        self.compile_expression(node.right)
+        self.emit(UNARY_OP, operation)
+
+    def compile_TernaryExpressionNode(self, node):
+        self.compile_expression(node.condition)
+        otherwise = self.emit(POP_JUMP_IF_FALSE)
+        self.compile_expression(node.left)
+        exit = self.emit(JUMP)
+        self.code.patch(otherwise, self.code.position())
+        self.compile_expression(node.right)
+        self.code.patch(exit, self.code.position())
+
+    def compile_UseExpressionNode(self, node):
+        if node.condition is not None:
+            self.compile_expression(node.condition)
+            otherwise = self.emit(POP_JUMP_IF_FALSE)
+            self.compile_expression(node.right)
+            exit = self.emit(JUMP)
+            self.code.patch(otherwise, self.code.position())
+            self.compile_expression(node.left)
+            self.code.patch(exit, self.code.position())
+        else:
+            self.compile_expression(node.left)
+            exit = self.emit(JUMP_IF_NOT_NULL)
+            self.compile_expression(node.right)
+            self.code.patch(exit, self.code.position())
+
+    def compile_ListLiteralNode(self, node):
+        for element in node.elements:
+            self.compile_expression(element)
+        self.emit(BUILD_LIST, len(node.elements))
+
+    def compile_TupleLiteralNode(self, node):
+        for element in node.elements:
+            self.compile_expression(element)
+        self.emit(BUILD_TUPLE, len(node.elements))
+
+    def compile_MapLiteralNode(self, node):
+        for key, value in zip(node.keys, node.values):
+            self.compile_expression(key)
+            self.compile_expression(value)
+        self.emit(BUILD_MAP, len(node.keys))
+
+    def compile_IndexAccessNode(self, node):
+        self.compile_expression(node.target)
+        self.compile_expression(node.index)
+        self.emit(INDEX)
+
+    def compile_IndexAssignNode(self, node):
+        self.compile_expression(node.identifier)
+        self.compile_expression(node.index)
+        self.emit(INDEX_TARGET, node)
+        self.compile_expression(node.value)
+        self.emit(STORE_INDEX, node)
+
+    def compile_PropertyAccessNode(self, node):
+        self.compile_expression(node.identifier)
+        self.emit(LOAD_PROPERTY, node)
+
+    def compile_PropertyAssignmentNode(self, node):
+        self.compile_expression(node.identifier)
+        self.emit(PROPERTY_SLOT, node)
+        self.compile_expression(node.value_expression)
+        self.emit(STORE_PROPERTY, node)
+
+    def compile_CallStatementNode(self, node):
+        self.compile_call(node, CALL)
+
+    def compile_call(self, node, opcode):
+        self.emit(ENTER_CALL)
+        self.compile_expression(node.identifier)
+        for param in node.params:
+            self.compile_expression(param)
+        self.emit(opcode, (node, len(node.params)))
+
+def build_dispatch_table(compiler_class):
+    # Bind every compile_<ClassName> method to its node class once, as the
+    # Evaluator does its visitors, so compiling a node is one dict lookup.
+    dispatch = {}
+    for attr in dir(compiler_class):
+        if not attr.startswith("compile_"):
+            continue
+        node_class = globals().get(attr[len("compile_"):])
+        if isinstance(node_class, type):
+            dispatch[node_class] = getattr(compiler_class, attr)
+    return dispatch
+
+BytecodeCompiler.dispatch = build_dispatch_table(BytecodeCompiler)
@@ -0,0 +1,131 @@
+// The chestnut_native extension module. Exposes the fixed width arithmetic of
+// lib/int.c to chestnut_types.py, which falls back to Python ints without it.
+// Build it with `python3 generate_bindings.py`.
+//
+// Numbers are passed as the little endian bytes of their limbs, so they can
+// stay in that form between operations. Every function takes two of them and
+// returns the wrapped result, like uint1024_add(a, b) or int128_mul(a, b).
+
+#define PY_SSIZE_T_CLEAN
+#include <Python.h>
+#include <string.h>
+
+#include "lib/int.c"
+
+// Copies the little endian bytes of v into limbs, least significant limb
+// first. On a little endian host those are the bytes of the limbs already.
+static int chestnut_native_load(
+    chestnut_uint64_t *limbs,
+    PyObject *v,
+    const size_t limb_count
+) {
+    if (!PyBytes_Check(v) || (size_t)PyBytes_GET_SIZE(v) != limb_count * 8) {
+        PyErr_Format(PyExc_TypeError, "Expected %zu bytes", limb_count * 8);
+        return -1;
+    }
+
+    const unsigned char *bytes = (const unsigned char *)PyBytes_AS_STRING(v);
+    #if defined(__BYTE_ORDER__) && __BYTE_ORDER__ == __ORDER_LITTLE_ENDIAN__
+        memcpy(limbs, bytes, limb_count * 8);
+    #else
+        for (size_t i = 0; i < limb_count; i++) {
+            chestnut_uint64_t limb = 0;
+            for (size_t k = 0; k < 8; k++) {
+                limb |= (chestnut_uint64_t)bytes[i * 8 + k] << (k * 8);
+            }
+            limbs[i] = limb;
+        }
+    #endif
+
+    return 0;
+}
+
+// Makes the little endian bytes of limbs.
+static PyObject *chestnut_native_store(
+    const chestnut_uint64_t *limbs,
+    const size_t limb_count
+) {
+    PyObject *v = PyBytes_FromStringAndSize(NULL, limb_count * 8);
+    if (v == NULL) {
+        return NULL;
+    }
+
+    unsigned char *bytes = (unsigned char *)PyBytes_AS_STRING(v);
+    #if defined(__BYTE_ORDER__) && __BYTE_ORDER__ == __ORDER_LITTLE_ENDIAN__
+        memcpy(bytes, limbs, limb_count * 8);
+    #else
+        for (size_t i = 0; i < limb_count; i++) {
+            for (size_t k = 0; k < 8; k++) {
+                bytes[i * 8 + k] = (unsigned char)(limbs[i] >> (k * 8));
+            }
+        }
+    #endif
+
+    return v;
+}
+
+// Defines name(a, b) calling operation on the limbs of a and b.
+#define CHESTNUT_NATIVE_OPERATION(name, type, operation, limb_count)        \
+    static PyObject *chestnut_native_##name(                                \
+        PyObject *module,                                                   \
+        PyObject *const *args,                                              \
+        Py_ssize_t nargs                                                    \
+    ) {                                                                     \
+        type a, b, out;                                                     \
+        if (nargs != 2) {                                                   \
+            PyErr_SetString(PyExc_TypeError, #name "() takes 2 arguments"); \
+            return NULL;                                                    \
+        }                                                                   \
+        if (chestnut_native_load(a.limbs, args[0], limb_count) < 0 ||       \
+            chestnut_native_load(b.limbs, args[1], limb_count) < 0) {       \
+            return NULL;                                                    \
+        }                                                                   \
+        operation(&out, &a, &b);                                            \
+        return chestnut_native_store(out.limbs, limb_count);                \
+    }
+
+// Addition and subtraction wrap the same for signed and unsigned limbs, so
+// only multiplication has a signed version in lib/int.c.
+#define CHESTNUT_NATIVE_WIDTH(bits, limb_count)                                                                   \
+    CHESTNUT_NATIVE_OPERATION(uint##bits##_add, chestnut_uint##bits##_t, chestnut_uint##bits##_t_add, limb_count) \
+    CHESTNUT_NATIVE_OPERATION(uint##bits##_sub, chestnut_uint##bits##_t, chestnut_uint##bits##_t_sub, limb_count) \
+    CHESTNUT_NATIVE_OPERATION(uint##bits##_mul, chestnut_uint##bits##_t, chestnut_uint##bits##_t_mul, limb_count) \
+    CHESTNUT_NATIVE_OPERATION(int##bits##_add, chestnut_uint##bits##_t, chestnut_uint##bits##_t_add, limb_count)  \
+    CHESTNUT_NATIVE_OPERATION(int##bits##_sub, chestnut_uint##bits##_t, chestnut_uint##bits##_t_sub, limb_count)  \
+    CHESTNUT_NATIVE_OPERATION(int##bits##_mul, chestnut_int##bits##_t, chestnut_int##bits##_t_mul, limb_count)
+
+CHESTNUT_NATIVE_WIDTH(128, 2)
+CHESTNUT_NATIVE_WIDTH(256, 4)
+CHESTNUT_NATIVE_WIDTH(512, 8)
+CHESTNUT_NATIVE_WIDTH(1024, 16)
+
+#define CHESTNUT_NATIVE_METHOD(name)                                                    \
+    { #name, (PyCFunction)(void (*)(void))chestnut_native_##name, METH_FASTCALL, NULL }
+
+#define CHESTNUT_NATIVE_METHODS(bits)         \
+    CHESTNUT_NATIVE_METHOD(uint##bits##_add), \
+    CHESTNUT_NATIVE_METHOD(uint##bits##_sub), \
+    CHESTNUT_NATIVE_METHOD(uint##bits##_mul), \
+    CHESTNUT_NATIVE_METHOD(int##bits##_add),  \
+    CHESTNUT_NATIVE_METHOD(int##bits##_sub),  \
+    CHESTNUT_NATIVE_METHOD(int##bits##_mul)
+
+static PyMethodDef chestnut_native_methods[] = {
+    CHESTNUT_NATIVE_METHODS(128),
+    CHESTNUT_NATIVE_METHODS(256),
+    CHESTNUT_NATIVE_METHODS(512),
+    CHESTNUT_NATIVE_METHODS(1024),
+    { NULL, NULL, 0, NULL }
+};
+
+static struct PyModuleDef chestnut_native_module = {
+    PyModuleDef_HEAD_INIT,
+    "chestnut_native",
+    "Fixed width integer arithmetic for Chestnut from lib/int.c.",
+    -1,
+    chestnut_native_methods
+};
+
+PyMODINIT_FUNC PyInit_chestnut_native(void) {
+    return PyModule_Create(&chestnut_native_module);
+}
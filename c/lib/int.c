@@ -815,6 +815,41 @@ static inline __attribute__((always_inline)) chestnut_uint64_t __chestnut_mul_ac
     return acc_low;
 }
 
+// Multiplies the first `limbs` limbs of a and b, keeping the low `limbs` limbs
+// of the product. Each row adds a[i] * b into the product with a one limb
+// carry, which can't overflow since a[i] * b[j] + two limbs fits in two limbs.
+// Returns 1 if any of the product was cut off.
+static inline __attribute__((always_inline)) chestnut_uint8_t __chestnut_mul_truncated(
+    chestnut_uint64_t *out,
+    const chestnut_uint64_t *a,
+    const chestnut_uint64_t *b,
+    const size_t limbs
+) {
+    chestnut_uint64_t product[16] = { 0 };
+    chestnut_uint8_t overflow = 0;
+
+    for (size_t i = 0; i < limbs; i++) {
+        chestnut_uint64_t carry = 0;
+        for (size_t j = 0; i + j < limbs; j++) {
+            chestnut_uint64_t high;
+            chestnut_uint64_t low = __chestnut_mul(&high, a[i], b[j]);
+            high += __chestnut_add_overflow(0, low, product[i + j], &low);
+            high += __chestnut_add_overflow(0, low, carry, &product[i + j]);
+            carry = high;
+        }
+        overflow |= carry != 0;
+        for (size_t j = limbs - i; j < limbs; j++) {
+            overflow |= a[i] != 0 && b[j] != 0;
+        }
+    }
+
+    for (size_t i = 0; i < limbs; i++) {
+        out[i] = product[i];
+    }
+
+    return overflow;
+}
+
 // Will be used in multiplications with *
 chestnut_uint64_t chestnut_uint128_t_mul(
     chestnut_uint128_t *out,
@@ -863,36 +898,7 @@ chestnut_uint64_t chestnut_uint256_t_mul(
     chestnut_uint256_t *a,
     chestnut_uint256_t *b
 ) {
-    chestnut_uint64_t carry_out = 0, overflow = 0;
-
-    // Limb 0
-    out->limbs[0] = __chestnut_mul(&carry_out, a->limbs[0], b->limbs[0]);
-
-    // Limb 1
-    out->limbs[1] = __chestnut_mul_acc(&overflow, carry_out, a->limbs[0], b->limbs[1]);
-    carry_out = overflow;
-    out->limbs[1] = __chestnut_mul_acc(&overflow, out->limbs[1], a->limbs[1], b->limbs[0]);
-    carry_out += overflow;
-
-    // Limb 2
-    out->limbs[2] = __chestnut_mul_acc(&overflow, carry_out, a->limbs[0], b->limbs[2]);
-    carry_out = overflow;
-    out->limbs[2] = __chestnut_mul_acc(&overflow, out->limbs[2], a->limbs[1], b->limbs[1]);
-    carry_out += overflow;
-    out->limbs[2] = __chestnut_mul_acc(&overflow, out->limbs[2], a->limbs[2], b->limbs[0]);
-    carry_out += overflow;
-
-    // Limb 3
-    out->limbs[3] = __chestnut_mul_acc(&overflow, carry_out, a->limbs[0], b->limbs[3]);
-    carry_out = overflow;
-    out->limbs[3] = __chestnut_mul_acc(&overflow, out->limbs[3], a->limbs[1], b->limbs[2]);
-    carry_out += overflow;
-    out->limbs[3] = __chestnut_mul_acc(&overflow, out->limbs[3], a->limbs[2], b->limbs[1]);
-    carry_out += overflow;
-    out->limbs[3] = __chestnut_mul_acc(&overflow, out->limbs[3], a->limbs[3], b->limbs[0]);
-    carry_out += overflow;
-
-    return carry_out;
+    return __chestnut_mul_truncated(out->limbs, a->limbs, b->limbs, 4);
 }
 
 chestnut_uint256_t chestnut_uint256_t_mul_full(
@@ -966,96 +972,7 @@ chestnut_uint64_t chestnut_uint512_t_mul(
     chestnut_uint512_t *a,
     chestnut_uint512_t *b
 ) {
-    chestnut_uint64_t carry_out = 0, overflow = 0;
-
-    // Limb 0
-    out->limbs[0] = __chestnut_mul(&carry_out, a->limbs[0], b->limbs[0]);
-
-    // Limb 1
-    out->limbs[1] = __chestnut_mul_acc(&overflow, carry_out, a->limbs[0], b->limbs[1]);
-    carry_out = overflow;
-    out->limbs[1] = __chestnut_mul_acc(&overflow, out->limbs[1], a->limbs[1], b->limbs[0]);
-    carry_out += overflow;
-
-    // Limb 2
-    out->limbs[2] = __chestnut_mul_acc(&overflow, carry_out, a->limbs[0], b->limbs[2]);
-    carry_out = overflow;
-    out->limbs[2] = __chestnut_mul_acc(&overflow, out->limbs[2], a->limbs[1], b->limbs[1]);
-    carry_out += overflow;
-    out->limbs[2] = __chestnut_mul_acc(&overflow, out->limbs[2], a->limbs[2], b->limbs[0]);
-    carry_out += overflow;
-
-    // Limb 3
-    out->limbs[3] = __chestnut_mul_acc(&overflow, carry_out, a->limbs[0], b->limbs[3]);
-    carry_out = overflow;
-    out->limbs[3] = __chestnut_mul_acc(&overflow, out->limbs[3], a->limbs[1], b->limbs[2]);
-    carry_out += overflow;
-    out->limbs[3] = __chestnut_mul_acc(&overflow, out->limbs[3], a->limbs[2], b->limbs[1]);
-    carry_out += overflow;
-    out->limbs[3] = __chestnut_mul_acc(&overflow, out->limbs[3], a->limbs[3], b->limbs[0]);
-    carry_out += overflow;
-
-    // Limb 4
-    out->limbs[4] = __chestnut_mul_acc(&overflow, carry_out, a->limbs[0], b->limbs[4]);
-    carry_out = overflow;
-    out->limbs[4] = __chestnut_mul_acc(&overflow, out->limbs[4], a->limbs[1], b->limbs[3]);
-    carry_out += overflow;
-    out->limbs[4] = __chestnut_mul_acc(&overflow, out->limbs[4], a->limbs[2], b->limbs[2]);
-    carry_out += overflow;
-    out->limbs[4] = __chestnut_mul_acc(&overflow, out->limbs[4], a->limbs[3], b->limbs[1]);
-    carry_out += overflow;
-    out->limbs[4] = __chestnut_mul_acc(&overflow, out->limbs[4], a->limbs[4], b->limbs[0]);
-    carry_out += overflow;
-
-    // Limb 5
-    out->limbs[5] = __chestnut_mul_acc(&overflow, carry_out, a->limbs[0], b->limbs[5]);
-    carry_out = overflow;
-    out->limbs[5] = __chestnut_mul_acc(&overflow, out->limbs[5], a->limbs[1], b->limbs[4]);
-    carry_out += overflow;
-    out->limbs[5] = __chestnut_mul_acc(&overflow, out->limbs[5], a->limbs[2], b->limbs[3]);
-    carry_out += overflow;
-    out->limbs[5] = __chestnut_mul_acc(&overflow, out->limbs[5], a->limbs[3], b->limbs[2]);
-    carry_out += overflow;
-    out->limbs[5] = __chestnut_mul_acc(&overflow, out->limbs[5], a->limbs[4], b->limbs[1]);
-    carry_out += overflow;
-    out->limbs[5] = __chestnut_mul_acc(&overflow, out->limbs[5], a->limbs[5], b->limbs[0]);
-    carry_out += overflow;
-
-    // Limb 6
-    out->limbs[6] = __chestnut_mul_acc(&overflow, carry_out, a->limbs[0], b->limbs[6]);
-    carry_out = overflow;
-    out->limbs[6] = __chestnut_mul_acc(&overflow, out->limbs[6], a->limbs[1], b->limbs[5]);
-    carry_out += overflow;
-    out->limbs[6] = __chestnut_mul_acc(&overflow, out->limbs[6], a->limbs[2], b->limbs[4]);
-    carry_out += overflow;
-    out->limbs[6] = __chestnut_mul_acc(&overflow, out->limbs[6], a->limbs[3], b->limbs[3]);
-    carry_out += overflow;
-    out->limbs[6] = __chestnut_mul_acc(&overflow, out->limbs[6], a->limbs[4], b->limbs[2]);
-    carry_out += overflow;
-    out->limbs[6] = __chestnut_mul_acc(&overflow, out->limbs[6], a->limbs[5], b->limbs[1]);
-    carry_out += overflow;
-    out->limbs[6] = __chestnut_mul_acc(&overflow, out->limbs[6], a->limbs[6], b->limbs[0]);
-    carry_out += overflow;
-
-    // Limb 7
-    out->limbs[7] = __chestnut_mul_acc(&overflow, carry_out, a->limbs[0], b->limbs[7]);
-    carry_out = overflow;
-    out->limbs[7] = __chestnut_mul_acc(&overflow, out->limbs[7], a->limbs[1], b->limbs[6]);
-    carry_out += overflow;
-    out->limbs[7] = __chestnut_mul_acc(&overflow, out->limbs[7], a->limbs[2], b->limbs[5]);
-    carry_out += overflow;
-    out->limbs[7] = __chestnut_mul_acc(&overflow, out->limbs[7], a->limbs[3], b->limbs[4]);
-    carry_out += overflow;
-    out->limbs[7] = __chestnut_mul_acc(&overflow, out->limbs[7], a->limbs[4], b->limbs[3]);
-    carry_out += overflow;
-    out->limbs[7] = __chestnut_mul_acc(&overflow, out->limbs[7], a->limbs[5], b->limbs[2]);
-    carry_out += overflow;
-    out->limbs[7] = __chestnut_mul_acc(&overflow, out->limbs[7], a->limbs[6], b->limbs[1]);
-    carry_out += overflow;
-    out->limbs[7] = __chestnut_mul_acc(&overflow, out->limbs[7], a->limbs[7], b->limbs[0]);
-    carry_out += overflow;
-
-    return carry_out;
+    return __chestnut_mul_truncated(out->limbs, a->limbs, b->limbs, 8);
 }
 
 chestnut_uint512_t chestnut_uint512_t_mul_full(
@@ -1230,313 +1147,7 @@ chestnut_uint8_t chestnut_uint1024_t_mul(
     chestnut_uint1024_t *a,
     chestnut_uint1024_t *b
 ) {
-    chestnut_uint64_t carry_out = 0, overflow = 0;
-
-    // Limb 0
-    out->limbs[0] = __chestnut_mul(&overflow, a->limbs[0], b->limbs[0]);
-
-    // Limb 1
-    carry_out = overflow;
-    out->limbs[1] = __chestnut_mul_acc(&overflow, carry_out, a->limbs[0], b->limbs[1]);
-    carry_out += overflow;
-    out->limbs[1] = __chestnut_mul_acc(&overflow, out->limbs[1], a->limbs[1], b->limbs[0]);
-    carry_out += overflow;
-
-    // Limb 2
-    out->limbs[2] = __chestnut_mul_acc(&overflow, carry_out, a->limbs[0], b->limbs[2]);
-    carry_out = overflow;
-    out->limbs[2] = __chestnut_mul_acc(&overflow, out->limbs[2], a->limbs[1], b->limbs[1]);
-    carry_out += overflow;
-    out->limbs[2] = __chestnut_mul_acc(&overflow, out->limbs[2], a->limbs[2], b->limbs[0]);
-    carry_out += overflow;
-
-    // Limb 3
-    out->limbs[3] = __chestnut_mul_acc(&overflow, carry_out, a->limbs[0], b->limbs[3]);
-    carry_out = overflow;
-    out->limbs[3] = __chestnut_mul_acc(&overflow, out->limbs[3], a->limbs[1], b->limbs[2]);
-    carry_out += overflow;
-    out->limbs[3] = __chestnut_mul_acc(&overflow, out->limbs[3], a->limbs[2], b->limbs[1]);
-    carry_out += overflow;
-    out->limbs[3] = __chestnut_mul_acc(&overflow, out->limbs[3], a->limbs[3], b->limbs[0]);
-    carry_out += overflow;
-
-    // Limb 4
-    out->limbs[4] = __chestnut_mul_acc(&overflow, carry_out, a->limbs[0], b->limbs[4]);
-    carry_out = overflow;
-    out->limbs[4] = __chestnut_mul_acc(&overflow, out->limbs[4], a->limbs[1], b->limbs[3]);
-    carry_out += overflow;
-    out->limbs[4] = __chestnut_mul_acc(&overflow, out->limbs[4], a->limbs[2], b->limbs[2]);
-    carry_out += overflow;
-    out->limbs[4] = __chestnut_mul_acc(&overflow, out->limbs[4], a->limbs[3], b->limbs[1]);
-    carry_out += overflow;
-    out->limbs[4] = __chestnut_mul_acc(&overflow, out->limbs[4], a->limbs[4], b->limbs[0]);
-    carry_out += overflow;
-
-    // Limb 5
-    out->limbs[5] = __chestnut_mul_acc(&overflow, carry_out, a->limbs[0], b->limbs[5]);
-    carry_out = overflow;
-    out->limbs[5] = __chestnut_mul_acc(&overflow, out->limbs[5], a->limbs[1], b->limbs[4]);
-    carry_out += overflow;
-    out->limbs[5] = __chestnut_mul_acc(&overflow, out->limbs[5], a->limbs[2], b->limbs[3]);
-    carry_out += overflow;
-    out->limbs[5] = __chestnut_mul_acc(&overflow, out->limbs[5], a->limbs[3], b->limbs[2]);
-    carry_out += overflow;
-    out->limbs[5] = __chestnut_mul_acc(&overflow, out->limbs[5], a->limbs[4], b->limbs[1]);
-    carry_out += overflow;
-    out->limbs[5] = __chestnut_mul_acc(&overflow, out->limbs[5], a->limbs[5], b->limbs[0]);
-    carry_out += overflow;
-
-    // Limb 6
-    out->limbs[6] = __chestnut_mul_acc(&overflow, carry_out, a->limbs[0], b->limbs[6]);
-    carry_out = overflow;
-    out->limbs[6] = __chestnut_mul_acc(&overflow, out->limbs[6], a->limbs[1], b->limbs[5]);
-    carry_out += overflow;
-    out->limbs[6] = __chestnut_mul_acc(&overflow, out->limbs[6], a->limbs[2], b->limbs[4]);
-    carry_out += overflow;
-    out->limbs[6] = __chestnut_mul_acc(&overflow, out->limbs[6], a->limbs[3], b->limbs[3]);
-    carry_out += overflow;
-    out->limbs[6] = __chestnut_mul_acc(&overflow, out->limbs[6], a->limbs[4], b->limbs[2]);
-    carry_out += overflow;
-    out->limbs[6] = __chestnut_mul_acc(&overflow, out->limbs[6], a->limbs[5], b->limbs[1]);
-    carry_out += overflow;
-    out->limbs[6] = __chestnut_mul_acc(&overflow, out->limbs[6], a->limbs[6], b->limbs[0]);
-    carry_out += overflow;
-
-    // Limb 7
-    out->limbs[7] = __chestnut_mul_acc(&overflow, carry_out, a->limbs[0], b->limbs[7]);
-    carry_out = overflow;
-    out->limbs[7] = __chestnut_mul_acc(&overflow, out->limbs[7], a->limbs[1], b->limbs[6]);
-    carry_out += overflow;
-    out->limbs[7] = __chestnut_mul_acc(&overflow, out->limbs[7], a->limbs[2], b->limbs[5]);
-    carry_out += overflow;
-    out->limbs[7] = __chestnut_mul_acc(&overflow, out->limbs[7], a->limbs[3], b->limbs[4]);
-    carry_out += overflow;
-    out->limbs[7] = __chestnut_mul_acc(&overflow, out->limbs[7], a->limbs[4], b->limbs[3]);
-    carry_out += overflow;
-    out->limbs[7] = __chestnut_mul_acc(&overflow, out->limbs[7], a->limbs[5], b->limbs[2]);
-    carry_out += overflow;
-    out->limbs[7] = __chestnut_mul_acc(&overflow, out->limbs[7], a->limbs[6], b->limbs[1]);
-    carry_out += overflow;
-    out->limbs[7] = __chestnut_mul_acc(&overflow, out->limbs[7], a->limbs[7], b->limbs[0]);
-    carry_out += overflow;
-
-    // Limb 8
-    out->limbs[8] = __chestnut_mul_acc(&overflow, carry_out, a->limbs[0], b->limbs[8]);
-    carry_out = overflow;
-    out->limbs[8] = __chestnut_mul_acc(&overflow, out->limbs[8], a->limbs[1], b->limbs[7]);
-    carry_out += overflow;
-    out->limbs[8] = __chestnut_mul_acc(&overflow, out->limbs[8], a->limbs[2], b->limbs[6]);
-    carry_out += overflow;
-    out->limbs[8] = __chestnut_mul_acc(&overflow, out->limbs[8], a->limbs[3], b->limbs[5]);
-    carry_out += overflow;
-    out->limbs[8] = __chestnut_mul_acc(&overflow, out->limbs[8], a->limbs[4], b->limbs[4]);
-    carry_out += overflow;
-    out->limbs[8] = __chestnut_mul_acc(&overflow, out->limbs[8], a->limbs[5], b->limbs[3]);
-    carry_out += overflow;
-    out->limbs[8] = __chestnut_mul_acc(&overflow, out->limbs[8], a->limbs[6], b->limbs[2]);
-    carry_out += overflow;
-    out->limbs[8] = __chestnut_mul_acc(&overflow, out->limbs[8], a->limbs[7], b->limbs[1]);
-    carry_out += overflow;
-    out->limbs[8] = __chestnut_mul_acc(&overflow, out->limbs[8], a->limbs[8], b->limbs[0]);
-    carry_out += overflow;
-
-    // Limb 9
-    out->limbs[9] = __chestnut_mul_acc(&overflow, carry_out, a->limbs[0], b->limbs[9]);
-    carry_out = overflow;
-    out->limbs[9] = __chestnut_mul_acc(&overflow, out->limbs[9], a->limbs[1], b->limbs[8]);
-    carry_out += overflow;
-    out->limbs[9] = __chestnut_mul_acc(&overflow, out->limbs[9], a->limbs[2], b->limbs[7]);
-    carry_out += overflow;
-    out->limbs[9] = __chestnut_mul_acc(&overflow, out->limbs[9], a->limbs[3], b->limbs[6]);
-    carry_out += overflow;
-    out->limbs[9] = __chestnut_mul_acc(&overflow, out->limbs[9], a->limbs[4], b->limbs[5]);
-    carry_out += overflow;
-    out->limbs[9] = __chestnut_mul_acc(&overflow, out->limbs[9], a->limbs[5], b->limbs[4]);
-    carry_out += overflow;
-    out->limbs[9] = __chestnut_mul_acc(&overflow, out->limbs[9], a->limbs[6], b->limbs[3]);
-    carry_out += overflow;
-    out->limbs[9] = __chestnut_mul_acc(&overflow, out->limbs[9], a->limbs[7], b->limbs[2]);
-    carry_out += overflow;
-    out->limbs[9] = __chestnut_mul_acc(&overflow, out->limbs[9], a->limbs[8], b->limbs[1]);
-    carry_out += overflow;
-    out->limbs[9] = __chestnut_mul_acc(&overflow, out->limbs[9], a->limbs[9], b->limbs[0]);
-    carry_out += overflow;
-
-    // Limb 10
-    out->limbs[10] = __chestnut_mul_acc(&overflow, carry_out, a->limbs[0], b->limbs[10]);
-    carry_out = overflow;
-    out->limbs[10] = __chestnut_mul_acc(&overflow, out->limbs[10], a->limbs[1], b->limbs[9]);
-    carry_out += overflow;
-    out->limbs[10] = __chestnut_mul_acc(&overflow, out->limbs[10], a->limbs[2], b->limbs[8]);
-    carry_out += overflow;
-    out->limbs[10] = __chestnut_mul_acc(&overflow, out->limbs[10], a->limbs[3], b->limbs[7]);
-    carry_out += overflow;
-    out->limbs[10] = __chestnut_mul_acc(&overflow, out->limbs[10], a->limbs[4], b->limbs[6]);
-    carry_out += overflow;
-    out->limbs[10] = __chestnut_mul_acc(&overflow, out->limbs[10], a->limbs[5], b->limbs[5]);
-    carry_out += overflow;
-    out->limbs[10] = __chestnut_mul_acc(&overflow, out->limbs[10], a->limbs[6], b->limbs[4]);
-    carry_out += overflow;
-    out->limbs[10] = __chestnut_mul_acc(&overflow, out->limbs[10], a->limbs[7], b->limbs[3]);
-    carry_out += overflow;
-    out->limbs[10] = __chestnut_mul_acc(&overflow, out->limbs[10], a->limbs[8], b->limbs[2]);
-    carry_out += overflow;
-    out->limbs[10] = __chestnut_mul_acc(&overflow, out->limbs[10], a->limbs[9], b->limbs[1]);
-    carry_out += overflow;
-    out->limbs[10] = __chestnut_mul_acc(&overflow, out->limbs[10], a->limbs[10], b->limbs[0]);
-    carry_out += overflow;
-
-    // Limb 11
-    out->limbs[11] = __chestnut_mul_acc(&overflow, carry_out, a->limbs[0], b->limbs[11]);
-    carry_out = overflow;
-    out->limbs[11] = __chestnut_mul_acc(&overflow, out->limbs[11], a->limbs[1], b->limbs[10]);
-    carry_out += overflow;
-    out->limbs[11] = __chestnut_mul_acc(&overflow, out->limbs[11], a->limbs[2], b->limbs[9]);
-    carry_out += overflow;
-    out->limbs[11] = __chestnut_mul_acc(&overflow, out->limbs[11], a->limbs[3], b->limbs[8]);
-    carry_out += overflow;
-    out->limbs[11] = __chestnut_mul_acc(&overflow, out->limbs[11], a->limbs[4], b->limbs[7]);
-    carry_out += overflow;
-    out->limbs[11] = __chestnut_mul_acc(&overflow, out->limbs[11], a->limbs[5], b->limbs[6]);
-    carry_out += overflow;
-    out->limbs[11] = __chestnut_mul_acc(&overflow, out->limbs[11], a->limbs[6], b->limbs[5]);
-    carry_out += overflow;
-    out->limbs[11] = __chestnut_mul_acc(&overflow, out->limbs[11], a->limbs[7], b->limbs[4]);
-    carry_out += overflow;
-    out->limbs[11] = __chestnut_mul_acc(&overflow, out->limbs[11], a->limbs[8], b->limbs[3]);
-    carry_out += overflow;
-    out->limbs[11] = __chestnut_mul_acc(&overflow, out->limbs[11], a->limbs[9], b->limbs[2]);
-    carry_out += overflow;
-    out->limbs[11] = __chestnut_mul_acc(&overflow, out->limbs[11], a->limbs[10], b->limbs[1]);
-    carry_out += overflow;
-    out->limbs[11] = __chestnut_mul_acc(&overflow, out->limbs[11], a->limbs[11], b->limbs[0]);
-    carry_out += overflow;
-
-    // Limb 12
-    out->limbs[12] = __chestnut_mul_acc(&overflow, carry_out, a->limbs[0], b->limbs[12]);
-    carry_out = overflow;
-    out->limbs[12] = __chestnut_mul_acc(&overflow, out->limbs[12], a->limbs[1], b->limbs[11]);
-    carry_out += overflow;
-    out->limbs[12] = __chestnut_mul_acc(&overflow, out->limbs[12], a->limbs[2], b->limbs[10]);
-    carry_out += overflow;
-    out->limbs[12] = __chestnut_mul_acc(&overflow, out->limbs[12], a->limbs[3], b->limbs[9]);
-    carry_out += overflow;
-    out->limbs[12] = __chestnut_mul_acc(&overflow, out->limbs[12], a->limbs[4], b->limbs[8]);
-    carry_out += overflow;
-    out->limbs[12] = __chestnut_mul_acc(&overflow, out->limbs[12], a->limbs[5], b->limbs[7]);
-    carry_out += overflow;
-    out->limbs[12] = __chestnut_mul_acc(&overflow, out->limbs[12], a->limbs[6], b->limbs[6]);
-    carry_out += overflow;
-    out->limbs[12] = __chestnut_mul_acc(&overflow, out->limbs[12], a->limbs[7], b->limbs[5]);
-    carry_out += overflow;
-    out->limbs[12] = __chestnut_mul_acc(&overflow, out->limbs[12], a->limbs[8], b->limbs[4]);
-    carry_out += overflow;
-    out->limbs[12] = __chestnut_mul_acc(&overflow, out->limbs[12], a->limbs[9], b->limbs[3]);
-    carry_out += overflow;
-    out->limbs[12] = __chestnut_mul_acc(&overflow, out->limbs[12], a->limbs[10], b->limbs[2]);
-    carry_out += overflow;
-    out->limbs[12] = __chestnut_mul_acc(&overflow, out->limbs[12], a->limbs[11], b->limbs[1]);
-    carry_out += overflow;
-    out->limbs[12] = __chestnut_mul_acc(&overflow, out->limbs[12], a->limbs[12], b->limbs[0]);
-    carry_out += overflow;
-
-    // Limb 13
-    out->limbs[13] = __chestnut_mul_acc(&overflow, carry_out, a->limbs[0], b->limbs[13]);
-    carry_out = overflow;
-    out->limbs[13] = __chestnut_mul_acc(&overflow, out->limbs[13], a->limbs[1], b->limbs[12]);
-    carry_out += overflow;
-    out->limbs[13] = __chestnut_mul_acc(&overflow, out->limbs[13], a->limbs[2], b->limbs[11]);
-    carry_out += overflow;
-    out->limbs[13] = __chestnut_mul_acc(&overflow, out->limbs[13], a->limbs[3], b->limbs[10]);
-    carry_out += overflow;
-    out->limbs[13] = __chestnut_mul_acc(&overflow, out->limbs[13], a->limbs[4], b->limbs[9]);
-    carry_out += overflow;
-    out->limbs[13] = __chestnut_mul_acc(&overflow, out->limbs[13], a->limbs[5], b->limbs[8]);
-    carry_out += overflow;
-    out->limbs[13] = __chestnut_mul_acc(&overflow, out->limbs[13], a->limbs[6], b->limbs[7]);
-    carry_out += overflow;
-    out->limbs[13] = __chestnut_mul_acc(&overflow, out->limbs[13], a->limbs[7], b->limbs[6]);
-    carry_out += overflow;
-    out->limbs[13] = __chestnut_mul_acc(&overflow, out->limbs[13], a->limbs[8], b->limbs[5]);
-    carry_out += overflow;
-    out->limbs[13] = __chestnut_mul_acc(&overflow, out->limbs[13], a->limbs[9], b->limbs[4]);
-    carry_out += overflow;
-    out->limbs[13] = __chestnut_mul_acc(&overflow, out->limbs[13], a->limbs[10], b->limbs[3]);
-    carry_out += overflow;
-    out->limbs[13] = __chestnut_mul_acc(&overflow, out->limbs[13], a->limbs[11], b->limbs[2]);
-    carry_out += overflow;
-    out->limbs[13] = __chestnut_mul_acc(&overflow, out->limbs[13], a->limbs[12], b->limbs[1]);
-    carry_out += overflow;
-    out->limbs[13] = __chestnut_mul_acc(&overflow, out->limbs[13], a->limbs[13], b->limbs[0]);
-    carry_out += overflow;
-
-    // Limb 14
-    out->limbs[14] = __chestnut_mul_acc(&overflow, carry_out, a->limbs[0], b->limbs[14]);
-    carry_out = overflow;
-    out->limbs[14] = __chestnut_mul_acc(&overflow, out->limbs[14], a->limbs[1], b->limbs[13]);
-    carry_out += overflow;
-    out->limbs[14] = __chestnut_mul_acc(&overflow, out->limbs[14], a->limbs[2], b->limbs[12]);
-    carry_out += overflow;
-    out->limbs[14] = __chestnut_mul_acc(&overflow, out->limbs[14], a->limbs[3], b->limbs[11]);
-    carry_out += overflow;
-    out->limbs[14] = __chestnut_mul_acc(&overflow, out->limbs[14], a->limbs[4], b->limbs[10]);
-    carry_out += overflow;
-    out->limbs[14] = __chestnut_mul_acc(&overflow, out->limbs[14], a->limbs[5], b->limbs[9]);
-    carry_out += overflow;
-    out->limbs[14] = __chestnut_mul_acc(&overflow, out->limbs[14], a->limbs[6], b->limbs[8]);
-    carry_out += overflow;
-    out->limbs[14] = __chestnut_mul_acc(&overflow, out->limbs[14], a->limbs[7], b->limbs[7]);
-    carry_out += overflow;
-    out->limbs[14] = __chestnut_mul_acc(&overflow, out->limbs[14], a->limbs[8], b->limbs[6]);
-    carry_out += overflow;
-    out->limbs[14] = __chestnut_mul_acc(&overflow, out->limbs[14], a->limbs[9], b->limbs[5]);
-    carry_out += overflow;
-    out->limbs[14] = __chestnut_mul_acc(&overflow, out->limbs[14], a->limbs[10], b->limbs[4]);
-    carry_out += overflow;
-    out->limbs[14] = __chestnut_mul_acc(&overflow, out->limbs[14], a->limbs[11], b->limbs[3]);
-    carry_out += overflow;
-    out->limbs[14] = __chestnut_mul_acc(&overflow, out->limbs[14], a->limbs[12], b->limbs[2]);
-    carry_out += overflow;
-    out->limbs[14] = __chestnut_mul_acc(&overflow, out->limbs[14], a->limbs[13], b->limbs[1]);
-    carry_out += overflow;
-    out->limbs[14] = __chestnut_mul_acc(&overflow, out->limbs[14], a->limbs[14], b->limbs[0]);
-    carry_out += overflow;
-
-    // Limb 15
-    out->limbs[15] = __chestnut_mul_acc(&overflow, carry_out, a->limbs[0], b->limbs[15]);
-    carry_out = overflow;
-    out->limbs[15] = __chestnut_mul_acc(&overflow, out->limbs[15], a->limbs[1], b->limbs[14]);
-    carry_out += overflow;
-    out->limbs[15] = __chestnut_mul_acc(&overflow, out->limbs[15], a->limbs[2], b->limbs[13]);
-    carry_out += overflow;
-    out->limbs[15] = __chestnut_mul_acc(&overflow, out->limbs[15], a->limbs[3], b->limbs[12]);
-    carry_out += overflow;
-    out->limbs[15] = __chestnut_mul_acc(&overflow, out->limbs[15], a->limbs[4], b->limbs[11]);
-    carry_out += overflow;
-    out->limbs[15] = __chestnut_mul_acc(&overflow, out->limbs[15], a->limbs[5], b->limbs[10]);
-    carry_out += overflow;
-    out->limbs[15] = __chestnut_mul_acc(&overflow, out->limbs[15], a->limbs[6], b->limbs[9]);
-    carry_out += overflow;
-    out->limbs[15] = __chestnut_mul_acc(&overflow, out->limbs[15], a->limbs[7], b->limbs[8]);
-    carry_out += overflow;
-    out->limbs[15] = __chestnut_mul_acc(&overflow, out->limbs[15], a->limbs[8], b->limbs[7]);
-    carry_out += overflow;
-    out->limbs[15] = __chestnut_mul_acc(&overflow, out->limbs[15], a->limbs[9], b->limbs[6]);
-    carry_out += overflow;
-    out->limbs[15] = __chestnut_mul_acc(&overflow, out->limbs[15], a->limbs[10], b->limbs[5]);
-    carry_out += overflow;
-    out->limbs[15] = __chestnut_mul_acc(&overflow, out->limbs[15], a->limbs[11], b->limbs[4]);
-    carry_out += overflow;
-    out->limbs[15] = __chestnut_mul_acc(&overflow, out->limbs[15], a->limbs[12], b->limbs[3]);
-    carry_out += overflow;
-    out->limbs[15] = __chestnut_mul_acc(&overflow, out->limbs[15], a->limbs[13], b->limbs[2]);
-    carry_out += overflow;
-    out->limbs[15] = __chestnut_mul_acc(&overflow, out->limbs[15], a->limbs[14], b->limbs[1]);
-    carry_out += overflow;
-    out->limbs[15] = __chestnut_mul_acc(&overflow, out->limbs[15], a->limbs[15], b->limbs[0]);
-    carry_out += overflow;
-
-    return (chestnut_uint8_t)(!!carry_out);
+    return __chestnut_mul_truncated(out->limbs, a->limbs, b->limbs, 16);
 }
 
 chestnut_uint1024_t chestnut_uint1024_t_mul_full(
@@ -2189,9 +1800,10 @@ void chestnut_int128_t_mul(
     const chestnut_int128_t *a,
     const chestnut_int128_t *b
 ) {
-    // Get the mask for both a and b.
-    chestnut_uint64_t mask_a = a->limbs[1] >> 63;
-    chestnut_uint64_t mask_b = b->limbs[1] >> 63;
+    // Get the mask for both a and b, all ones when negative so the selects
+    // below take every bit of the absolute value.
+    chestnut_uint64_t mask_a = 0 - (a->limbs[1] >> 63);
+    chestnut_uint64_t mask_b = 0 - (b->limbs[1] >> 63);
 
     // Get the negated versions of a and b.
     chestnut_uint128_t neg_a, neg_b;
@@ -2221,8 +1833,8 @@ void chestnut_int256_t_mul(
     const chestnut_int256_t *a,
     const chestnut_int256_t *b
 ) {
-    chestnut_uint64_t mask_a = a->limbs[3] >> 63;
-    chestnut_uint64_t mask_b = b->limbs[3] >> 63;
+    chestnut_uint64_t mask_a = 0 - (a->limbs[3] >> 63);
+    chestnut_uint64_t mask_b = 0 - (b->limbs[3] >> 63);
 
     chestnut_uint256_t neg_a, neg_b;
     chestnut_uint256_t_negate(&neg_a, (chestnut_uint256_t*)a);
@@ -2247,8 +1859,8 @@ void chestnut_int512_t_mul(
     const chestnut_int512_t *a,
     const chestnut_int512_t *b
 ) {
-    chestnut_uint64_t mask_a = a->limbs[7] >> 63;
-    chestnut_uint64_t mask_b = b->limbs[7] >> 63;
+    chestnut_uint64_t mask_a = 0 - (a->limbs[7] >> 63);
+    chestnut_uint64_t mask_b = 0 - (b->limbs[7] >> 63);
 
     chestnut_uint512_t neg_a, neg_b;
     chestnut_uint512_t_negate(&neg_a, (chestnut_uint512_t*)a);
@@ -2273,8 +1885,8 @@ void chestnut_int1024_t_mul(
     const chestnut_int1024_t *a,
     const chestnut_int1024_t *b
 ) {
-    chestnut_uint64_t mask_a = a->limbs[15] >> 63;
-    chestnut_uint64_t mask_b = b->limbs[15] >> 63;
+    chestnut_uint64_t mask_a = 0 - (a->limbs[15] >> 63);
+    chestnut_uint64_t mask_b = 0 - (b->limbs[15] >> 63);
 
     chestnut_uint1024_t neg_a, neg_b;
     chestnut_uint1024_t_negate(&neg_a, (chestnut_uint1024_t*)a);
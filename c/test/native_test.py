@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# Differential test of the chestnut_native extension.
+#
+# Adds, subtracts and multiplies random and edge case values of every wide
+# Integer type with chestnut_native and with the Python ints the types fall
+# back to, and fails on the first result that differs. Also chains results so
+# the limbs one native operation makes feed the next.
+#
+# Usage: python3 generate_bindings.py && python3 c/test/native_test.py [n] [seed]
+
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.realpath(__file__)))))
+
+import chestnut_types
+from chestnut_types import ChestnutNumber, NATIVE_INTEGER_TYPES
+
+OPERATIONS = ["__add__", "__sub__", "__mul__"]
+
+def edge_values(number_class):
+    width = number_class.BIT_WIDTH
+    if number_class.SIGN_BIT:
+        low, high = -(1 << (width - 1)), (1 << (width - 1)) - 1
+    else:
+        low, high = 0, (1 << width) - 1
+    values = [low, low + 1, high, high - 1, 0, 1, (1 << 64) - 1, 1 << 64, 1 << (width // 2)]
+    if number_class.SIGN_BIT:
+        values += [-1, -(1 << 64), -(1 << (width // 2))]
+    return values
+
+def random_value(number_class, rng):
+    # Values of every size, so products both fit and wrap.
+    return number_class(rng.getrandbits(rng.randint(1, number_class.BIT_WIDTH)) * rng.choice([1, -1]))
+
+def check(number_class, operation, a, b):
+    native = getattr(number_class, operation)(a, b)
+    python = getattr(ChestnutNumber, operation)(a, b)
+    if native.__class__ is not number_class or native.value != python.value:
+        raise SystemExit(f"{number_class.__name__}: {a.value} {operation} {b.value} "
+            f"is {native.value} natively, {python.value} with Python ints")
+    return native
+
+def run(number_class, n, rng):
+    values = [ number_class(value) for value in edge_values(number_class) ]
+    for a in values:
+        for b in values:
+            for operation in OPERATIONS:
+                check(number_class, operation, a, b)
+    for _ in range(n):
+        a, b = random_value(number_class, rng), random_value(number_class, rng)
+        for operation in OPERATIONS:
+            check(number_class, operation, a, b)
+    # Results kept as limbs, made from results kept as limbs.
+    result = random_value(number_class, rng)
+    for _ in range(n):
+        other = random_value(number_class, rng)
+        result = check(number_class, rng.choice(OPERATIONS), result, other)
+        result = check(number_class, rng.choice(OPERATIONS), other, result)
+
+if __name__ == "__main__":
+    if chestnut_types.chestnut_native is None:
+        raise SystemExit("chestnut_native isn't built, run python3 generate_bindings.py")
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    seed = int(sys.argv[2]) if len(sys.argv) > 2 else 0
+    rng = random.Random(seed)
+    for number_class in NATIVE_INTEGER_TYPES:
+        run(number_class, n, rng)
+        print(f"  {number_class.__name__.replace('Chestnut', ''):8s} ok")
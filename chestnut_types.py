@@ -1,48 +1,108 @@
 from error import *
 from token_types import Token
 from functools import wraps
+from array import array
+import hashlib
+import operator
+import sys
+
+try:
+    # Fixed width arithmetic from c/lib/int.c, built by generate_bindings.py.
+    # Without it the wide Integer types mask Python ints like the others.
+    import chestnut_native
+except ImportError:
+    chestnut_native = None
+
+# The Python operator numeric_operation and comparison_operation apply to
+# the operand values, by the name of the method they decorate.
+VALUE_OPERATIONS = {
+    "__add__": operator.add,
+    "__sub__": operator.sub,
+    "__mul__": operator.mul,
+    "__mod__": operator.mod,
+    "__pow__": operator.pow,
+    "__xor__": operator.xor,
+    "__floordiv__": operator.floordiv,
+    "__truediv__": operator.truediv,
+    "__lt__": operator.lt,
+    "__gt__": operator.gt,
+    "__le__": operator.le,
+    "__ge__": operator.ge,
+    "__lte__": operator.le,
+    "__gte__": operator.ge,
+}
+
+# Integers in this range are interned for each Integer type, like the Python
+# ints they wrap. Making one returns the type's shared instance.
+SMALL_INT_MIN = -5
+SMALL_INT_MAX = 1024
+
+# The shared Strings of one Latin-1 character, by code point.
+ONE_CHARACTER_STRINGS = [None] * 256
+
+def interned(cls, value):
+    # Makes the shared instance of cls for value, without running the
+    # constructor that would return the shared instance.
+    instance = object.__new__(cls)
+    instance.value = value
+    instance.token = value
+    return instance
+
+def value_operation(op_symbol, reverse):
+    # Reflected methods like __radd__ apply the operator of __add__ with the
+    # operands swapped.
+    if reverse:
+        op_symbol = "__" + op_symbol[3:]
+    return VALUE_OPERATIONS[op_symbol]
 
 def comparison_operation(op_symbol, op_name, reverse=False):
+    operation = value_operation(op_symbol, reverse)
     def decorator(func):
         @wraps(func)
         def wrapper(self, other):
-            self_str = self.__str__()
-            other_str = other.__str__()
-            values = ["NaN", "undefined"]
-            if self_str in values or other_str in values:
-                return ChestnutBoolean(False)
-            self.__typecheck__(other, op_name)
-            left = self.value if not reverse else other.value
-            right = other.value if not reverse else self.value
-            return ChestnutBoolean(left.__getattribute__(op_symbol)(right))
+            if other.__class__ is not self.__class__ or self.NOT_A_NUMBER:
+                if self.NOT_A_NUMBER or getattr(other, "NOT_A_NUMBER", False):
+                    return CHESTNUT_FALSE
+                self.__typecheck__(other, op_name)
+            if reverse:
+                return CHESTNUT_TRUE if operation(other.value, self.value) else CHESTNUT_FALSE
+            return CHESTNUT_TRUE if operation(self.value, other.value) else CHESTNUT_FALSE
         return wrapper
     return decorator
 
 def numeric_operation(op_symbol, op_name, reverse=False):
+    operation = value_operation(op_symbol, reverse)
+    checks_divisor = op_symbol.endswith(("div__", "mod__"))
     def decorator(func):
         @wraps(func)
         def wrapper(self, other):
-            self_str = self.__str__()
-            other_str = other.__str__()
-            values = ["NaN", "undefined"]
-            if self_str in values or other_str in values:
-                return CHESTNUT_NAN
-            if not isinstance(other, ChestnutAny):
-                other = self.__class__(other)
-            if func.__name__ == "__add__" and isinstance(other, ChestnutString):
-                return NotImplemented
-            self.__typecheck__(other, op_name)
-            if func.__name__.endswith("div__") or func.__name__.endswith("mod__"):
-                divisor = self if reverse else other
-                if divisor.value == 0:
+            if other.__class__ is not self.__class__ or self.NOT_A_NUMBER:
+                if self.NOT_A_NUMBER or getattr(other, "NOT_A_NUMBER", False):
                     return CHESTNUT_NAN
-            left = self.value if not reverse else other.value
-            right = other.value if not reverse else self.value
-            return type(self)(left.__getattribute__(op_symbol)(right))
+                if not isinstance(other, ChestnutAny):
+                    other = self.__class__(other)
+                if func.__name__ == "__add__" and isinstance(other, ChestnutString):
+                    return NotImplemented
+                self.__typecheck__(other, op_name)
+            if reverse:
+                left, right = other.value, self.value
+            else:
+                left, right = self.value, other.value
+            if checks_divisor and right == 0:
+                return CHESTNUT_NAN
+            return self.__class__(operation(left, right))
         return wrapper
     return decorator
 
 class ChestnutAny:
+    # Subclasses that don't declare __slots__ still get a __dict__; struct
+    # instances declare their fields as slots to stay compact.
+    __slots__ = ("value", "token")
+
+    # Set on NaN and undefined, which every arithmetic operation results in
+    # and every comparison is false with.
+    NOT_A_NUMBER = False
+
     def __bool__(self):
         return False
 
@@ -61,7 +121,7 @@ class ChestnutAny:
         return str(self.value)
 
     def __typecheck__(self, other, op):
-        if isinstance(other, ChestnutNaN):
+        if type(self) is type(other) or isinstance(other, ChestnutNaN):
             return
         other_type = type(other).__name__
         if isinstance(other, ChestnutAny):
@@ -136,7 +196,23 @@ class ChestnutAny:
     def __and__(self, other):
         return self.value and other.value
 
+    def hash_key(self):
+        # The Python value a Map keeps the value under. Values equal as Map
+        # keys have the same one. Only the types that can be keys hash, by
+        # it; equality raises between values of different types, so Maps key
+        # their dict by hash_key() itself.
+        raise TypeException(f"A {self.gettype()} can't be a Map key, only Strings, Integers, Booleans and Tuples can")
+
 class ChestnutNull(ChestnutAny):
+    # There is a single null, CHESTNUT_NULL, which making a Null returns.
+    def __new__(cls, token=None):
+        return CHESTNUT_NULL
+
+    __init__ = object.__init__
+
+    def __reduce__(self):
+        return "CHESTNUT_NULL"
+
     def isnull(self):
         return True
 
@@ -146,9 +222,26 @@ class ChestnutNull(ChestnutAny):
     def __bool__(self):
         return False
 
-CHESTNUT_NULL = ChestnutNull(None)
+CHESTNUT_NULL = interned(ChestnutNull, None)
 
 class ChestnutString(ChestnutAny):
+    # Strings of one Latin-1 character made from a Python string are shared,
+    # so reading a string character by character doesn't allocate.
+    def __new__(cls, token=None):
+        if token.__class__ is str and len(token) == 1 and token < "\u0100":
+            string = ONE_CHARACTER_STRINGS[ord(token)]
+            if string is None:
+                string = ONE_CHARACTER_STRINGS[ord(token)] = interned(cls, token)
+            return string
+        string = object.__new__(cls)
+        ChestnutAny.__init__(string, token)
+        return string
+
+    __init__ = object.__init__
+
+    def __reduce__(self):
+        return (self.__class__, (self.token,))
+
     def isstring(self):
         return True
 
@@ -182,9 +275,9 @@ class ChestnutString(ChestnutAny):
     def __add__(self, other):
         value = other
 
-        if isinstance(other, ChestnutBoolean):
+        if isinstance(other, (ChestnutBoolean, ChestnutNull)):
             value = other.__str__()
-        elif isinstance(other, ChestnutStruct):
+        elif isinstance(other, (ChestnutStruct, ChestnutMap, ChestnutList)):
             value = other.__str__()
         elif isinstance(other, ChestnutAny):
             value = other.value
@@ -193,9 +286,9 @@ class ChestnutString(ChestnutAny):
     def __radd__(self, other):
         value = other
         
-        if isinstance(other, ChestnutBoolean):
+        if isinstance(other, (ChestnutBoolean, ChestnutNull)):
             value = other.__str__()
-        elif isinstance(other, ChestnutStruct):
+        elif isinstance(other, (ChestnutStruct, ChestnutMap, ChestnutList)):
             value = other.__str__()
         elif isinstance(other, ChestnutAny):
             value = other.value
@@ -207,7 +300,15 @@ class ChestnutString(ChestnutAny):
         if isinstance(other, ChestnutAny):
             other_value = str(other.value)
 
-        return ChestnutBoolean(str(self.value) == str(other_value))
+        return CHESTNUT_TRUE if str(self.value) == str(other_value) else CHESTNUT_FALSE
+
+    def __hash__(self):
+        return hash(self.hash_key())
+
+    def hash_key(self):
+        # Literals wrap the String the lexer made.
+        value = self.value
+        return value if value.__class__ is str else str(value)
 
     def __len__(self):
         return len(self.value)
@@ -231,13 +332,29 @@ class ChestnutString(ChestnutAny):
     def __gt__(self, other): pass
 
 class ChestnutBoolean(ChestnutAny):
+    # Making a Boolean from a value returns CHESTNUT_TRUE or CHESTNUT_FALSE
+    # for its truth. Only the literals the parser makes from a token are
+    # instances of their own, wrapping the lexer's true or false.
+    def __new__(cls, token=None):
+        if token.__class__ is not bool and hasattr(token, "data"):
+            boolean = object.__new__(cls)
+            ChestnutAny.__init__(boolean, token)
+            return boolean
+        return CHESTNUT_TRUE if token else CHESTNUT_FALSE
+
+    __init__ = object.__init__
+
+    def __reduce__(self):
+        return (ChestnutBoolean, (self.token,))
+
     def isbool(self):
         return True
 
     def __bool__(self):
-        if self.value.__class__.__name__ == "ChestnutBoolean":
-            return self.value.__str__() == "true"
-        return self.value
+        value = self.value
+        if value.__class__ is bool:
+            return value
+        return bool(value)
 
     def __repr__(self):
         return self.__str__()
@@ -247,6 +364,16 @@ class ChestnutBoolean(ChestnutAny):
             return "true"
         return "false"
 
+    def __hash__(self):
+        return hash(self.hash_key())
+
+    def hash_key(self):
+        # Tagged, or true would be the same key as 1.
+        return ("Boolean", bool(self.value))
+
+CHESTNUT_TRUE = interned(ChestnutBoolean, True)
+CHESTNUT_FALSE = interned(ChestnutBoolean, False)
+
 class ChestnutNumber(ChestnutAny):
     MIN = 0
     MAX = 0
@@ -337,33 +464,76 @@ class ChestnutNumber(ChestnutAny):
     def rightside_greater_than_or_equal_to(self, other):
         return ChestnutBoolean(self.__rge__(other))
 
+    def __eq__(self, other):
+        if other.__class__ is self.__class__:
+            return CHESTNUT_TRUE if self.value == other.value else CHESTNUT_FALSE
+        return super().__eq__(other)
+
     def __repr__(self):
         return str(self.value)
 
 class ChestnutInteger(ChestnutNumber):
     BIT_WIDTH = -1
-
-    def __init__(self, token):
-        if isinstance(token, ChestnutNumber):
-            token = int(token.value)
-        if isinstance(token, int):
-            max_bits = self.BIT_WIDTH
-            if max_bits != -1:
-                if hasattr(self, "MASK"):
-                    mask = self.MASK
-                else:
-                    mask = (1 << max_bits) - 1
-                token = token & mask
-                if not hasattr(self, "MASK"):
-                    sign_bit_mask = 1 << (max_bits - 1)
-                    if token & sign_bit_mask:
-                        token = token - (1 << max_bits)
-
-        super().__init__(token)
+    # The mask values of a fixed width type wrap to and, for signed types,
+    # its sign bit. Worked out once per class by __init_subclass__.
+    WRAP_MASK = None
+    SIGN_BIT = 0
+    # The interned instances of the type, made as they are first needed.
+    SMALL_INTS = [None] * (SMALL_INT_MAX - SMALL_INT_MIN + 1)
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.SMALL_INTS = [None] * (SMALL_INT_MAX - SMALL_INT_MIN + 1)
+        if cls.BIT_WIDTH == -1:
+            cls.WRAP_MASK = None
+            cls.SIGN_BIT = 0
+        elif hasattr(cls, "MASK"):
+            cls.WRAP_MASK = cls.MASK
+            cls.SIGN_BIT = 0
+        else:
+            cls.WRAP_MASK = (1 << cls.BIT_WIDTH) - 1
+            cls.SIGN_BIT = 1 << (cls.BIT_WIDTH - 1)
+
+    def __new__(cls, token=None):
+        if token.__class__ is not int:
+            if isinstance(token, ChestnutNumber):
+                token = int(token.value)
+            elif isinstance(token, int):
+                token = int(token)
+            else:
+                number = object.__new__(cls)
+                ChestnutAny.__init__(number, token)
+                return number
+        mask = cls.WRAP_MASK
+        if mask is not None:
+            token &= mask
+            if token & cls.SIGN_BIT:
+                token -= mask + 1
+        if SMALL_INT_MIN <= token <= SMALL_INT_MAX:
+            small_ints = cls.SMALL_INTS
+            number = small_ints[token - SMALL_INT_MIN]
+            if number is None:
+                number = small_ints[token - SMALL_INT_MIN] = interned(cls, token)
+            return number
+        return interned(cls, token)
+
+    __init__ = object.__init__
+
+    def __reduce__(self):
+        # Values load as the interned instance; literals the parser made from
+        # a token are made from it again.
+        return (self.__class__, (self.token,))
 
     def isint(self):
         return True
 
+    def __hash__(self):
+        return hash(self.value)
+
+    def hash_key(self):
+        # Integers of every width are the same key for the same value.
+        return self.value
+
     def __int__(self):
         return self.value
 
@@ -416,11 +586,7 @@ class ChestnutInteger(ChestnutNumber):
         part1 = val << amt
         part2 = val >> (max_bits - amt)
         rotated_val = part1 | part2
-        if hasattr(self, "MASK"):
-            mask = self.MASK
-        else:
-            mask = (1 << max_bits) - 1
-        result_value = rotated_val & mask
+        result_value = rotated_val & self.WRAP_MASK
 
         return self.__class__(result_value)
 
@@ -440,12 +606,7 @@ class ChestnutInteger(ChestnutNumber):
         part2 = val << (max_bits - amt)
         rotated_val = part1 | part2
 
-        if hasattr(self, "MASK"):
-            mask = self.MASK
-        else:
-            mask = (1 << max_bits) - 1
-
-        result_value = rotated_val & mask
+        result_value = rotated_val & self.WRAP_MASK
 
         return self.__class__(result_value)
 
@@ -507,7 +668,7 @@ class ChestnutInteger(ChestnutNumber):
         if isinstance(other, int):
             other = self.__class__(other)
 
-        return ChestnutBoolean(self.value < other.value)
+        return CHESTNUT_TRUE if self.value < other.value else CHESTNUT_FALSE
 
     def __lte__(self, other):
         if isinstance(other, int):
@@ -518,7 +679,7 @@ class ChestnutInteger(ChestnutNumber):
     def __gt__(self, other):
         if isinstance(other, int):
             other = self.__class__(other)
-        return ChestnutBoolean(self.value > other.value)
+        return CHESTNUT_TRUE if self.value > other.value else CHESTNUT_FALSE
 
     def __gte__(self, other):
         if isinstance(other, int):
@@ -529,10 +690,21 @@ class ChestnutInteger(ChestnutNumber):
         return self.value != 0
 
 class ChestnutNaN(ChestnutNumber):
+    NOT_A_NUMBER = True
+
+    # There is a single NaN, CHESTNUT_NAN, which making a NaN returns.
+    def __new__(cls, token=None):
+        return CHESTNUT_NAN
+
+    __init__ = object.__init__
+
+    def __reduce__(self):
+        return "CHESTNUT_NAN"
+
     def is_nan(self):
         return True
     def __eq__(self, other):
-        return ChestnutBoolean(False)
+        return CHESTNUT_FALSE
     def __str__(self):
         return "NaN"
     def __truediv__(self, other):
@@ -540,13 +712,25 @@ class ChestnutNaN(ChestnutNumber):
     def __rtruediv__(self,other):
         return self
 
-CHESTNUT_NAN = ChestnutNaN("NaN")
+CHESTNUT_NAN = interned(ChestnutNaN, "NaN")
 
 class ChestnutUndefined(ChestnutNumber):
+    NOT_A_NUMBER = True
+
+    # There is a single undefined, CHESTNUT_UNDEFINED, which making an
+    # Undefined returns.
+    def __new__(cls, token=None):
+        return CHESTNUT_UNDEFINED
+
+    __init__ = object.__init__
+
+    def __reduce__(self):
+        return "CHESTNUT_UNDEFINED"
+
     def is_undefined(self):
         return True
     def __eq__(self, other):
-        return ChestnutBoolean(True)
+        return CHESTNUT_TRUE
     def __str__(self):
         return "undefined"
     def __truediv__(self, other):
@@ -554,7 +738,7 @@ class ChestnutUndefined(ChestnutNumber):
     def __rtruediv__(self, other):
         return self
 
-CHESTNUT_UNDEFINED = ChestnutUndefined("undefined")
+CHESTNUT_UNDEFINED = interned(ChestnutUndefined, "undefined")
 
 class ChestnutInt8(ChestnutInteger):
     BIT_WIDTH = 8
@@ -642,7 +826,59 @@ class ChestnutUInt1024(ChestnutUnsignedInteger):
     MASK = 0xFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFF
     MAX = 2**1024-1
 
+# The types chestnut_native adds, subtracts and multiplies for when it's built.
+NATIVE_INTEGER_TYPES = [
+    ChestnutInt128, ChestnutInt256, ChestnutInt512, ChestnutInt1024,
+    ChestnutUInt128, ChestnutUInt256, ChestnutUInt512, ChestnutUInt1024,
+]
+
+def native_operation(operation, fallback):
+    # Results made by chestnut_native only hold their limbs, which the next
+    # operation takes as they are. Anything but two of the same type goes to
+    # the operation of the Python ints.
+    @wraps(fallback)
+    def wrapper(self, other):
+        if other.__class__ is self.__class__:
+            number = object.__new__(self.__class__)
+            number.limbs = operation(self.limbs, other.limbs)
+            return number
+        return fallback(self, other)
+    return wrapper
+
+def native_attribute(self, name):
+    # Works out whichever of the value and the limbs a number was made
+    # without, the first time it's needed.
+    if name == "value" or name == "token":
+        limbs = self.__dict__.get("limbs")
+        if limbs is None:
+            raise AttributeError(name)
+        self.value = self.token = int.from_bytes(limbs, "little", signed=self.SIGN_BIT != 0)
+        return self.value
+    if name == "limbs":
+        self.limbs = self.value.to_bytes(self.BIT_WIDTH // 8, "little", signed=self.SIGN_BIT != 0)
+        return self.limbs
+    raise AttributeError(name)
+
+def use_native_arithmetic(number_class):
+    prefix = "int" if number_class.SIGN_BIT else "uint"
+    number_class.__getattr__ = native_attribute
+    for method in ("add", "sub", "mul"):
+        operation = getattr(chestnut_native, f"{prefix}{number_class.BIT_WIDTH}_{method}")
+        fallback = getattr(number_class, f"__{method}__")
+        setattr(number_class, f"__{method}__", native_operation(operation, fallback))
+
+if chestnut_native is not None:
+    for number_class in NATIVE_INTEGER_TYPES:
+        use_native_arithmetic(number_class)
+
 class ChestnutFloat(ChestnutNumber):
+    def __init__(self, token=None):
+        if token.__class__ is float:
+            self.value = token
+            self.token = token
+        else:
+            super().__init__(token)
+
     def isfloat(self):
         return True
 
@@ -661,6 +897,13 @@ class ChestnutFloat64(ChestnutFloat):
     MAX = 1.7976931348623157 * 10**38
 
 class ChestnutList(ChestnutAny):
+    def __new__(cls, token=None, bound_type=ChestnutAny):
+        # Lists bound to a fixed width number type keep their elements in an
+        # array instead.
+        if cls is ChestnutList and bound_type in TYPED_LIST_CODES:
+            return object.__new__(ChestnutTypedList)
+        return object.__new__(cls)
+
     def __init__(self, token, bound_type=ChestnutAny):
         super().__init__(token)
         if not issubclass(bound_type, ChestnutAny):
@@ -702,6 +945,13 @@ class ChestnutList(ChestnutAny):
     def __contains__(self, var_name):
         return ChestnutBoolean(var_name in self.value)
 
+    def __eq__(self, other):
+        # Compares the elements as they are read, so typed lists and ranges
+        # equal Lists of the same values and stay as they are.
+        if isinstance(other, ChestnutList):
+            return ChestnutBoolean(len(self) == len(other) and all(a == b for a, b in zip(self, other)))
+        return super().__eq__(other)
+
     def __repr__(self):
         return f"ChestnutList(<{self.value}>)"
 
@@ -721,9 +971,406 @@ class ChestnutList(ChestnutAny):
         return self.value.pop(index)
 
     def __bool__(self):
-        return length(self.value) > 0
+        return len(self) > 0
+
+    def check_element(self, value):
+        if not isinstance(value, self.bound_type):
+            raise TypeException(f"Item inserted into Chestnut list must be a Chestnut {self.bound_type}")
+
+    def fill(self, value):
+        self.check_element(value)
+        self.value[:] = [value] * len(self)
+
+    def copy(self):
+        return ChestnutList(list(self), self.bound_type)
+
+    def elementwise(self, other, operation):
+        if len(self) != len(other):
+            raise ValueException(f"Lists of {len(self)} and {len(other)} items can't be combined elementwise")
+        return ChestnutList([ operation(a, b) for a, b in zip(self, other) ], self.bound_type)
+
+    def elementwise_xor(self, other):
+        return self.elementwise(other, operator.xor)
+
+    def elementwise_and(self, other):
+        return self.elementwise(other, operator.and_)
+
+    def elementwise_add(self, other):
+        return self.elementwise(other, operator.add)
+
+    def sum(self):
+        total = None
+        for item in self:
+            total = item if total is None else total + item
+        return ChestnutInteger(0) if total is None else total
+
+# The array typecodes of the number types a List can be bound to and keep in
+# an array. Floats are all kept as doubles, like the Python floats they wrap;
+# a Float32 doesn't round its value to 32 bits.
+TYPED_LIST_CODES = {
+    ChestnutInt8: "b", ChestnutUInt8: "B",
+    ChestnutInt16: "h", ChestnutUInt16: "H",
+    ChestnutInt32: "i" if array("i").itemsize == 4 else "l",
+    ChestnutUInt32: "I" if array("I").itemsize == 4 else "L",
+    ChestnutInt64: "q", ChestnutUInt64: "Q",
+    ChestnutFloat: "d", ChestnutFloat32: "d", ChestnutFloat64: "d",
+}
+
+def array_lanes(items):
+    # The elements of an array as one int, each in its own run of bits.
+    return int.from_bytes(items, sys.byteorder)
+
+def lanes_array(typecode, lanes, size):
+    items = array(typecode)
+    items.frombytes(lanes.to_bytes(size, sys.byteorder))
+    return items
+
+class ChestnutTypedList(ChestnutList):
+    """
+        A List bound to a fixed width number type, made by ChestnutList when
+        given one. The numbers are kept in an array of that width and made into
+        Chestnut values as they are read, and values written to it must be of
+        the type. Bulk operations on two typed lists of the same type run on
+        the arrays. Reading its Python list, as code written for ordinary
+        Lists does, makes the elements into a new list each time and leaves
+        the array as it is.
+    """
+
+    def __init__(self, token, bound_type):
+        self.token = None
+        self.bound_type = bound_type
+        self.typecode = TYPED_LIST_CODES[bound_type]
+        self.items = None
+        if isinstance(token, (bytes, bytearray, memoryview)) and self.typecode == "B":
+            self.array = array("B", token)
+        elif isinstance(token, array) and token.typecode == self.typecode:
+            self.array = array(self.typecode, token)
+        else:
+            self.array = array(self.typecode)
+            for item in token or ():
+                self.append(item)
+
+    @property
+    def value(self):
+        if self.items is not None:
+            return self.items
+        return list(self)
+
+    @value.setter
+    def value(self, items):
+        self.items = items
+
+    def gettype(self):
+        return "List"
+
+    def length(self):
+        return ChestnutInteger(len(self))
+
+    def __len__(self):
+        if self.items is not None:
+            return len(self.items)
+        return len(self.array)
+
+    def __getitem__(self, var_name):
+        if self.items is not None:
+            return super().__getitem__(var_name)
+        index = var_name.value if isinstance(var_name, ChestnutInteger) else var_name
+        if isinstance(index, float):
+            index = int(index)
+        if not isinstance(index, int):
+            raise Exception(f"Non-integer { index } given for list index {var_name}")
+        return self.bound_type(self.array[index])
+
+    def __setitem__(self, var_name, value):
+        if self.items is not None:
+            return super().__setitem__(var_name, value)
+        self.check_element(value)
+        index = var_name.value if isinstance(var_name, ChestnutInteger) else None
+        if not isinstance(index, int):
+            raise Exception(type(value))
+        self.array[index] = value.value
+
+    def __iter__(self):
+        if self.items is not None:
+            return iter(self.items)
+        return map(self.bound_type, self.array)
+
+    def __reversed__(self):
+        if self.items is not None:
+            return reversed(self.items)
+        return map(self.bound_type, reversed(self.array))
+
+    def __contains__(self, var_name):
+        if self.items is not None:
+            return super().__contains__(var_name)
+        return ChestnutBoolean(isinstance(var_name, self.bound_type) and var_name.value in self.array)
+
+    def __eq__(self, other):
+        if isinstance(other, ChestnutTypedList) and other.bound_type is self.bound_type:
+            return ChestnutBoolean(self.array == other.array if self.items is None and other.items is None
+                else list(self) == list(other))
+        return super().__eq__(other)
+
+    def __str__(self):
+        # The numbers print as their Chestnut values do.
+        return str(self.items if self.items is not None else list(self.array))
+
+    def __repr__(self):
+        if self.items is not None:
+            return super().__repr__()
+        return f"ChestnutTypedList(<{self.array}>)"
+
+    def append(self, value):
+        self.check_element(value)
+        if self.items is not None:
+            return self.items.append(value)
+        self.array.append(value.value)
+
+    def extend(self, items):
+        for item in items:
+            self.append(item)
+
+    def insert(self, index, item):
+        self.check_element(item)
+        if self.items is not None:
+            return self.items.insert(index, item)
+        self.array.insert(index, item.value)
+
+    def remove(self, item):
+        if self.items is not None:
+            return self.items.remove(item)
+        self.array.remove(item.value)
+
+    def pop(self, index):
+        if self.items is not None:
+            return self.items.pop(index)
+        return self.bound_type(self.array.pop(index))
+
+    def fill(self, value):
+        if self.items is not None:
+            return super().fill(value)
+        self.check_element(value)
+        self.array[:] = array(self.typecode, [value.value]) * len(self.array)
+
+    def copy(self):
+        if self.items is not None:
+            return super().copy()
+        return self.__class__(self.array, self.bound_type)
+
+    def same_arrays(self, other):
+        # Whether both lists still keep arrays of the same type, so bulk
+        # operations can work on those.
+        return (isinstance(other, ChestnutTypedList) and other.bound_type is self.bound_type
+            and self.items is None and other.items is None and len(self.array) == len(other.array))
+
+    def lanes_operation(self, other, operation):
+        # Applies a bitwise operation to every pair of elements at once, on
+        # the arrays read as single ints.
+        size = len(self.array) * memoryview(self.array).itemsize
+        lanes = operation(array_lanes(self.array), array_lanes(other.array))
+        return self.__class__(lanes_array(self.typecode, lanes, size), self.bound_type)
+
+    def elementwise_xor(self, other):
+        if not self.same_arrays(other) or self.typecode == "d":
+            return super().elementwise_xor(other)
+        return self.lanes_operation(other, operator.xor)
+
+    def elementwise_and(self, other):
+        if not self.same_arrays(other) or self.typecode == "d":
+            return super().elementwise_and(other)
+        return self.lanes_operation(other, operator.and_)
+
+    def elementwise_add(self, other):
+        if not self.same_arrays(other):
+            return super().elementwise_add(other)
+        if self.typecode == "d":
+            return self.__class__(array("d", map(operator.add, self.array, other.array)), self.bound_type)
+        # Adds the elements without their top bits, so no carry crosses into
+        # the next element, then puts the top bits of the sums back.
+        bits = memoryview(self.array).itemsize * 8
+        high_bits = array_lanes(array(self.typecode.upper(), [1 << (bits - 1)]) * len(self.array))
+        low_bits = ((1 << (bits * len(self.array))) - 1) ^ high_bits
+        def add(a, b):
+            return ((a & low_bits) + (b & low_bits)) ^ ((a ^ b) & high_bits)
+        return self.lanes_operation(other, add)
+
+    def sum(self):
+        if self.items is not None:
+            return super().sum()
+        return self.bound_type(sum(self.array))
+
+class ChestnutBytes(ChestnutTypedList):
+    """
+        A Bytes value, the typed UInt8 list that files are read into. Its
+        bytes are kept in a bytearray, or for a slice in a memoryview of the
+        bytearray it was sliced from, whose bytes it shares. Reading into it,
+        slicing, extending, concatenating and decoding it work on the bytes
+        directly rather than on a Chestnut value per byte.
+    """
+
+    def __init__(self, token=None, bound_type=ChestnutUInt8):
+        self.token = None
+        self.bound_type = ChestnutUInt8
+        self.typecode = "B"
+        self.items = None
+        if isinstance(token, (bytearray, memoryview)):
+            self.array = token
+        elif isinstance(token, (bytes, array)):
+            self.array = bytearray(token)
+        else:
+            items = list(token or ())
+            for item in items:
+                self.check_element(item)
+            self.array = bytearray(item.value for item in items)
+
+    def gettype(self):
+        return "Bytes"
+
+    def __repr__(self):
+        if self.items is not None:
+            return super().__repr__()
+        return f"ChestnutBytes(<{bytes(self.array)}>)"
+
+    def buffer(self):
+        # The bytes, without copying them unless the value was made into a list.
+        if self.items is not None:
+            return bytearray(item.value for item in self.items)
+        return self.array
+
+    def resize(self, operation):
+        # Runs an operation changing how many bytes there are. A slice, or a
+        # bytearray a slice still views, can't change length, so its bytes
+        # are copied first and the slices keep the bytes they had.
+        if isinstance(self.array, memoryview):
+            self.array = bytearray(self.array)
+        try:
+            return operation(self.array)
+        except BufferError:
+            self.array = bytearray(self.array)
+            return operation(self.array)
+
+    def append(self, value):
+        self.check_element(value)
+        if self.items is not None:
+            return self.items.append(value)
+        self.resize(lambda items: items.append(value.value))
+
+    def insert(self, index, item):
+        self.check_element(item)
+        if self.items is not None:
+            return self.items.insert(index, item)
+        self.resize(lambda items: items.insert(index, item.value))
+
+    def remove(self, item):
+        if self.items is not None:
+            return self.items.remove(item)
+        self.resize(lambda items: items.remove(item.value))
+
+    def pop(self, index):
+        if self.items is not None:
+            return self.items.pop(index)
+        return ChestnutUInt8(self.resize(lambda items: items.pop(index)))
+
+    def extend(self, items):
+        if self.items is not None or not isinstance(items, ChestnutTypedList) or items.bound_type is not ChestnutUInt8:
+            return super().extend(items)
+        other = items.buffer() if isinstance(items, ChestnutBytes) else items.array
+        if other is self.array:
+            other = bytes(other)
+        self.resize(lambda own: own.extend(other))
+
+    def copy(self):
+        return ChestnutBytes(bytearray(self.buffer()))
+
+    def __add__(self, other):
+        if not isinstance(other, ChestnutTypedList) or other.bound_type is not ChestnutUInt8:
+            raise TypeException(f"Can't add {other.gettype() if isinstance(other, ChestnutAny) else other} to Bytes")
+        other = other.buffer() if isinstance(other, ChestnutBytes) else other.array
+        return ChestnutBytes(bytearray().join((self.buffer(), other)))
+
+    def slice(self, start, end):
+        # Shares the bytes from start up to end, like slice() of a String.
+        if self.items is not None:
+            self.array = self.buffer()
+            self.items = None
+        return ChestnutBytes(memoryview(self.array)[start:end])
+
+    def decode(self, encoding):
+        return ChestnutString(str(self.buffer(), encoding, "replace"))
+
+class ChestnutRange(ChestnutList):
+    """
+        The integers from start to end inclusive, counting down when end is
+        below start. Elements are made as they are read, so a range takes
+        constant memory whatever its length. Using it as a List in a way that
+        changes it materialises the elements into an ordinary list first.
+    """
+
+    def __init__(self, start, end):
+        self.token = None
+        self.bound_type = ChestnutAny
+        self.element_type = start.__class__
+        step = 1 if start.value <= end.value else -1
+        self.integers = range(start.value, end.value + step, step)
+        self.items = None
+
+    @property
+    def value(self):
+        if self.items is None:
+            self.items = list(self)
+        return self.items
+
+    @value.setter
+    def value(self, items):
+        self.items = items
+
+    def length(self):
+        return ChestnutInteger(len(self))
+
+    def __len__(self):
+        if self.items is not None:
+            return len(self.items)
+        return len(self.integers)
+
+    def __getitem__(self, var_name):
+        if self.items is not None:
+            return super().__getitem__(var_name)
+        index = var_name.value if isinstance(var_name, ChestnutInteger) else var_name
+        if isinstance(index, float):
+            index = int(index)
+        if not isinstance(index, int):
+            raise Exception(f"Non-integer { index } given for list index {var_name}")
+        return self.element_type(self.integers[index])
+
+    def __iter__(self):
+        if self.items is not None:
+            return iter(self.items)
+        return map(self.element_type, self.integers)
+
+    def __reversed__(self):
+        if self.items is not None:
+            return reversed(self.items)
+        return map(self.element_type, reversed(self.integers))
+
+    def __contains__(self, var_name):
+        if self.items is not None:
+            return super().__contains__(var_name)
+        return ChestnutBoolean(isinstance(var_name, ChestnutInteger) and var_name.value in self.integers)
+
+    def __str__(self):
+        return str(self.value if self.items is not None else list(self))
+
+    def __repr__(self):
+        if self.items is not None:
+            return super().__repr__()
+        return f"ChestnutRange(<{self.integers}>)"
+
+    def __bool__(self):
+        return len(self) > 0
 
 class ChestnutStruct(ChestnutAny):
+    __slots__ = ()
+
     def length(self):
         return len(self.value)
 
@@ -740,6 +1387,98 @@ class ChestnutTuple(ChestnutAny):
     def __getitem__(self, index):
         return self.value[index]
 
+    def __hash__(self):
+        # Like a Python tuple, unhashable if an element can't be a key.
+        try:
+            return hash(self.hash_key())
+        except TypeException as e:
+            raise TypeError(str(e)) from None
+
+    def hash_key(self):
+        return ("Tuple",) + tuple_key(self.value)
+
+def tuple_key(items):
+    # Tuple literals keep their elements in a Python tuple of their own,
+    # which the key flattens.
+    key = ()
+    for item in items:
+        key += tuple_key(item) if item.__class__ is tuple else (item.hash_key(),)
+    return key
+
+class ChestnutMap(ChestnutAny):
+    """
+        Values by key, in a dict from the hash_key() of each key to the key
+        and its value. Strings, Integers, Booleans and Tuples of them can be
+        keys. Keys are iterated in the order they were first set, from a copy
+        taken as iterating starts, so a loop can set and unset keys.
+    """
+    def __init__(self, pairs=()):
+        self.token = None
+        self.value = { key.hash_key(): (key, value) for key, value in pairs }
+
+    def gettype(self):
+        return "Map"
+
+    def get(self, key, default=CHESTNUT_NULL):
+        pair = self.value.get(key.hash_key())
+        return default if pair is None else pair[1]
+
+    def set(self, key, value):
+        self.value[key.hash_key()] = (key, value)
+
+    def has(self, key):
+        return ChestnutBoolean(key.hash_key() in self.value)
+
+    def unset(self, key):
+        # The value that was set, or None if there wasn't one.
+        pair = self.value.pop(key.hash_key(), None)
+        return None if pair is None else pair[1]
+
+    def keys(self):
+        return ChestnutList([ pair[0] for pair in self.value.values() ])
+
+    def values(self):
+        return ChestnutList([ pair[1] for pair in self.value.values() ])
+
+    def length(self):
+        return ChestnutInteger(len(self.value))
+
+    def __len__(self):
+        return len(self.value)
+
+    def __iter__(self):
+        return iter([ pair[0] for pair in self.value.values() ])
+
+    def __getitem__(self, key):
+        pair = self.value.get(key.hash_key())
+        if pair is None:
+            raise RuntimeException(f"Key {key!r} isn't in the Map")
+        return pair[1]
+
+    def __setitem__(self, key, value):
+        self.value[key.hash_key()] = (key, value)
+
+    def __eq__(self, other):
+        if isinstance(other, ChestnutMap):
+            if len(self.value) != len(other.value):
+                return CHESTNUT_FALSE
+            for key, (_, value) in self.value.items():
+                pair = other.value.get(key)
+                if pair is None or not pair[1] == value:
+                    return CHESTNUT_FALSE
+            return CHESTNUT_TRUE
+        return super().__eq__(other)
+
+    def __bool__(self):
+        return len(self.value) > 0
+
+    def __str__(self):
+        shown = lambda item: repr(item) if isinstance(item, ChestnutString) else str(item)
+        return "{" + ", ".join(f"{shown(key)}: {shown(value)}" for key, value in self.value.values()) + "}"
+
+    def __repr__(self):
+        return f"ChestnutMap(<{self}>)"
+
 class ChestnutFileHandle(ChestnutAny):
     def __init__(self, file_object):
         if not hasattr(file_object, "write") and not hasattr(file_object, 'read') and not hasattr(file_object, 'close'):
@@ -762,11 +1501,114 @@ class ChestnutFileHandle(ChestnutAny):
     def close(self):
         if not self.value.closed:
             self.value.close()
-            return ChestnutBoolean(True)
-        return ChestnutBoolean(False)
+            return CHESTNUT_TRUE
+        return CHESTNUT_FALSE
 
 class ChestnutSocket(ChestnutAny):
     def __init__(self, sock):
-        self.token = ChestnutNull(null)
+        self.token = CHESTNUT_NULL
         self.sock = sock
 
+
+class FNV1a:
+    """
+        The 64-bit FNV-1a hash, with the methods of a hashlib hash so a
+        Hasher can run it like one.
+    """
+    name = "fnv1a"
+    digest_size = 8
+    OFFSET_BASIS = 14695981039346656037
+    PRIME = 1099511628211
+
+    def __init__(self):
+        self.hash = self.OFFSET_BASIS
+
+    def update(self, data):
+        h = self.hash
+        prime = self.PRIME
+        for byte in data:
+            h = ((h ^ byte) * prime) & 0xFFFFFFFFFFFFFFFF
+        self.hash = h
+
+    def digest(self):
+        return self.hash.to_bytes(8, "big")
+
+    def hexdigest(self):
+        return self.digest().hex()
+
+    def copy(self):
+        copied = FNV1a()
+        copied.hash = self.hash
+        return copied
+
+HASH_ALGORITHMS = {
+    "md5": hashlib.md5,
+    "sha1": hashlib.sha1,
+    "sha256": hashlib.sha256,
+    "sha512": hashlib.sha512,
+    "blake2b": hashlib.blake2b,
+    "blake2s": hashlib.blake2s,
+    "fnv1a": FNV1a,
+}
+
+class ChestnutHasher(ChestnutAny):
+    """
+        A running hash of everything given to update(), by one of the
+        HASH_ALGORITHMS. Files are hashed a chunk at a time through one
+        buffer, so hashing a file takes the same memory whatever its size.
+    """
+    CHUNK_SIZE = 1 << 20
+
+    def __init__(self, algorithm):
+        if algorithm not in HASH_ALGORITHMS:
+            raise RuntimeException(f"Unknown hash algorithm '{algorithm}'")
+        self.token = None
+        self.algorithm = algorithm
+        self.value = HASH_ALGORITHMS[algorithm]()
+
+    def gettype(self):
+        return "Hasher"
+
+    def __str__(self):
+        return f"Hasher({self.algorithm})"
+
+    def __repr__(self):
+        return f"ChestnutHasher(<{self.algorithm}>)"
+
+    def update(self, data):
+        if isinstance(data, ChestnutString):
+            self.value.update(data.value.encode("utf-8"))
+        elif isinstance(data, ChestnutBytes):
+            self.value.update(data.buffer())
+        elif isinstance(data, ChestnutTypedList) and data.items is None and data.typecode == "B":
+            self.value.update(data.array)
+        elif isinstance(data, ChestnutList):
+            self.value.update(ChestnutBytes(data).array)
+        elif isinstance(data, ChestnutFileHandle):
+            self.update_file(data.value)
+        else:
+            raise TypeException(f"Can't hash {data.gettype() if isinstance(data, ChestnutAny) else data}")
+
+    def update_file(self, file_object):
+        # Hashes the rest of an open file.
+        if "b" not in file_object.mode:
+            for chunk in iter(lambda: file_object.read(self.CHUNK_SIZE), ""):
+                self.value.update(chunk.encode("utf-8"))
+            return
+        chunk = bytearray(self.CHUNK_SIZE)
+        view = memoryview(chunk)
+        size = file_object.readinto(chunk)
+        while size:
+            self.value.update(view[:size])
+            size = file_object.readinto(chunk)
+
+    def digest(self):
+        return ChestnutBytes(bytearray(self.value.digest()))
+
+    def hexdigest(self):
+        return ChestnutString(self.value.hexdigest())
+
+    def copy(self):
+        copied = ChestnutHasher(self.algorithm)
+        copied.value = self.value.copy()
+        return copied
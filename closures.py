@@ -0,0 +1,463 @@
+from bytecode import LITERAL_TYPES, UNARY_OPERATIONS
+from evaluator import *
+
+# Statement closures return None to fall through to the next statement, or
+# the Signal of the break, continue or return that ends their block.
+
+def run_block(statements):
+    for statement in statements:
+        signal = statement()
+        if signal is not None:
+            return signal
+    return None
+
+def binary_closure(op_label, handler, left, right):
+    # and/or only run their right operand when the left one doesn't decide
+    # the result.
+    if op_label == "And":
+        return lambda: left() and right()
+    if op_label == "Or":
+        return lambda: left() or right()
+    # Specialise the common operators so they don't go through the handler.
+    if op_label == "Addition":
+        return lambda: left() + right()
+    if op_label == "Subtraction":
+        return lambda: left() - right()
+    if op_label == "Multiplication":
+        return lambda: left() * right()
+    if op_label == "Modulo":
+        return lambda: left() % right()
+    if op_label == "Eq":
+        return lambda: left() == right()
+    if op_label == "Neq":
+        return lambda: left() != right()
+    if op_label == "Lt":
+        return lambda: left() < right()
+    if op_label == "Lte":
+        return lambda: left() <= right()
+    if op_label == "Gt":
+        return lambda: left() > right()
+    if op_label == "Gte":
+        return lambda: left() >= right()
+    if op_label == "BitwiseAnd":
+        return lambda: left() & right()
+    if op_label == "BitwiseOr":
+        return lambda: left() | right()
+    if op_label == "BitwiseXor":
+        return lambda: left() ^ right()
+    if op_label == "BitwiseShiftLeft":
+        return lambda: left() << right()
+    if op_label == "BitwiseShiftRight":
+        return lambda: left() >> right()
+    return lambda: handler(left(), right())
+
+class ClosureCompiler:
+    """
+        Converts function bodies into nested Python closures. Operator
+        selection, child lookups and literal values are resolved once here,
+        so running a body calls closures directly instead of dispatching
+        through Evaluator.evaluate. Nodes without a specialised closure keep
+        the tree-walking semantics by calling back into the evaluator.
+    """
+
+    def __init__(self, evaluator):
+        self.evaluator = evaluator
+
+    def compile_function(self, statement):
+        body = [ self.statement(s) for s in statement.statements ]
+        def run_function():
+            return run_block(body)
+        return run_function
+
+    def statement(self, node):
+        method = self.statement_dispatch.get(node.__class__)
+        if method is None:
+            return self.execute(node)
+        return method(self, node)
+
+    def expression(self, node):
+        ev = self.evaluator
+        if node.__class__ in LITERAL_TYPES:
+            value = ev.dispatch[node.__class__](node)
+            return lambda: value
+        if isinstance(node, Token) and node.label == "Identifier":
+            return self.identifier(node)
+        method = self.expression_dispatch.get(node.__class__)
+        if method is None:
+            return lambda: ev.evaluate(node)
+        return method(self, node)
+
+    def execute(self, node):
+        evaluate = self.evaluator.evaluate
+        def run():
+            signal = evaluate(node)
+            if isinstance(signal, Signal):
+                return signal
+        return run
+
+    def block(self, statements):
+        ev = self.evaluator
+        body = [ self.statement(s) for s in statements ]
+        def run():
+            ev.push_scope()
+            signal = run_block(body)
+            if signal is not None:
+                # Scopes are unwound by the loop or call that handles it.
+                return signal
+            ev.pop_scope()
+        return run
+
+    def identifier(self, node):
+        label = node.data
+        scopes = self.evaluator.scopes
+        def load():
+            for scope in reversed(scopes):
+                if label in scope:
+                    value = scope[label]
+                    if isinstance(value, BringVariable):
+                        return value.__getitem__(None)
+                    return value
+            raise Exception(f"Couldn't find symbol {label} at line {node.line}, column {node.column}")
+        if node.address is None:
+            return load
+        alias_names = self.evaluator.alias_names
+        index = -1 - node.address
+        def load_address():
+            if label in alias_names:
+                return load()
+            value = scopes[index][label]
+            if isinstance(value, BringVariable):
+                return value.__getitem__(None)
+            return value
+        return load_address
+
+    def statement_ExpressionStatementNode(self, node):
+        expression = self.expression(node.expression)
+        def run():
+            expression()
+        return run
+
+    def statement_LetStatementNode(self, node):
+        ev = self.evaluator
+        expression = self.expression(node.expression)
+        def run():
+            labels = ev.let_labels(node)
+            ev.bind_let(labels, expression())
+        return run
+
+    def statement_ConstantStatementNode(self, node):
+        ev = self.evaluator
+        expression = self.expression(node.expression)
+        def run():
+            labels = ev.constant_labels(node)
+            ev.bind_constant(labels, expression())
+        return run
+
+    def statement_ShadowStatementNode(self, node):
+        ev = self.evaluator
+        expression = self.expression(node.expression)
+        def run():
+            labels = ev.shadow_labels(node)
+            ev.bind_shadow(labels, expression())
+        return run
+
+    def statement_AssignStatementNode(self, node):
+        ev = self.evaluator
+        expression = self.expression(node.expression)
+        def run():
+            scope = ev.assignment_scope(node)
+            ev.bind_assignment(node, scope, expression())
+        return run
+
+    def statement_ReturnStatementNode(self, node):
+        try:
+            returns_value = self.evaluator.returns_value(node)
+        except Exception:
+            # Let the evaluator raise the same error when the return runs.
+            return self.execute(node)
+        if not returns_value:
+            return lambda: ReturnValue(None)
+        if isinstance(node.expression, CallStatementNode) and node.expression.tail:
+            return self.call(node.expression, TailCall)
+        expression = self.expression(node.expression)
+        return lambda: ReturnValue(expression())
+
+    def statement_BreakStatementNode(self, node):
+        return lambda: BREAK_LOOP
+
+    def statement_ContinueStatementNode(self, node):
+        return lambda: CONTINUE_LOOP
+
+    def statement_IfStatementNode(self, node):
+        branches = [(self.expression(node.condition_expression), self.block(node.block_statements))]
+        for elif_block in node.elif_blocks:
+            branches.append((self.expression(elif_block.condition_expression), self.block(elif_block.block_statements)))
+        otherwise = None
+        if node.else_block:
+            otherwise = self.block(node.else_block.block_statements)
+        def run():
+            for condition, block in branches:
+                if condition():
+                    return block()
+            if otherwise is not None:
+                return otherwise()
+        return run
+
+    def statement_CaseStatementNode(self, node):
+        subject_expression = self.expression(node.subject)
+        whens = []
+        for when_block in node.when_blocks:
+            conditions = [ self.expression(c) for c in when_block.conditions ]
+            whens.append((conditions, self.block(when_block.statements)))
+        otherwise = None
+        if node.otherwise:
+            otherwise = self.block(node.otherwise.statements)
+        def run():
+            subject = subject_expression()
+            for conditions, block in whens:
+                for condition in conditions:
+                    if subject == condition():
+                        return block()
+            if otherwise is not None:
+                return otherwise()
+        return run
+
+    def loop_body(self, statements):
+        body = [ self.statement(s) for s in statements ]
+        def run_pass():
+            for statement in body:
+                signal = statement()
+                if signal is not None:
+                    return signal
+            return None
+        return run_pass
+
+    def statement_WhileStatementNode(self, node):
+        ev = self.evaluator
+        scopes = ev.scopes
+        condition = self.expression(node.condition)
+        run_pass = self.loop_body(node.statements)
+        reuse_scope = node.reuse_scope
+        def run():
+            ev.push_scope()
+            loop = LoopState(scopes[-1], reuse_scope)
+            base_loop_scopes = len(scopes)
+            while condition():
+                ev.push_pass_scope(loop)
+                signal = run_pass()
+                if signal is None:
+                    ev.pop_scope()
+                elif signal is BREAK_LOOP:
+                    del scopes[base_loop_scopes:]
+                    break
+                elif signal is CONTINUE_LOOP:
+                    del scopes[base_loop_scopes:]
+                else:
+                    return signal
+                loop.index += 1
+            ev.pop_scope()
+            del loop.root["loop index"]
+        return run
+
+    def statement_UntilStatementNode(self, node):
+        ev = self.evaluator
+        scopes = ev.scopes
+        condition = self.expression(node.condition)
+        run_pass = self.loop_body(node.statements)
+        reuse_scope = node.reuse_scope
+        def run():
+            ev.push_scope()
+            loop = LoopState(scopes[-1], reuse_scope)
+            base_loop_scopes = len(scopes)
+            while loop.index == 0 or not condition():
+                ev.push_pass_scope(loop)
+                signal = run_pass()
+                if signal is None:
+                    ev.pop_scope()
+                elif signal is BREAK_LOOP:
+                    del scopes[base_loop_scopes:]
+                    break
+                elif signal is CONTINUE_LOOP:
+                    del scopes[base_loop_scopes:]
+                else:
+                    return signal
+                loop.index += 1
+            ev.pop_scope()
+            del loop.root["loop index"]
+        return run
+
+    def statement_LoopStatementNode(self, node):
+        ev = self.evaluator
+        scopes = ev.scopes
+        run_pass = self.loop_body(node.statements)
+        reuse_scope = node.reuse_scope
+        def run():
+            ev.push_scope()
+            loop = LoopState(scopes[-1], reuse_scope)
+            base_loop_scopes = len(scopes)
+            while True:
+                ev.push_pass_scope(loop)
+                signal = run_pass()
+                if signal is None:
+                    ev.pop_scope()
+                elif signal is BREAK_LOOP:
+                    del scopes[base_loop_scopes:]
+                    break
+                elif signal is CONTINUE_LOOP:
+                    del scopes[base_loop_scopes:]
+                else:
+                    return signal
+                loop.index += 1
+            ev.pop_scope()
+            del loop.root["loop index"]
+        return run
+
+    def statement_ForStatementNode(self, node):
+        ev = self.evaluator
+        scopes = ev.scopes
+        subject_expression = self.expression(node.subject)
+        label = node.identifier.data
+        run_pass = self.loop_body(node.statements)
+        reuse_scope = node.reuse_scope
+        def run():
+            ev.push_scope()
+            subject = subject_expression()
+            loop = LoopState(scopes[-1], reuse_scope)
+            base_loop_scopes = len(scopes)
+            for elem in subject:
+                ev.push_pass_scope(loop)
+                scopes[-1][label] = elem
+                signal = run_pass()
+                if signal is None:
+                    ev.pop_scope()
+                elif signal is BREAK_LOOP:
+                    del scopes[base_loop_scopes:]
+                    break
+                elif signal is CONTINUE_LOOP:
+                    del scopes[base_loop_scopes:]
+                else:
+                    return signal
+                loop.index += 1
+            ev.pop_scope()
+            del loop.root["loop index"]
+        return run
+
+    def expression_LoopindexExpressionNode(self, node):
+        ev = self.evaluator
+        if node.address is None:
+            return lambda: ev.evaluate(node)
+        scopes = ev.scopes
+        index = -1 - node.address
+        return lambda: ChestnutInteger(scopes[index]["loop index"].index)
+
+    def expression_BinaryOperationNode(self, node):
+        handler = self.evaluator.binary_handlers.get(node.op.label)
+        if handler is None:
+            evaluate = self.evaluator.evaluate
+            return lambda: evaluate(node)
+        return binary_closure(node.op.label, handler, self.expression(node.left), self.expression(node.right))
+
+    def expression_UnaryOperationNode(self, node):
+        operation = UNARY_OPERATIONS.get(node.op.label)
+        if operation is None:
+            # outer and unshadow inspect the scopes rather than a value.
+            evaluate = self.evaluator.evaluate
+            return lambda: evaluate(node)
+        right = self.expression(node.right)
+        return lambda: operation(right())
+
+    def expression_TernaryExpressionNode(self, node):
+        condition = self.expression(node.condition)
+        left = self.expression(node.left)
+        right = self.expression(node.right)
+        return lambda: left() if condition() else right()
+
+    def expression_UseExpressionNode(self, node):
+        left = self.expression(node.left)
+        right = self.expression(node.right)
+        if node.condition is not None:
+            condition = self.expression(node.condition)
+            return lambda: right() if condition() else left()
+        def use():
+            value = left()
+            if isinstance(value, ChestnutNull):
+                return right()
+            return value
+        return use
+
+    def expression_ListLiteralNode(self, node):
+        elements = [ self.expression(x) for x in node.elements ]
+        return lambda: ChestnutList([ element() for element in elements ])
+
+    def expression_TupleLiteralNode(self, node):
+        elements = [ self.expression(x) for x in node.elements ]
+        return lambda: ChestnutTuple(tuple([ element() for element in elements ]))
+
+    def expression_MapLiteralNode(self, node):
+        pairs = [ (self.expression(k), self.expression(v)) for k, v in zip(node.keys, node.values) ]
+        return lambda: ChestnutMap([ (key(), value()) for key, value in pairs ])
+
+    def expression_IndexAccessNode(self, node):
+        index_value = self.evaluator.index_value
+        target = self.expression(node.target)
+        index = self.expression(node.index)
+        def access():
+            target_value = target()
+            return index_value(target_value, index())
+        return access
+
+    def expression_CallStatementNode(self, node):
+        return self.call(node, self.evaluator.invoke)
+
+    def call(self, node, make_call):
+        """
+            Returns a closure evaluating the callee and arguments of a call
+            and passing them to make_call, which is invoke or TailCall.
+        """
+        ev = self.evaluator
+        callee = self.expression(node.identifier)
+        params = [ self.expression(p) for p in node.params ]
+        def call():
+            ev.enter_call()
+            callable = callee()
+            finalized_args = []
+            for param in params:
+                evaluated_value = param()
+                if isinstance(evaluated_value, SpreadArgs):
+                    finalized_args.extend(evaluated_value.args)
+                else:
+                    finalized_args.append(evaluated_value)
+            return make_call(node, callable, finalized_args)
+        return call
+
+def build_dispatch_table(compiler_class, prefix):
+    # Bind every <prefix><ClassName> method to its node class once, as the
+    # Evaluator does its visitors, so compiling a node is one dict lookup.
+    dispatch = {}
+    for attr in dir(compiler_class):
+        if not attr.startswith(prefix):
+            continue
+        node_class = globals().get(attr[len(prefix):])
+        if isinstance(node_class, type):
+            dispatch[node_class] = getattr(compiler_class, attr)
+    return dispatch
+
+ClosureCompiler.statement_dispatch = build_dispatch_table(ClosureCompiler, "statement_")
+ClosureCompiler.expression_dispatch = build_dispatch_table(ClosureCompiler, "expression_")
+
+class ClosureEvaluator(Evaluator):
+    """
+        Runs function bodies as closures built by the ClosureCompiler. The
+        rest of the Evaluator, including the call protocol, is unchanged.
+    """
+
+    def __init__(self):
+        self.compiled_functions = {}
+        super().__init__()
+
+    def run_function_body(self, func):
+        body = self.compiled_functions.get(func.statement)
+        if body is None:
+            body = ClosureCompiler(self).compile_function(func.statement)
+            self.compiled_functions[func.statement] = body
+        return body()
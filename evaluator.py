@@ -3,45 +3,42 @@ from chestnut_types import *
 from error import *
 from token_types import *
 from lexer import lex
+from analyzer import Analyzer
 from math import floor
 import copy
 import os
+import sys
+import types
 
 _VMS = []
+
+# Python frames a Chestnut call can take on the host stack, for sizing the
+# recursion limit to the maximum call depth.
+PYTHON_FRAMES_PER_CALL = 50
 def get_current_vm():
     return _VMS[0]
 
-def generate_struct_init(properties):
+def generate_struct_init(fields):
     def struct_instance_init(self, *args):
         if args:
             raise TypeError(f"Struct constructor takes 0 positional arguments.")
         ChestnutStruct.__init__(self, CHESTNUT_NULL)
-        i = 0
-        statics = []
-        publics = []
-        privates = []
-        for i, prop in enumerate(properties):
-            keys = prop.attributes.keys()
-            default_value = CHESTNUT_NULL
-            if "default" in keys:
-                default_value = prop.attributes.get("default")
-            if "visibility" in keys and prop.attributes.get("visibility").data == "private":
-                privates.append(prop.identifier.data)
-            else:
-                publics.append(prop.identifier.data)
-            if "static" in keys:
-                statics.append(prop.identifier.data)
-                setattr(self.__struct_node__, "__static__" + prop.identifier.data, default_value)
-                continue
-            setattr(self, prop.identifier.data, default_value)
-        setattr(self, "static", statics)
-        setattr(self, "publics", publics)
-        setattr(self, "privates", privates)
+        for name, default_value in fields:
+            setattr(self, name, default_value)
     return struct_instance_init
 
 class FunctionRegister:
     def __init__(self):
         self.functions = {}
+        # Overload resolution results keyed by function name, then by the
+        # receiver and the tuple of runtime argument classes.
+        self.resolution_cache = {}
+        self.cache_generation = TYPE_GENERATION
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def cache_stats(self):
+        return {"hits": self.cache_hits, "misses": self.cache_misses}
 
     def is_registered(self, name):
         return name in self.functions
@@ -55,6 +52,8 @@ class FunctionRegister:
         if not fname in self.functions:
             self.functions[fname] = {"candidates": []}
         registry = self.functions[fname]
+        self.resolution_cache.pop(fname, None)
+        definitions_changed()
 
         for candidate in registry["candidates"]:
             if candidate.statement.mangled_key == func.statement.mangled_key:
@@ -67,6 +66,25 @@ class FunctionRegister:
         if name not in self.functions:
             return None
 
+        if self.cache_generation != TYPE_GENERATION:
+            # A struct type was (re)defined, so type names may resolve differently.
+            self.resolution_cache.clear()
+            self.cache_generation = TYPE_GENERATION
+
+        cache = self.resolution_cache.get(name)
+        if cache is None:
+            cache = self.resolution_cache[name] = {}
+        key = (inst, tuple([arg.__class__ for arg in call_parameters]))
+        if key in cache:
+            self.cache_hits += 1
+            return cache[key]
+
+        self.cache_misses += 1
+        candidate = self.score_candidates(name, call_parameters, inst)
+        cache[key] = candidate
+        return candidate
+
+    def score_candidates(self, name, call_parameters, inst):
         call_params = call_parameters
         num_call_params = len(call_params)
 
@@ -114,7 +132,7 @@ class FunctionRegister:
             
             for i in range(min(num_call_params, num_fixed_params)):
                 param = candidate_params[i]
-                expected_type = TYPE_MAPPING[param.paramtype.data] if param.paramtype.data in TYPE_MAPPING else eval(param.paramtype.data)
+                expected_type = resolve_type_name(param.paramtype)
                 runtime_arg = call_params[i]
                 inheritance_mapping = {}
                 if isinstance(runtime_arg, ChestnutStruct):
@@ -135,7 +153,7 @@ class FunctionRegister:
 
             if is_variadic_func and num_call_params > num_fixed_params:
                 variadic_param = candidate_params[-1]
-                variadic_type = TYPE_MAPPING[variadic_param.paramtype.data] if variadic_param.paramtype.data in TYPE_MAPPING else eval(variadic_param.paramtype.data)
+                variadic_type = resolve_type_name(variadic_param.paramtype)
                 
                 for i in range(num_fixed_params, num_call_params):
                     runtime_arg = call_params[i]
@@ -219,6 +237,16 @@ class StructNode:
     def __init__(self, definition):
         self.definition = definition
         self.function_register = FunctionRegister()
+        self.struct_class = None
+        self.statics = []
+        self.publics = []
+        self.privates = []
+        self.fields = []
+        self.inheritance_mapping = {}
+        self.derived_structs = []
+        self.mro = None
+        # Maps a method name to the structs along the MRO that define it.
+        self.method_table = {}
 
         params = []
         for param in  self.definition.properties:
@@ -226,9 +254,60 @@ class StructNode:
 
     def get_name(self):
         return self.definition.identifier.data
-        
-    def constructor(self, *args):
+
+    def set_inheritance(self, inheritance_mapping):
+        self.inheritance_mapping = inheritance_mapping
+        for ancestor in inheritance_mapping.values():
+            ancestor.derived_structs.append(self)
+
+    def method_resolution_order(self):
+        """
+            Returns this struct followed by its ancestors in breadth-first
+            order of their inherits clauses, each struct appearing once.
+        """
+        if self.mro is None:
+            mro = []
+            pending = [self]
+            while len(pending) > 0:
+                struct_node = pending.pop(0)
+                if struct_node in mro:
+                    continue
+                mro.append(struct_node)
+                for parent in struct_node.definition.inherits:
+                    pending.append(self.inheritance_mapping[parent.data])
+            self.mro = mro
+        return self.mro
+
+    def find_method_owners(self, method_name):
+        owners = self.method_table.get(method_name)
+        if owners is None:
+            owners = [ n for n in self.method_resolution_order() if method_name in n.function_register.functions ]
+            self.method_table[method_name] = owners
+        return owners
+
+    def invalidate_methods(self):
+        # A method was registered on this struct, so it and every struct
+        # inheriting from it may now resolve the method differently.
+        self.method_table.clear()
+        for derived in self.derived_structs:
+            derived.method_table.clear()
+
+    def build_struct_class(self):
+        """
+            Builds the Python class backing instances of this struct. This runs
+            once per struct definition; every constructor call reuses it.
+        """
         name = self.definition.identifier.data
+        properties = self.definition.properties
+        native_class = NATIVE_STRUCT_TYPES.get(name)
+        if native_class is not None:
+            # The struct only adds methods to a type the bridge makes values
+            # of, so those values are its instances.
+            if len(properties) > 0:
+                raise SyntaxException(f"Struct {name} can't declare properties, its values are made natively", self.definition.identifier)
+            native_class.__struct_node__ = self
+            self.struct_class = native_class
+            return native_class
         def custom_str(instance):
             ev = get_current_vm()
             node = instance.__struct_node__
@@ -246,16 +325,44 @@ class StructNode:
                     ev.pop_scope()
                 return str(result)
             return f"[WARN] No 'to_string()' method has been defined for struct '{name}'"
-        properties = self.definition.properties
-        struct_class = type(name, (ChestnutStruct,), {
+
+        # Visibility and static metadata is shared by every instance, so it
+        # lives on the struct node. Only instance fields get a slot.
+        self.statics = []
+        self.publics = []
+        self.privates = []
+        self.fields = []
+        for prop in properties:
+            prop_name = prop.identifier.data
+            default_value = prop.attributes.get("default", CHESTNUT_NULL)
+            visibility = prop.attributes.get("visibility")
+            if visibility is not None and visibility.data == "private":
+                self.privates.append(prop_name)
+            else:
+                self.publics.append(prop_name)
+            if "static" in prop.attributes:
+                self.statics.append(prop_name)
+                setattr(self, "__static__" + prop_name, default_value)
+                continue
+            self.fields.append((prop_name, default_value))
+
+        base_slots = ChestnutAny.__slots__
+        slots = tuple(n for n, _ in self.fields if n not in base_slots)
+
+        self.struct_class = type(name, (ChestnutStruct,), {
+            "__slots__": slots,
             "__repr__": lambda self: name + "(" + str(properties) + ")",
-            "__str__": lambda self: custom_str(self),
-            "__init__": generate_struct_init(properties),
+            "__str__": custom_str,
+            "__init__": generate_struct_init(tuple(self.fields)),
             "gettype": lambda self: name,
             "__struct_node__": self
         })
-        struct_instance = struct_class(*args)
-        return struct_instance
+        return self.struct_class
+
+    def constructor(self, *args):
+        if self.struct_class is None:
+            self.build_struct_class()
+        return self.struct_class(*args)
 
 class StructMethodCall:
     def __init__(self, instance, func_object):
@@ -389,6 +496,10 @@ TYPE_MAPPING = {
     "String": ChestnutString,
     "Boolean": ChestnutBoolean,
     "List": ChestnutList,
+    "Range": ChestnutRange,
+    "Bytes": ChestnutBytes,
+    "Hasher": ChestnutHasher,
+    "Map": ChestnutMap,
     "Tuple": ChestnutTuple,
     "Error": ChestnutError,
     "Struct": ChestnutStruct,
@@ -397,6 +508,89 @@ TYPE_MAPPING = {
     "Socket": ChestnutSocket
 }
 
+# Native types a struct of the same name declares methods for, like Bytes in
+# lib/core.nuts, instead of defining a new type.
+NATIVE_STRUCT_TYPES = {
+    "Bytes": ChestnutBytes,
+    "Hasher": ChestnutHasher,
+    "Map": ChestnutMap,
+}
+
+# Bumped whenever TYPE_MAPPING changes so cached overload resolutions are dropped.
+TYPE_GENERATION = 0
+
+# Bumped whenever a type, function or method is defined, so inline caches
+# filled before it resolve again.
+DEFINITION_GENERATION = 0
+
+def definitions_changed():
+    global DEFINITION_GENERATION
+    DEFINITION_GENERATION += 1
+
+def register_type(label, type_class):
+    global TYPE_GENERATION
+    TYPE_MAPPING[label] = type_class
+    TYPE_GENERATION += 1
+    definitions_changed()
+
+# Kinds of InlineCache entries for property accesses.
+CACHED_SLOT = "slot"
+CACHED_METHOD = "method"
+
+# Binary operations that skip their right operand when the left one is
+# truthy (True) or falsy (False), and result in the left operand then.
+SHORT_CIRCUIT_OPERATIONS = {
+    "And": False,
+    "Or": True,
+}
+
+class InlineCache:
+    """
+        What a property access, property assignment or call site resolved
+        to, kept on its node for each of the first few receivers it saw: the
+        receiver's class, or for calls the receiver class, name and argument
+        classes. Entries are used until anything is defined, which empties
+        the cache. A site that sees more receivers than the cache has room
+        for is megamorphic: the receivers it has entries for keep hitting
+        and any other takes the slow path every time, so the memory a cache
+        takes stays fixed however long a program runs.
+    """
+    __slots__ = ("entries", "size", "generation", "megamorphic")
+
+    def __init__(self, size):
+        self.entries = {}
+        self.size = size
+        self.generation = DEFINITION_GENERATION
+        self.megamorphic = False
+
+    def get(self, receiver):
+        if self.generation != DEFINITION_GENERATION:
+            return None
+        return self.entries.get(receiver)
+
+    def fill(self, receiver, entry):
+        if self.generation != DEFINITION_GENERATION:
+            self.entries = {}
+            self.generation = DEFINITION_GENERATION
+            self.megamorphic = False
+        if len(self.entries) < self.size:
+            self.entries[receiver] = entry
+        else:
+            self.megamorphic = True
+
+    def __reduce__(self):
+        # Entries refer to runtime classes and functions, so a pickled syntax
+        # tree, like the transpiler's, starts out with an empty cache.
+        return (InlineCache, (self.size,))
+
+def resolve_type_name(type_token):
+    type_name = type_token.data
+    if type_name in TYPE_MAPPING:
+        return TYPE_MAPPING[type_name]
+    if type_name in INTERNAL_TYPES:
+        return INTERNAL_TYPES[type_name]
+    raise TypeException(f"Unknown type {type_name}", type_token)
+
 class SpreadArgs(ChestnutAny):
     def __init__(self, args):
         self.token = Token("Null", ChestnutNull, None, None)
@@ -411,30 +605,120 @@ class SpreadArgs(ChestnutAny):
     def __getitem__(self, index):
         return self.args[index]
 
-class ReturnValue(BaseException):
+class Signal:
+    """
+        The completion of a statement that leaves its block early. Statements
+        return one to the block running them; any other result, usually None,
+        means they completed normally and the next statement runs.
+    """
+    __slots__ = ()
+
+class ReturnValue(Signal):
+    __slots__ = ("value",)
+
     def __init__(self, value):
         self.value = value
 
-class BasicControlFlow(BaseException):
-    def __init__(self, ast_node):
-        self.ast_node = ast_node
+    def __repr__(self):
+        return f"ReturnValue(<{self.value}>)"
+
+class LoopSignal(Signal):
+    __slots__ = ("name",)
 
-    def gettype(self):
-        return "BasicControlFlow"
+    def __init__(self, name):
+        self.name = name
 
     def __repr__(self):
-        return f"BasicControlFlow(<{self.ast_node}>)"
+        return f"LoopSignal(<{self.name}>)"
 
-class BreakLoop(BasicControlFlow):
-    def gettype(self):
-        return "BreakLoop"
+class TailCall(Signal):
+    """
+        Ends a function body with the call of a `return f(...)` statement the
+        Analyzer found in tail position. The callable and arguments are
+        already evaluated and the call depth raised; run_frame makes the call.
+    """
+    __slots__ = ("node", "callable", "args")
 
-class ContinueLoop(BasicControlFlow):
-    def gettype(self):
-        return "Continue"
+    def __init__(self, node, callable, args):
+        self.node = node
+        self.callable = callable
+        self.args = args
+
+    def __repr__(self):
+        return f"TailCall(<{self.node}>)"
+
+BREAK_LOOP = LoopSignal("break")
+CONTINUE_LOOP = LoopSignal("continue")
+
+# Markers pushed below the captured scopes of a call. Lookups that must not
+# see the caller's scopes stop at a call boundary; bridge functions like
+# print don't get one. They are never written to, so every call shares them.
+CALL_BOUNDARY = {"call boundary": True}
+BRIDGE_BOUNDARY = {"Chestnut-bridge": True}
+
+# The key of the set of names a scope binds with `constant`. Constness
+# belongs to the binding rather than the value, since values such as small
+# integers and booleans are shared.
+CONSTANT_NAMES = "constant names"
+
+class Frame:
+    """
+        The activation record of one call to a Chestnut function. A tail call
+        may replace it with the callee's Frame, which then takes over its base
+        and depth, so call_depth counts the frames that are still live rather
+        than every call that was made.
+    """
+    __slots__ = ("function", "locals", "parent", "base", "depth", "returned")
+
+    def __init__(self, function, base, depth):
+        self.function = function
+        # The scope parameters and the receiver are bound in.
+        self.locals = {}
+        # The scopes captured where the function was defined.
+        self.parent = function.scopes
+        # Length of the scope stack to unwind to when the call ends.
+        self.base = base
+        self.depth = depth
+        self.returned = CHESTNUT_NULL
+
+class LoopState:
+    """
+        A running loop. Its root scope maps "loop index" to the LoopState,
+        which counts passes in a native int that loop_index boxes only when
+        it is read. Loops the Analyzer marked get a single pass scope that is
+        cleared and pushed again for every pass.
+    """
+    __slots__ = ("index", "root", "pass_scope")
+
+    def __init__(self, root, reuse_scope):
+        self.index = 0
+        self.root = root
+        self.pass_scope = {} if reuse_scope else None
+        root["loop index"] = self
+
+class RecursionLimit:
+    """
+        Raises Python's recursion limit to what an evaluator needs while the
+        block runs, and restores it after.
+    """
+
+    def __init__(self, evaluator):
+        self.evaluator = evaluator
+
+    def __enter__(self):
+        self.saved = sys.getrecursionlimit()
+        sys.setrecursionlimit(max(self.saved, self.evaluator.python_recursion_limit()))
+        return self
+
+    def __exit__(self, *exc):
+        sys.setrecursionlimit(self.saved)
 
 class Evaluator:
     _active_Evaluator = None
+    DEFAULT_MAX_CALL_DEPTH = 1000
+    # Receivers each property access, property assignment and call site
+    # keeps inline cache entries for.
+    INLINE_CACHE_SIZE = 4
 
     @classmethod
     def get_current(cls):
@@ -454,7 +738,8 @@ class Evaluator:
             if varargs:
                 core_spec[mod]["varargs"] = varargs
         return core_spec
-    def resolve_module_path(self, script_name):
+    @staticmethod
+    def resolve_module_path(script_name):
         if isinstance(script_name, ChestnutString):
             script_name = script_name.value
         has_nuts = script_name.lower().endswith(".nuts")
@@ -474,19 +759,55 @@ class Evaluator:
             raise InternalException(f"Module at path {script_name} does not exist")
         return f"{dir_path}{os.sep}{script_name}"
 
-    def eval_library(self, path):
-        with open(self.resolve_module_path(path)) as new_import:
-            tokens = lex("".join(new_import.readlines()), self.resolve_module_path(path))
+    def load_module(self, path):
+        """
+            Parses the module at a path returned by resolve_module_path.
+        """
+        with open(path) as new_import:
+            tokens = lex("".join(new_import.readlines()), path)
             parser = Parser(tokens)
             ast = parser.parse_program()
-            for node in ast:
-                setattr(node, "Chestnut-bridge", True)
-                self.evaluate(node)
+        analyzer = Analyzer()
+        for node in ast:
+            analyzer.analyze(node)
+        return ast
+
+    def eval_library(self, path):
+        ast = self.load_module(self.resolve_module_path(path))
+        for node in ast:
+            setattr(node, "Chestnut-bridge", True)
+            self.evaluate(node)
 
     def __init__(self):
+        # Register this evaluator as the active VM for struct __str__ hooks.
+        _VMS.clear()
+        _VMS.append(self)
+        Evaluator._active_Evaluator = self
+        self.dispatch = self.build_dispatch_table()
+        self.binary_handlers = self.build_handler_table("_handle_binary_")
+        self.unary_handlers = self.build_handler_table("_handle_unary_")
+        self.assign_handlers = self.build_handler_table("_handle_assign_")
+        self.index_handlers = self.build_handler_table("_handle_index_")
+        self.property_handlers = self.build_handler_table("_handle_prop_")
         self.function_register = FunctionRegister()
         self.calling_builtin = False
-        self.expression_cache = {}
+        self.call_depth = 0
+        # Counts for the inline caches of property accesses and call sites.
+        self.property_cache_hits = 0
+        self.property_cache_misses = 0
+        self.call_cache_hits = 0
+        self.call_cache_misses = 0
+        # "Type method" keys of struct methods defined outside the global
+        # scope. Inline caches skip accesses that may resolve to them.
+        self.scoped_methods = set()
+        self.set_max_call_depth(self.DEFAULT_MAX_CALL_DEPTH)
+        # Names functions declared with `on ... with` bind in the caller's
+        # scope when matched. They may hide a statically resolved variable.
+        self.alias_names = set()
+        # Names some defined function may look up in its callers' scopes. A
+        # frame binding one of them can't be replaced by a tail call.
+        self.dynamic_names = set()
+        self.tail_calls = True
         core_spec = self.get_core_spec()
         native_funcs = {}
         self.scopes = [{}]
@@ -529,17 +850,50 @@ class Evaluator:
         return var_name in self.scopes[-1] and not "call boundary" in self.scopes[-1]
 
     def exists_in_parent_scope(self, var_name):
-        for scope in reversed(self.scopes[:-1]):
+        scopes = self.scopes
+        for i in range(len(scopes) - 2, -1, -1):
+            scope = scopes[i]
             if "call boundary" in scope:
                 break
             if var_name in scope:
                 return True
-        if var_name in self.scopes[0]:
+        if var_name in scopes[0]:
             return True
         return False
 
+    def assignable_scope(self, var_name):
+        """
+            Returns the scope an assignment to var_name writes to in a single
+            walk, or None if it isn't declared in the current call or globally.
+        """
+        scopes = self.scopes
+        visible = True
+        for i in range(len(scopes) - 1, -1, -1):
+            scope = scopes[i]
+            if var_name in scope:
+                if visible or var_name in scopes[0]:
+                    return scope
+                return None
+            if "call boundary" in scope:
+                visible = False
+        return None
+
+    def addressed_scope(self, node):
+        """
+            Returns the scope the Analyzer resolved an identifier token to, or
+            None if it has to be looked up by name.
+        """
+        address = node.address
+        if address is None or node.data in self.alias_names:
+            return None
+        return self.scopes[-1 - address]
+
     def current_scope(self):
         return self.scopes[-1]
+
+    def is_constant(self, scope, var_name):
+        constants = scope.get(CONSTANT_NAMES)
+        return constants is not None and var_name in constants
     
     def visit_StructFnStatementNode(self, node):
         if not isinstance(node, StructFnStatementNode):
@@ -556,8 +910,14 @@ class Evaluator:
         scope_key = f"{struct_name} {method_name}"
         func_object = Function(node)
         struct_type_object.function_register.register(func_object)
+        struct_type_object.invalidate_methods()
 
+        if self.current_scope() is not self.scopes[0]:
+            # The method is gone once its scope is, which inline caches
+            # can't tell, so accesses to it are never cached.
+            self.scoped_methods.add(scope_key)
         self.current_scope()[scope_key] = func_object
+        self.note_free_names(node)
 
         return 1
 
@@ -628,10 +988,10 @@ class Evaluator:
                 levels = levels - 1
             elif identifier in scope:
                 if scope == closest_scope:
-                    return ChestnutBoolean(False)
+                    return CHESTNUT_FALSE
                 scope[identifier] = closest_scope[identifier]
-                return ChestnutBoolean(True)
-        return ChestnutBoolean(False)
+                return CHESTNUT_TRUE
+        return CHESTNUT_FALSE
 
     def _handle_unary_Outer(self, node):
         levels = 1
@@ -653,8 +1013,10 @@ class Evaluator:
             if identifier in scope and levels > 0:
                 levels = levels - 1
             elif identifier in scope:
+                if isinstance(scope[identifier], LoopState):
+                    return ChestnutInteger(scope[identifier].index)
                 return scope[identifier]
-        return ChestnutNull(Token("Null", "null", 0, 0))
+        return CHESTNUT_NULL
 
     def _handle_unary_Subtraction(self, node):
         right = self.evaluate(node.right)
@@ -672,9 +1034,9 @@ class Evaluator:
         if not isinstance(node, UnaryOperationNode):
             raise InternalException(f"Cannot use {node.__class__.__name__} in visit_UnaryOperationNode", node)
         op = node.op
-        method = f"_handle_unary_{op.label}"
-        if hasattr(self,method):
-            return getattr(self, method)(node)
+        handler = self.unary_handlers.get(op.label)
+        if handler is not None:
+            return handler(node)
         raise RuntimeException(f"Unexpected {op.label} operation '{op.data}'", op)
 
     def visit_ChestnutString(self, node):
@@ -685,14 +1047,10 @@ class Evaluator:
     def visit_ImportStatementNode(self, node):
         if not isinstance(node, ImportStatementNode):
             raise InternalException(f"Cannot use {node.__class__.__name__} in visit_ImportStatementNode", node)
-        import_path = self.resolve_module_path(node.location.data)
-        with open(import_path) as new_import:
-            tokens = lex("".join(new_import.readlines()), self.resolve_module_path(node.location.data))
-            parser = Parser(tokens)
-            ast = parser.parse_program()
-            for n in ast:
-                if len(node.imports) == 0 or n.get_name() in [ x.data for x in node.imports ]:
-                    self.evaluate(n)
+        ast = self.load_module(self.resolve_module_path(node.location.data))
+        for n in ast:
+            if len(node.imports) == 0 or n.get_name() in [ x.data for x in node.imports ]:
+                self.evaluate(n)
 
     def visit_EnumStatementNode(self, node):
         if not isinstance(node, EnumStatementNode):
@@ -754,9 +1112,8 @@ class Evaluator:
         setattr(node, "inherited_prop_names", inherited_prop_names)
 
         struct_node = StructNode(node)
-        setattr(struct_node, "inheritance_mapping", inheritance_mapping)
-        struct_instance = struct_node.constructor()
-        TYPE_MAPPING[label] = struct_instance.__class__
+        struct_node.set_inheritance(inheritance_mapping)
+        register_type(label, struct_node.build_struct_class())
         self.current_scope()[label] = struct_node
 
     def _handle_prop_Assignment(self, target_object, property, value):
@@ -778,40 +1135,98 @@ class Evaluator:
         if not isinstance(node, PropertyAssignmentNode):
             raise InternalException(f"Cannot use {node.__class__.__name__} in visit_PropertyAssignmentNode", node)
         target_object = self.evaluate(node.identifier)
+        slot = self.property_slot(node, target_object)
+        value = self.evaluate(node.value_expression)
+        return self.bind_property(node, target_object, slot, value)
+
+    def property_slot(self, node, target_object):
+        """
+            Checks that the target of a property assignment has the property.
+            Returns the slot a plain assignment can store to directly, or
+            None if it has to go through the operator's handler.
+        """
         if target_object is None:
             raise RuntimeException("Attempt to access property on null", node.identifier)
 
         property = node.property_identifier.data
 
-        if not hasattr(target_object, property):
-            raise RuntimeException(f"Target has no attribute {property}", node.property_identifier)
-
-        op = node.op
-        value = self.evaluate(node.value_expression)
-
-        method = f"_handle_prop_{op.label}"
-        if hasattr(self, method):
-            getattr(self, method)(target_object, property, value)
+        cache = node.inline_cache
+        if cache is None:
+            cache = node.inline_cache = InlineCache(self.INLINE_CACHE_SIZE)
+        slot = cache.get(target_object.__class__)
+        if slot is not None:
+            self.property_cache_hits += 1
         else:
+            self.property_cache_misses += 1
+            if not hasattr(target_object, property):
+                raise RuntimeException(f"Target has no attribute {property}", node.property_identifier)
+            # Struct fields are slots, so one store works for every instance
+            # of the struct.
+            field = getattr(target_object.__class__, property, None)
+            if isinstance(target_object, ChestnutStruct) and isinstance(field, types.MemberDescriptorType):
+                cache.fill(target_object.__class__, field)
+        return slot
+
+    def bind_property(self, node, target_object, slot, value):
+        op = node.op
+        if slot is not None and op.label == "Assignment":
+            slot.__set__(target_object, value)
+            return 1
+        handler = self.property_handlers.get(op.label)
+        if handler is None:
             raise RuntimeException(f"Property assignment operation {op.data} is unsupported", op)
+        handler(target_object, node.property_identifier.data, value)
 
         return 1
 
     def visit_PropertyAccessNode(self, node):
         if not isinstance(node, PropertyAccessNode):
             raise InternalException(f"Cannot use {node.__class__.__name__} in visit_PropertyAccessNode", node)
-        target_object = self.evaluate(node.identifier)
+        return self.property_value(node, self.evaluate(node.identifier))
+
+    def property_value(self, node, target_object):
+        cache = node.inline_cache
+        if cache is None:
+            cache = node.inline_cache = InlineCache(self.INLINE_CACHE_SIZE)
+        entry = cache.get(target_object.__class__)
+        if entry is not None:
+            self.property_cache_hits += 1
+            kind, target = entry
+            if kind is CACHED_METHOD:
+                return StructMethodCall(target_object, target)
+            val = target.__get__(target_object)
+            if isinstance(val, CallStatementNode):
+                return self.evaluate(val)
+            return val
+        self.property_cache_misses += 1
+        return self.access_property(node, target_object, cache)
+
+    def access_property(self, node, target_object, cache):
+        """
+            Looks up a property of an evaluated target the slow way. The
+            lookups that only depend on the target's class and on what has
+            been defined are remembered in the access's InlineCache.
+        """
         if target_object is None:
             raise RuntimeException(f"Attempt to access property on null object at line...", node)
         property_name = node.property_identifier.data
+        # Methods defined in a scope other than the global one can come and
+        # go with their scope, so nothing found past their key is cached.
+        cacheable = False
         # if property_name in target_object.statics:
         #     raise RuntimeException(f"Can't assign to static property {property_name} on struct {node.identifier.data}", node.identifier)
         if hasattr(target_object, "gettype"):
             scope_key = f"{target_object.gettype()} {node.property_identifier.data}"
+            cacheable = scope_key not in self.scoped_methods
             scope = self.find_first_scope_containing(scope_key)
             if scope is not None:
                 func_object = scope[scope_key]
+                if cacheable:
+                    cache.fill(target_object.__class__, (CACHED_METHOD, func_object))
                 return StructMethodCall(target_object, func_object)
+        # Past here only struct instances, whose fields are fixed slots, give
+        # the same result for every instance of their class.
+        cacheable = cacheable and isinstance(target_object, ChestnutStruct)
         if isinstance(target_object, StructNode):
             if property_name in target_object.function_register.functions:
                 return StructMethodCall(target_object, target_object.function_register.functions[property_name]["candidates"][0])
@@ -844,11 +1259,16 @@ class Evaluator:
                 if property_name in fr.functions:
                     func_object = fr.functions[property_name]["candidates"][0]
             if func_object is not None:
+                if cacheable:
+                    cache.fill(target_object.__class__, (CACHED_METHOD, func_object))
                 return StructMethodCall(target_object, func_object)
         if hasattr(target_object, "__static__" + property_name):
             val = getattr(target_object, "__static__" + property_name)
         else:
             val = getattr(target_object, property_name)
+            slot = getattr(target_object.__class__, property_name, None)
+            if cacheable and isinstance(slot, types.MemberDescriptorType):
+                cache.fill(target_object.__class__, (CACHED_SLOT, slot))
         if isinstance(val, CallStatementNode):
             return self.evaluate(val)
         return val
@@ -863,54 +1283,72 @@ class Evaluator:
             raise InternalException(f"Cannot use {node.__class__.__name__} in visit_TupleLiteralNode", node)
         return ChestnutTuple(tuple([ self.evaluate(x) for x in node.elements ]))
 
-    def _handle_index_Assignment(self, node, target, index):
-        target[index] = self.evaluate(node.value)
+    def visit_MapLiteralNode(self, node):
+        if not isinstance(node, MapLiteralNode):
+            raise InternalException(f"Cannot use {node.__class__.__name__} in visit_MapLiteralNode", node)
+        return ChestnutMap([ (self.evaluate(k), self.evaluate(v)) for k, v in zip(node.keys, node.values) ])
 
-    def _handle_index_Addassign(self, node, target, index):
-        target[index] += self.evaluate(node.value)
+    def _handle_index_Assignment(self, target, index, value):
+        target[index] = value
 
-    def _handle_index_Subassign(self, node, target, index):
-        target[index] -= self.evaluate(node.value)
+    def _handle_index_Addassign(self, target, index, value):
+        target[index] += value
 
-    def _handle_index_Mulassign(self, node, target, index):
-        target[index] *= self.evaluate(node.value)
+    def _handle_index_Subassign(self, target, index, value):
+        target[index] -= value
 
-    def _handle_index_Divassign(self, node, target, index):
-        target[index] /= self.evaluate(node.value)
+    def _handle_index_Mulassign(self, target, index, value):
+        target[index] *= value
+
+    def _handle_index_Divassign(self, target, index, value):
+        target[index] /= value
 
     def visit_IndexAssignNode(self, node):
         if not isinstance(node, IndexAssignNode):
             raise InternalException(f"Cannot use {node.__class__.__name__} in visit_IndexAssignNode", node)
 
-        target = self.evaluate(node.identifier)
+        target = self.index_assignment_target(node, self.evaluate(node.identifier))
+        index = self.index_assignment_index(node, target, self.evaluate(node.index))
+        return self.bind_index(node, target, index, self.evaluate(node.value))
+
+    def bind_index(self, node, target, index, value):
+        op = node.op
+        handler = self.index_handlers.get(op.label)
+        if handler is None:
+            raise RuntimeException(f"Unsupported index assignment operation {op.data}")
+        handler(target, index, value)
+
+        return 1
+
+    def index_assignment_target(self, node, target):
         if isinstance(target, tuple):
             raise RuntimeException("Illegal assingment, tuples are immutable", node.identifier)
 
-        if not isinstance(target, (list, ChestnutList, ChestnutTuple, tuple)):
+        if not isinstance(target, (list, ChestnutList, ChestnutTuple, tuple, ChestnutMap)):
             raise RuntimeException("Index access attempted on non-list", node.identifier)
+        return target
 
-        index = self.evaluate(node.index)
+    def index_assignment_index(self, node, target, index):
+        if target.__class__ is ChestnutMap:
+            return index
         if index == ChestnutInteger(-1):
             index = ChestnutInteger(len(target) - 1)
         if index < ChestnutInteger(-1):
             raise RuntimeException("List bounds exceeded in assignment", node.identifier)
         if index > ChestnutInteger(len(target) - 1):
             raise RuntimeException("List bounds exceeded in assignment", node.identifier)
-
-        op = node.op
-        method = f"_handle_index_{op.label}"
-        if hasattr(self, method):
-            getattr(self, method)(node, target, index)
-        else:
-            raise RuntimeException(f"Unsupported index assignment operation {op.data}")
-
-        return 1
+        return index
 
     def visit_IndexAccessNode(self, node):
         if not isinstance(node, IndexAccessNode):
             raise InternalException(f"Cannot use {node.__class__.__name__} in visit_IndexAccessNode", node)
         target_value = self.evaluate(node.target)
         index = self.evaluate(node.index)
+        return self.index_value(target_value, index)
+
+    def index_value(self, target_value, index):
+        if target_value.__class__ is ChestnutMap:
+            return target_value[index]
         if not isinstance(target_value, (list, ChestnutList)) and not isinstance(target_value, (tuple, ChestnutTuple)) and not isinstance(target_value, str) and not isinstance(target_value, ChestnutString):
             raise Exception(f"Index access attempted on non-array type {target_value.__repr__()}")
 
@@ -925,16 +1363,26 @@ class Evaluator:
         return target_value[index]
 
     def visit_ExpressionStatementNode(self, node):
-        self.expression_cache = {}
         return self.evaluate(node.expression)
 
+    @staticmethod
+    def returns_value(node):
+        return node.expression or str(node.expression) in ["NaN", "undefined"]
+
     def visit_ReturnStatementNode(self, node):
+        if isinstance(node.expression, CallStatementNode) and node.expression.tail:
+            return self.tail_call(node.expression)
         return_value = None
-        if node.expression or str(node.expression) in ["NaN", "undefined"]:
+        if self.returns_value(node):
             return_value = self.evaluate(node.expression)
-        raise ReturnValue(return_value)
+        return ReturnValue(return_value)
 
     def visit_ConstantStatementNode(self, node):
+        labels = self.constant_labels(node)
+        expression = self.evaluate(node.expression)
+        return self.bind_constant(labels, expression)
+
+    def constant_labels(self, node):
         labels = node.label
         if not isinstance(node.label, ChestnutTuple):
             labels = [node.label]
@@ -942,20 +1390,28 @@ class Evaluator:
         for l in labels:
             if self.exists_in_any_scope(l.data):
                 raise RuntimeException(f"`{l.data}` is already declared elsewhere", l)
+        return labels
 
-        expression = self.evaluate(node.expression)
+    def bind_constant(self, labels, expression):
         if not isinstance(expression, ChestnutTuple):
             expression = [expression]
 
+        scope = self.current_scope()
+        constants = scope.setdefault(CONSTANT_NAMES, set())
         i = 0
         while i < len(labels):
-            setattr(expression[i], "constant", True)
-            self.current_scope()[f"{labels[i].data}"] = expression[i]
+            constants.add(labels[i].data)
+            scope[f"{labels[i].data}"] = expression[i]
             i = i + 1
 
         return 1
 
     def visit_LetStatementNode(self, node):
+        labels = self.let_labels(node)
+        expression = self.evaluate(node.expression)
+        return self.bind_let(labels, expression)
+
+    def let_labels(self, node):
         labels = node.label
         if not hasattr(node.label, "__iter__"):
             labels = [node.label]
@@ -964,22 +1420,40 @@ class Evaluator:
             if not self.calling_builtin:
                 if self.exists_in_any_scope(l.data):
                     raise RuntimeException(f"Cannot redeclare {l.data}", l)
+        return labels
 
-        expression = self.evaluate(node.expression)
+    def bind_let(self, labels, expression):
+        values = self.let_values(len(labels), expression)
+        i = 0
+        while i < len(labels):
+            self.current_scope()[labels[i].data] = values[i]
+            i = i + 1
+
+        return 1
+
+    def let_values(self, count, expression):
+        """
+            Returns the values a let statement binds to its first count labels.
+        """
         if not isinstance(expression, ChestnutTuple):
             expression = [expression]
 
+        values = []
         i = 0
-        while i < len(labels):
+        while i < count:
             if isinstance(expression[0], tuple):
-                self.current_scope()[labels[i].data] = expression[0][i]
+                values.append(expression[0][i])
             else:
-                self.current_scope()[labels[i].data] = expression[i]
+                values.append(expression[i])
             i = i + 1
-
-        return 1
+        return values
 
     def visit_ShadowStatementNode(self, node):
+        labels = self.shadow_labels(node)
+        expression = self.evaluate(node.expression)
+        return self.bind_shadow(labels, expression)
+
+    def shadow_labels(self, node):
         labels = node.label
         if not isinstance(node.label, list):
             labels = [node.label]
@@ -988,10 +1462,11 @@ class Evaluator:
             if var_scope is None:
                 raise RuntimeException(f"Cannot shadow undeclared {l.data}", l)
 
-            if hasattr(var_scope[l.data], "constant"):
+            if self.is_constant(var_scope, l.data):
                 raise RuntimeException(f"Cannot shadow constant {l.data}", l)
+        return labels
 
-        expression = self.evaluate(node.expression)
+    def bind_shadow(self, labels, expression):
         if not isinstance(expression, tuple):
             expression = [expression]
 
@@ -1021,23 +1496,70 @@ class Evaluator:
 
         func_object = Function(node, captured_scopes)
         self.function_register.register(func_object)
+        if node.alias is not None:
+            self.alias_names.add(node.alias.data)
         scope = self.find_first_scope_containing(node.name.data)
         if scope is not None:
-            if hasattr(scope[node.name.data], "constant"):
+            if self.is_constant(scope, node.name.data):
                 raise Exception(f"Function definition for `{node.name.data}` conflicts with a constant at line {node.name.line}, column {node.name.column}")
         # if self.exists_in_any_scope(node.name.data):
         #     raise Exception(f"{node.name.data} is already defined in the current scope, line {node.name.line}, column {node.name.column}")
         self.current_scope()[node.name.data] = func_object
+        self.note_free_names(node)
 
         return 1
 
     def visit_AnonymousFnExpressionNode(self, node):
+        self.note_free_names(node)
         return AnonymousFunction(node)
 
+    def note_free_names(self, statement):
+        """
+            Records the names a function body may look up in its callers'
+            scopes before the function can be called.
+        """
+        if statement.free_names is None:
+            # Without the Analyzer's results any name may be looked up.
+            self.tail_calls = False
+        else:
+            self.dynamic_names.update(statement.free_names)
+
+    def inline_cache_stats(self):
+        return {
+            "property": {"hits": self.property_cache_hits, "misses": self.property_cache_misses},
+            "call": {"hits": self.call_cache_hits, "misses": self.call_cache_misses},
+        }
+
+    def set_max_call_depth(self, depth):
+        """
+            Sets how deep Chestnut calls may nest before a call raises a
+            RuntimeException.
+        """
+        self.max_call_depth = depth
+
+    def python_recursion_limit(self):
+        # How deep Python must let this evaluator recurse for calls to nest
+        # to the maximum call depth. Callers raise the limit with
+        # RecursionLimit while Chestnut code runs.
+        return self.max_call_depth * PYTHON_FRAMES_PER_CALL
+
+    def enter_call(self):
+        self.call_depth += 1
+        if self.call_depth > self.max_call_depth:
+            self.call_depth -= 1
+            raise RuntimeException(f"Maximum call depth of {self.max_call_depth} exceeded")
+
     def visit_CallStatementNode(self, node):
-        if "call depth" not in self.scopes[0]:
-            self.scopes[0]["call depth"] = ChestnutInteger(0)
-        self.scopes[0]["call depth"] += ChestnutInteger(1)
+        self.enter_call()
+        callable, finalized_args = self.call_operands(node)
+        return self.invoke(node, callable, finalized_args)
+
+    def tail_call(self, node):
+        self.enter_call()
+        callable, finalized_args = self.call_operands(node)
+        return TailCall(node, callable, finalized_args)
+
+    def call_operands(self, node):
         callable = self.evaluate(node.identifier)
         finalized_args = []
         for param in node.params:
@@ -1047,52 +1569,150 @@ class Evaluator:
                     finalized_args.append(val)
             else:
                 finalized_args.append(evaluated_value)
+        return callable, finalized_args
+
+    def call_value(self, callable, args):
+        """
+            Calls a Chestnut callable with evaluated arguments from Python, as
+            a call naming it would. The scopes and call depth are put back
+            even if the call halts.
+        """
+        call_scope = { "callee": callable }
+        params = []
+        for index, arg in enumerate(args):
+            call_scope[f"arg {index}"] = arg
+            params.append(Token("Identifier", f"arg {index}", 0, 0))
+        scope_count = len(self.scopes)
+        call_depth = self.call_depth
+        self.scopes.append(call_scope)
+        try:
+            return self.evaluate(CallStatementNode(Token("Identifier", "callee", 0, 0), params))
+        finally:
+            del self.scopes[scope_count:]
+            self.call_depth = call_depth
+
+    def invoke(self, node, callable, finalized_args):
+        """
+            Calls an already evaluated callable with its evaluated arguments.
+            The call depth must already have been raised by enter_call().
+        """
+        frame = self.call_frame(node, callable, finalized_args)
+        if not isinstance(frame, Frame):
+            return frame
+        return self.run_frame(frame)
+
+    def run_frame(self, frame):
+        """
+            Runs the body of a Frame entered by call_frame and leaves it,
+            returning the value of the call. A tail call the body ends with
+            runs in the same loop, in place of the frame when replace_frame
+            allows it, so tail recursion neither grows the scopes nor the
+            Python stack.
+        """
+        while True:
+            try:
+                val = self.run_function_body(frame.function)
+            except RecursionError:
+                # Deeply nested blocks can exhaust Python's stack before the
+                # call depth limit is reached.
+                raise RuntimeException(f"Maximum recursion depth exceeded at call depth {frame.depth}") from None
+            if not isinstance(val, TailCall):
+                return self.return_from(frame, val)
+            callee = self.call_frame(val.node, val.callable, val.args)
+            if not isinstance(callee, Frame):
+                return self.return_from(frame, ReturnValue(callee))
+            if not self.replace_frame(frame, callee):
+                return self.return_from(frame, ReturnValue(self.run_frame(callee)))
+            frame = callee
+
+    def replace_frame(self, frame, callee):
+        """
+            Removes the scopes of frame from under callee, the Frame entered
+            for the tail call frame's body ended with, so that the callee
+            returns straight to frame's caller. Returns False and leaves both
+            in place if a name bound in those scopes may still be looked up
+            by the callee or anything it calls.
+        """
+        if not self.tail_calls:
+            return False
+        scopes = self.scopes
+        global_scope = scopes[0]
+        dynamic_names = self.dynamic_names
+        for scope in scopes[frame.base:callee.base]:
+            if scope is global_scope or dynamic_names.isdisjoint(scope):
+                continue
+            # Scopes the callee captured are pushed again above its boundary.
+            if not any(scope is parent for parent in callee.parent):
+                return False
+        del scopes[frame.base:callee.base]
+        callee.base = frame.base
+        callee.depth = frame.depth
+        self.call_depth -= 1
+        return True
+
+    def resolve_call_site(self, node, callable, finalized_args):
+        """
+            Resolves the overload a call runs, or None if the call site looks
+            its callable up by name, along with the receiver name a struct
+            method binds its instance to. The result is kept in the call
+            site's InlineCache for the receiver class, name and argument
+            classes it was resolved for.
+        """
+        if isinstance(callable, AnonymousFunction):
+            return None, None
+        if isinstance(callable, StructMethodCall):
+            instance = callable.instance
+            if isinstance(instance, StructNode):
+                # Static method handling
+                return instance.function_register.resolve(callable.func_object.statement.name.data, finalized_args), None
+            receiver = instance.__class__
+            fname = callable.func_object.statement.name.data
+        else:
+            receiver = None
+            fname = node.identifier.data
+        key = (receiver, fname, tuple([arg.__class__ for arg in finalized_args]))
+        cache = node.inline_cache
+        if cache is None:
+            cache = node.inline_cache = InlineCache(self.INLINE_CACHE_SIZE)
+        entry = cache.get(key)
+        if entry is not None:
+            self.call_cache_hits += 1
+            return entry
+
+        self.call_cache_misses += 1
         func = None
-        if not isinstance(callable, StructMethodCall) and not isinstance(callable, AnonymousFunction):
-            func = self.function_register.resolve(node.identifier.data, finalized_args)
+        receiver_name = None
+        if receiver is None:
+            func = self.function_register.resolve(fname, finalized_args)
+        else:
+            struct_type = instance.__struct_node__
+            for owner in struct_type.find_method_owners(fname):
+                func = owner.function_register.resolve(fname, finalized_args)
+                if func is not None:
+                    receiver_name = func.statement.target_struct.name.data
+                    break
 
-        identifier = None
+            if func is None:
+                # Fall back to functions declared with an `on ... with` shape.
+                func = self.function_register.resolve(fname, finalized_args, struct_type)
+        cache.fill(key, (func, receiver_name))
+        return func, receiver_name
+
+    def call_frame(self, node, callable, finalized_args):
+        """
+            Resolves the function a call runs and enters a Frame for it, with
+            its scopes pushed and its arguments bound. Calls to bridge
+            functions and struct constructors complete here instead, and
+            their result is returned in place of a Frame.
+        """
         instance = None
-        receiver_name = None
         if isinstance(callable, StructNode):
+            self.call_depth -= 1
             return callable.constructor()
+        func, receiver_name = self.resolve_call_site(node, callable, finalized_args)
+        identifier = receiver_name
         if isinstance(callable, StructMethodCall):
-            instance = callable.instance 
-            if isinstance(instance, StructNode):
-                # Static method handling
-                func = instance.function_register.resolve(callable.func_object.statement.name.data, finalized_args)
-            else:
-                struct_type = instance.__struct_node__
-                inheritance_mapping = dict(getattr(struct_type,"inheritance_mapping"))
-                inheritance_mapping[callable.__class__.__name__] = instance.__class__
-                bfs = [callable.__class__.__name__]
-                visited = []
-                fname = callable.func_object.statement.name.data
-                identifier = None
-                receiver_name = None
-
-                while len(bfs) > 0:
-                    stype = bfs.pop(0)
-                    if stype in visited:
-                        continue
-                    visited.append(stype)
-                    if isinstance(stype, Token):
-                        stype = stype.data
-                    current_struct_type = inheritance_mapping[stype]
-                
-                    if isinstance(current_struct_type, StructNode):
-                        current_struct_node = current_struct_type
-                    else:
-                        current_struct_node = current_struct_type.__struct_node__
-                    func = current_struct_node.function_register.resolve(fname, finalized_args)
-                    if func is not None:
-                        identifier = func.statement.target_struct.name.data 
-                        receiver_name = identifier
-                        break
-
-                    bfs.extend(current_struct_node.definition.inherits)
-                    if func is None:
-                        func = self.function_register.resolve(fname, finalized_args, current_struct_node)
+            instance = callable.instance
 
         if not isinstance(callable, (Function, AnonymousFunction, BridgeFunction, StructNode, StructMethodCall)):
             raise RuntimeException(f"Attempt to call non-callable type {str(callable)}")
@@ -1108,10 +1728,9 @@ class Evaluator:
         if isinstance(node.identifier, AnonymousFnExpressionNode):
             func = AnonymousFunction(node.identifier)
 
-        if isinstance(node.identifier, PropertyAccessNode):
-            prop = self.evaluate(node.identifier)
-            if isinstance(prop, Function):
-                func = prop
+        if isinstance(node.identifier, PropertyAccessNode) and isinstance(callable, Function):
+            # A function stored in a field.
+            func = callable
         if func is None:
             if not self.exists_in_any_scope(node.identifier.data) and not self.exists_in_any_scope(f"constant {node.identifier.data}"):
                 # The function was found neither in non-constant or constant storage.
@@ -1135,7 +1754,7 @@ class Evaluator:
                 func = func_scope["constant " + identifier]
 
         if isinstance(func, StructNode):
-            self.scopes[0]["call depth"] -= ChestnutInteger(1)
+            self.call_depth -= 1
             return func.constructor(*finalized_args)
 
         if not isinstance(func, Function) and not isinstance(func, AnonymousFunction) and not isinstance(func, BridgeFunction):
@@ -1164,60 +1783,110 @@ class Evaluator:
                 *final_args
             )
 
-            self.scopes[0]["call depth"] -= ChestnutInteger(1)
+            self.call_depth -= 1
             return result
 
         fn = func.statement
-
-        base_stack_length = len(self.scopes)
+        frame = Frame(func, len(self.scopes), self.call_depth)
 
         # Push a call boundary before restoring the captured scopes.
         # This call boundary will prevent scope from leaking from lower levels.
         if hasattr(fn, "Chestnut-bridge"):
             # Bridge functions like print don't get their own boundaries.
-            self.scopes.append({"Chestnut-bridge": True})
+            self.scopes.append(BRIDGE_BOUNDARY)
             self.calling_builtin = True
         else:
-            self.scopes.append({"call boundary": True})
-
-        for scope_to_load in func.scopes:
-            self.scopes.append(scope_to_load)
-
-        self.push_scope() 
+            self.scopes.append(CALL_BOUNDARY)
+        self.scopes.extend(frame.parent)
+        self.scopes.append(frame.locals)
 
         if instance is not None and receiver_name is not None:
-            self.current_scope()[receiver_name] = instance
+            frame.locals[receiver_name] = instance
 
         params = []
         try:
             params = func.reconcile_parameters(self, finalized_args)
         except RuntimeException as e:
             raise RuntimeException(e.message)
-        for p in func.statement.parameters:
-            self.current_scope()[p.name.data] = params[p.name.data]
+        for p in fn.parameters:
+            frame.locals[p.name.data] = params[p.name.data]
+        return frame
+
+    def return_from(self, frame, val):
+        """
+            Leaves a Frame entered by call_frame once its body ended with the
+            Signal val, or None, and returns the value of the call.
+        """
+        if val is not None:
+            if isinstance(val, LoopSignal):
+                raise RuntimeException(f"`{val.name}` used outside of a loop in `{frame.function.get_name()}`")
+            frame.returned = val.value
+            if isinstance(frame.returned, (Function, AnonymousFunction)):
+                live_closure_scope = self.scopes.pop()
+                frame.returned.scopes.append(live_closure_scope)
+
+        del self.scopes[frame.base:]
+        self.call_depth -= 1
+        return frame.returned
+
+    def run_function_body(self, func):
+        """
+            Runs the statements of a called function. Returns the Signal that
+            ended it, or None if the body ran to completion.
+        """
+        evaluate = self.evaluate
         for s in func.statement.statements:
-            try:
-                self.evaluate(s)
-            except ReturnValue as val:
-                if isinstance(val.value, (Function, AnonymousFunction)):
-                    live_closure_scope = self.scopes.pop()
-                    val.value.scopes.append(live_closure_scope)
-
-                while len(self.scopes) > base_stack_length:
-                    self.pop_scope()
-                self.scopes[0]["call depth"] -= ChestnutInteger(1)
-                return val.value
-
-        while len(self.scopes) > base_stack_length:
-            self.pop_scope()
-        self.scopes[0]["call depth"] -= ChestnutInteger(1)
-        return CHESTNUT_NULL
+            signal = evaluate(s)
+            if isinstance(signal, Signal):
+                return signal
+        return None
+
+    def run_block(self, statements):
+        """
+            Runs statements in a new scope. A Signal is returned without
+            closing the scope: the loop or call it leaves unwinds the scopes.
+        """
+        self.push_scope()
+        evaluate = self.evaluate
+        for statement in statements:
+            signal = evaluate(statement)
+            if isinstance(signal, Signal):
+                return signal
+        self.pop_scope()
+        return None
+
+    def push_pass_scope(self, loop):
+        scope = loop.pass_scope
+        if scope is None:
+            self.scopes.append({})
+        else:
+            scope.clear()
+            self.scopes.append(scope)
+
+    def run_loop_pass(self, statements, loop, base_loop_scopes):
+        """
+            Runs one pass of a loop body in the scope pushed for it. Returns
+            BREAK_LOOP to leave the loop, a ReturnValue to leave the function
+            or None to go on with the next pass.
+        """
+        evaluate = self.evaluate
+        for statement in statements:
+            signal = evaluate(statement)
+            if isinstance(signal, Signal):
+                if signal is CONTINUE_LOOP:
+                    break
+                if signal is BREAK_LOOP:
+                    del self.scopes[base_loop_scopes:]
+                return signal
+        del self.scopes[base_loop_scopes:]
+        loop.index += 1
+        return None
 
     def visit_BreakStatementNode(self, node):
-        raise BreakLoop(node)
+        return BREAK_LOOP
 
     def visit_ContinueStatementNode(self, node):
-        raise ContinueLoop(node)
+        return CONTINUE_LOOP
 
     def visit_Token(self, node):
         if not isinstance(node, Token):
@@ -1227,9 +1896,13 @@ class Evaluator:
 
         label = node.data
 
-        stored_scope = self.find_first_scope_containing(label)
-        if stored_scope is None:
-            raise Exception(f"Couldn't find symbol {label} at line {node.line}, column {node.column}")
+        address = node.address
+        if address is not None and label not in self.alias_names:
+            stored_scope = self.scopes[-1 - address]
+        else:
+            stored_scope = self.find_first_scope_containing(label)
+            if stored_scope is None:
+                raise Exception(f"Couldn't find symbol {label} at line {node.line}, column {node.column}")
         result = stored_scope[label]
         if isinstance(result, BringVariable):
             return result.__getitem__(None)
@@ -1238,24 +1911,13 @@ class Evaluator:
 
     def visit_IfStatementNode(self, node):
         if self.evaluate(node.condition_expression):
-            self.push_scope()
-            for statement in node.block_statements:
-                self.evaluate(statement)
-            self.pop_scope()
-            return
+            return self.run_block(node.block_statements)
         for elif_block in node.elif_blocks:
             if self.evaluate(elif_block.condition_expression):
-                self.push_scope()
-                for statement in elif_block.block_statements:
-                    self.evaluate(statement)
-                self.pop_scope()
-                return
+                return self.run_block(elif_block.block_statements)
         if node.else_block:
-            self.push_scope()
-            for statement in node.else_block.block_statements:
-                self.evaluate(statement)
-            self.pop_scope()
-        return
+            return self.run_block(node.else_block.block_statements)
+        return None
 
     def visit_CaseStatementNode(self, node):
         subject = self.evaluate(node.subject)
@@ -1266,131 +1928,83 @@ class Evaluator:
                 if valid:
                     break
             if valid:
-                self.push_scope()
-                for statement in when_block.statements:
-                    self.evaluate(statement)
-                self.pop_scope()
-                return
+                return self.run_block(when_block.statements)
         if node.otherwise:
-            self.push_scope()
-            for statement in node.otherwise.statements:
-                self.evaluate(statement)
-            self.pop_scope()
-        return
+            return self.run_block(node.otherwise.statements)
+        return None
 
     def visit_LoopStatementNode(self, node):
         self.push_scope()
-        root_loop_scope = self.current_scope()
-        self.current_scope()["loop index"] = ChestnutInteger(0)
+        loop = LoopState(self.current_scope(), node.reuse_scope)
         base_loop_scopes = len(self.scopes)
         while True:
-            self.push_scope()
-            try:
-                for statement in node.statements:
-                    self.expression_cache = {}
-                    self.evaluate(statement)
-            except BreakLoop:
-                while len(self.scopes) > base_loop_scopes:
-                    self.pop_scope()
-                break
-            except ContinueLoop:
-                root_loop_scope["loop index"] = root_loop_scope["loop index"] + ChestnutInteger(1)
-                while len(self.scopes) > base_loop_scopes:
-                    self.pop_scope()
-                continue
-            self.pop_scope()
-            root_loop_scope["loop index"] = root_loop_scope["loop index"] + ChestnutInteger(1)
+            self.push_pass_scope(loop)
+            signal = self.run_loop_pass(node.statements, loop, base_loop_scopes)
+            if signal is not None:
+                if signal is BREAK_LOOP:
+                    break
+                return signal
         self.pop_scope()
-        del root_loop_scope["loop index"]
+        del loop.root["loop index"]
 
     def visit_ForStatementNode(self, node):
         self.push_scope()
         subject = self.evaluate(node.subject)
-        identifier = node.identifier
+        label = node.identifier.data
         statements = node.statements
-        root_loop_scope = self.current_scope()
-        root_loop_scope["loop index"] = ChestnutInteger(0)
-        base_loop_scopes = len(self.scopes)
+        scopes = self.scopes
+        loop = LoopState(self.current_scope(), node.reuse_scope)
+        base_loop_scopes = len(scopes)
         for elem in subject:
-            self.push_scope()
-            self.current_scope()[identifier.data] = elem
-            try:
-                for statement in statements:
-                    self.expression_cache = {}
-                    self.evaluate(statement)
-            except BreakLoop:
-                while len(self.scopes) > base_loop_scopes:
-                    self.pop_scope()
-                break
-            except ContinueLoop:
-                root_loop_scope["loop index"] = root_loop_scope["loop index"] + ChestnutInteger(1)
-                while len(self.scopes) > base_loop_scopes:
-                    self.pop_scope()
-                continue
-            self.pop_scope()
-            root_loop_scope["loop index"] = root_loop_scope["loop index"] + ChestnutInteger(1)
+            self.push_pass_scope(loop)
+            scopes[-1][label] = elem
+            signal = self.run_loop_pass(statements, loop, base_loop_scopes)
+            if signal is not None:
+                if signal is BREAK_LOOP:
+                    break
+                return signal
         self.pop_scope()
-        del root_loop_scope["loop index"]
+        del loop.root["loop index"]
 
     def visit_WhileStatementNode(self, node):
         self.push_scope()
-        root_loop_scope = self.current_scope()
-        self.current_scope()["loop index"] = ChestnutInteger(0)
+        loop = LoopState(self.current_scope(), node.reuse_scope)
         base_loop_scopes = len(self.scopes)
         while self.evaluate(node.condition):
-            # self.expression_cache = {}
-            self.push_scope()
-            try:
-                for statement in node.statements:
-                    self.expression_cache = {}
-                    self.evaluate(statement)
-            except BreakLoop:
-                while len(self.scopes) > base_loop_scopes:
-                    self.pop_scope()
-                break
-            except ContinueLoop:
-                root_loop_scope["loop index"] = root_loop_scope["loop index"] + ChestnutInteger(1)
-                while len(self.scopes) > base_loop_scopes:
-                    self.pop_scope()
-                continue
-            self.pop_scope()
-            root_loop_scope["loop index"] = root_loop_scope["loop index"] + ChestnutInteger(1)
+            self.push_pass_scope(loop)
+            signal = self.run_loop_pass(node.statements, loop, base_loop_scopes)
+            if signal is not None:
+                if signal is BREAK_LOOP:
+                    break
+                return signal
         self.pop_scope()
-        del root_loop_scope["loop index"]
+        del loop.root["loop index"]
 
     def visit_UntilStatementNode(self, node):
         self.push_scope()
-        root_loop_scope = self.current_scope()
-        self.current_scope()["loop index"] = ChestnutInteger(0)
+        loop = LoopState(self.current_scope(), node.reuse_scope)
         base_loop_scopes = len(self.scopes)
-        while self.current_scope()["loop index"].value == 0 or not self.evaluate(node.condition):
-            self.push_scope()
-            try:
-                for statement in node.statements:
-                    self.expression_cache = {}
-                    self.evaluate(statement)
-            except BreakLoop:
-                while len(self.scopes) > base_loop_scopes:
-                    self.pop_scope()
-                break
-            except ContinueLoop:
-                root_loop_scope["loop index"] = root_loop_scope["loop index"] + ChestnutInteger(1)
-                while len(self.scopes) > base_loop_scopes:
-                    self.pop_scope()
-                continue
-            self.pop_scope()
-            root_loop_scope["loop index"] = root_loop_scope["loop index"] + ChestnutInteger(1)
+        while loop.index == 0 or not self.evaluate(node.condition):
+            self.push_pass_scope(loop)
+            signal = self.run_loop_pass(node.statements, loop, base_loop_scopes)
+            if signal is not None:
+                if signal is BREAK_LOOP:
+                    break
+                return signal
         self.pop_scope()
-        del root_loop_scope["loop index"]
+        del loop.root["loop index"]
 
     def visit_LoopindexExpressionNode(self, node):
+        address = node.address
+        if address is not None:
+            return ChestnutInteger(self.scopes[-1 - address]["loop index"].index)
         scope = self.find_first_scope_containing("loop index")
         if scope is None:
             raise Exception(f"`loop_index` keyword must be used inside a loop")
-        return scope["loop index"]
+        return ChestnutInteger(scope["loop index"].index)
 
     def visit_CallDepthExpressionNode(self, node):
-        return self.scopes[0]["call depth"]
+        return ChestnutInteger(self.call_depth)
 
     def visit_UseExpressionNode(self, node):
         if not node.condition is None:
@@ -1427,27 +2041,31 @@ class Evaluator:
         scope[label] /= expression
 
     def visit_AssignStatementNode(self, node):
-        label = node.identifier.data
+        scope = self.assignment_scope(node)
+        expression = self.evaluate(node.expression)
+        return self.bind_assignment(node, scope, expression)
 
+    def assignment_scope(self, node):
+        label = node.identifier.data
 
-        if not self.exists_in_any_scope(node.identifier.data):
-            raise Exception(f"Undeclared identifier {label} at line {node.identifier.line}, column {node.identifier.column}")
+        scope = self.addressed_scope(node.identifier)
+        if scope is None:
+            scope = self.assignable_scope(label)
+            if scope is None:
+                raise Exception(f"Undeclared identifier {label} at line {node.identifier.line}, column {node.identifier.column}")
 
-        scope = self.find_first_scope_containing(label)
-        if hasattr(scope[label], "constant"):
+        if self.is_constant(scope, label):
             raise Exception(f"Cannot assign to constant `{label}` at line {node.identifier.line}, column {node.identifier.column}")
 
         if isinstance(node, AnonymousFunction):
             node.name = label
-        expression = self.evaluate(node.expression)
-
-        op = node.op
-        method = f"_handle_assign_{op.label}"
+        return scope
 
-        if hasattr(self, method):
-            getattr(self, method)(scope, label, expression)
-        else:
+    def bind_assignment(self, node, scope, expression):
+        handler = self.assign_handlers.get(node.op.label)
+        if handler is None:
             return 0
+        handler(scope, node.identifier.data, expression)
         return 1
 
     def _handle_binary_Eq(self, left, right):
@@ -1525,26 +2143,108 @@ class Evaluator:
         return left ** right
 
     def visit_BinaryOperationNode(self, node):
-        left = self.evaluate(node.left)
-        right = self.evaluate(node.right)
         op = node.op
-        method = f"_handle_binary_{op.label}"
-
-        if hasattr(self, method):
-            return getattr(self, method)(left, right)
-        else:
+        handler = self.binary_handlers.get(op.label)
+        if handler is None:
             raise RuntimeException(f"Cannot use visit_BinaryOperationNode with operation {op.label}", op)
+        left = self.evaluate(node.left)
+        short_circuit = SHORT_CIRCUIT_OPERATIONS.get(op.label)
+        if short_circuit is not None:
+            # and/or only evaluate their right operand when the left one
+            # doesn't decide the result.
+            if bool(left) is short_circuit:
+                return left
+            return self.evaluate(node.right)
+        return handler(left, self.evaluate(node.right))
+
+    def call_main(self, args):
+        """
+            Calls the program's main function with command line arguments
+            converted to Chestnut literals. Returns False if there is no main.
+        """
+        if "main" not in self.function_register.functions:
+            return False
+
+        argtokens = []
+        for x in args:
+            t = Token("Placeholder", x, 0, 0)
+            if len(argtokens) > 0:
+                argtokens.append(Token("Comma", ",", 0, 0))
+
+            if x == "false" or x == "true":
+                t.label = "Boolean"
+                t.data = ChestnutBoolean(t.data == "true")
+            elif x == "null":
+                t.label = "Null"
+                t.data = CHESTNUT_NULL
+            elif x.isnumeric():
+                t.label = "Integer"
+                t.data = ChestnutInteger(int(t.data))
+            else:
+                try:
+                    fval = float(t.data)
+                    t.label = "Float"
+                    t.data = ChestnutFloat(fval)
+                except:
+                    t.label = "String"
+                    t.data = ChestnutString(t.data)
+            argtokens.append(t)
+
+        identifier = Token("Identifier", "main", 0, 1, "<interpreter>")
+        lparen = Token("LParen", "(", 0, 5, "<interpreter>")
+        rparen = Token("RParen", ")", 0, 6, "<interpreter>")
+        tokens = [identifier, lparen]
+        tokens.extend(argtokens)
+        tokens.append(rparen)
+        p = Parser(tokens, 1)
+        expr = p.parse_expression()
+        self.evaluate(expr)
+        return True
+
+    def build_dispatch_table(self):
+        # Bind every visit_<ClassName> handler to its node class up front so
+        # evaluate() only needs a single dict lookup per node.
+        dispatch = {}
+        for attr in dir(type(self)):
+            if not attr.startswith("visit_"):
+                continue
+            node_class = globals().get(attr[len("visit_"):])
+            if isinstance(node_class, type):
+                dispatch[node_class] = getattr(self, attr)
+        return dispatch
+
+    @classmethod
+    def handler_attributes(cls, prefix):
+        # The name of the <prefix><label> operator handler of each label.
+        return {
+            attr[len(prefix):]: attr
+            for attr in dir(cls) if attr.startswith(prefix)
+        }
+
+    def build_handler_table(self, prefix):
+        # Bind every <prefix><label> operator handler to its operator label
+        # so operations don't format and look up the method name each time.
+        return {
+            label: getattr(self, attr)
+            for label, attr in self.handler_attributes(prefix).items()
+        }
+
+    def resolve_visitor(self, node_class):
+        # Classes that weren't known when the table was built (e.g. classes
+        # defined after import) are resolved by name once and then cached.
+        visitor_method = f"visit_{node_class.__name__}"
+        if not hasattr(self, visitor_method):
+            raise RuntimeException(f"Can't evaluate unknown node type {node_class}")
+        handler = getattr(self, visitor_method)
+        self.dispatch[node_class] = handler
+        return handler
 
     def evaluate(self, node):
-        _VMS.clear()
-        _VMS.append(self)
-        if id(node) in self.expression_cache and isinstance(node, PropertyAccessNode):
-            return self.expression_cache[id(node)]
-        visitor_method = f"visit_{node.__class__.__name__}"
-        if hasattr(self, visitor_method):
-            result = getattr(self, visitor_method)(node)
-            self.expression_cache[id(node)] = result
-
-            return result 
-        else:
-            raise RuntimeException(f"Can't evaluate unknown node type {type(node)}")
+        handler = self.dispatch.get(node.__class__)
+        if handler is None:
+            handler = self.resolve_visitor(node.__class__)
+        return handler(node)
+
+# Python classes visible to the evaluator that parameters may name directly
+# (e.g. StructNode), used when a type isn't a Chestnut type in TYPE_MAPPING.
+INTERNAL_TYPES = { name: value for name, value in list(globals().items()) if isinstance(value, type) }
@@ -1,93 +1,26 @@
-from cffi import FFI
-import os
-
-ffibuilder = FFI()
-
-# 1. Define ONLY what we are testing right now
-ffibuilder.cdef("""
-    typedef uint8_t chestnut_uint8_t;
-    typedef uint16_t chestnut_uint16_t;
-    typedef uint32_t chestnut_uint32_t;
-    typedef uint64_t chestnut_uint64_t;
-
-    typedef struct {
-        chestnut_uint64_t limbs[2];
-    } chestnut_uint128_t;
-
-    typedef struct {
-        chestnut_uint64_t limbs[4];
-    } chestnut_uint256_t;
-
-    typedef struct {
-        chestnut_uint64_t limbs[8];
-    } chestnut_uint512_t;
-
-    typedef struct {
-        chestnut_uint64_t limbs[16];
-    } chestnut_uint1024_t;
-
-    chestnut_uint8_t chestnut_uint128_t_add(chestnut_uint128_t *c, const chestnut_uint128_t *a, const chestnut_uint128_t *b);
-    chestnut_uint8_t chestnut_uint128_t_sub(chestnut_uint128_t *c, const chestnut_uint128_t *a, const chestnut_uint128_t *b);
-    chestnut_uint8_t chestnut_uint128_t_mul(chestnut_uint128_t *c, const chestnut_uint128_t *a, const chestnut_uint128_t *b);
-
-    chestnut_uint8_t chestnut_uint256_t_add(chestnut_uint256_t *c, const chestnut_uint256_t *a, const chestnut_uint256_t *b);
-    chestnut_uint8_t chestnut_uint256_t_sub(chestnut_uint256_t *c, const chestnut_uint256_t *a, const chestnut_uint256_t *b);
-    chestnut_uint8_t chestnut_uint256_t_mul(chestnut_uint256_t *c, const chestnut_uint256_t *a, const chestnut_uint256_t *b);
+# Builds the chestnut_native extension module from c/chestnut_native.c and
+# c/lib/int.c, next to chestnut_types.py which uses it when it's there.
+#
+# Usage: python3 generate_bindings.py
 
-    chestnut_uint8_t chestnut_uint512_t_add(chestnut_uint512_t *c, const chestnut_uint512_t *a, const chestnut_uint512_t *b);
-    chestnut_uint8_t chestnut_uint512_t_sub(chestnut_uint512_t *c, const chestnut_uint512_t *a, const chestnut_uint512_t *b);
-    chestnut_uint8_t chestnut_uint512_t_mul(chestnut_uint512_t *c, const chestnut_uint512_t *a, const chestnut_uint512_t *b);
-
-    chestnut_uint8_t chestnut_uint1024_t_add(chestnut_uint1024_t *c, const chestnut_uint1024_t *a, const chestnut_uint1024_t *b);
-    chestnut_uint8_t chestnut_uint1024_t_sub(chestnut_uint1024_t *c, const chestnut_uint1024_t *a, const chestnut_uint1024_t *b);
-    chestnut_uint8_t chestnut_uint1024_t_mul(chestnut_uint1024_t *c, const chestnut_uint1024_t *a, const chestnut_uint1024_t *b);
-""")
-
-ffibuilder.set_source("chestnut_c_binding", 
-    """
-    #include <stdint.h>
-    #include <stddef.h>
-    
-    typedef uint8_t chestnut_uint8_t;
-    typedef uint16_t chestnut_uint16_t;
-    typedef uint32_t chestnut_uint32_t;
-    typedef uint64_t chestnut_uint64_t;
-
-    typedef struct {
-        _Alignas(16) chestnut_uint64_t limbs[2];
-    } chestnut_uint128_t;
-
-    typedef struct {
-        _Alignas(32) chestnut_uint64_t limbs[4];
-    } chestnut_uint256_t;
-
-    typedef struct {
-        _Alignas(64) chestnut_uint64_t limbs[8];
-    } chestnut_uint512_t;
-
-    typedef struct {
-        _Alignas(64) chestnut_uint64_t limbs[16];
-    } chestnut_uint1024_t;
-
-    chestnut_uint8_t chestnut_uint128_t_add(chestnut_uint128_t *c, const chestnut_uint128_t *a, const chestnut_uint128_t *b);
-    chestnut_uint8_t chestnut_uint128_t_sub(chestnut_uint128_t *c, const chestnut_uint128_t *a, const chestnut_uint128_t *b);
-    chestnut_uint8_t chestnut_uint128_t_mul(chestnut_uint128_t *c, const chestnut_uint128_t *a, const chestnut_uint128_t *b);
-
-    chestnut_uint8_t chestnut_uint256_t_add(chestnut_uint256_t *c, const chestnut_uint256_t *a, const chestnut_uint256_t *b);
-    chestnut_uint8_t chestnut_uint256_t_sub(chestnut_uint256_t *c, const chestnut_uint256_t *a, const chestnut_uint256_t *b);
-    chestnut_uint8_t chestnut_uint256_t_mul(chestnut_uint256_t *c, const chestnut_uint256_t *a, const chestnut_uint256_t *b);
+import os
+from setuptools import setup, Extension
 
-    chestnut_uint8_t chestnut_uint512_t_add(chestnut_uint512_t *c, const chestnut_uint512_t *a, const chestnut_uint512_t *b);
-    chestnut_uint8_t chestnut_uint512_t_sub(chestnut_uint512_t *c, const chestnut_uint512_t *a, const chestnut_uint512_t *b);
-    chestnut_uint8_t chestnut_uint512_t_mul(chestnut_uint512_t *c, const chestnut_uint512_t *a, const chestnut_uint512_t *b);
+ROOT = os.path.dirname(os.path.realpath(__file__))
 
-    chestnut_uint8_t chestnut_uint1024_t_add(chestnut_uint1024_t *c, const chestnut_uint1024_t *a, const chestnut_uint1024_t *b);
-    chestnut_uint8_t chestnut_uint1024_t_sub(chestnut_uint1024_t *c, const chestnut_uint1024_t *a, const chestnut_uint1024_t *b);
-    chestnut_uint8_t chestnut_uint1024_t_mul(chestnut_uint1024_t *c, const chestnut_uint1024_t *a, const chestnut_uint1024_t *b);
-    """,
-    extra_objects=[os.path.abspath("/home/lumpywizard/Projects/Python/chestnut/c/lib/int.o")]
+extension = Extension(
+    "chestnut_native",
+    sources=[os.path.join("c", "chestnut_native.c")],
+    # Included by chestnut_native.c, so changes to them rebuild it too.
+    depends=[os.path.join("c", "lib", "int.c"), os.path.join("c", "lib", "int.h")],
+    extra_compile_args=["-O2"],
 )
 
 if __name__ == "__main__":
-    ffibuilder.compile(verbose=True)
+    os.chdir(ROOT)
+    setup(
+        name="chestnut_native",
+        ext_modules=[extension],
+        script_args=["build_ext", "--inplace", "--build-temp", os.path.join("build", "temp")],
+    )
     print("\n✨ The tiny bridge is built! ✨")
@@ -79,7 +79,7 @@ token_trie.insert("unless", "Unless")
 token_trie.insert("break", "Break")
 token_trie.insert("endfn", "Endfn")
 token_trie.insert("endif", "Endif")
-token_trie.insert("false", "Boolean", ChestnutBoolean(False))
+token_trie.insert("false", "Boolean", CHESTNUT_FALSE)
 token_trie.insert("outer", "Outer")
 token_trie.insert("until", "Until")
 token_trie.insert("while", "While")
@@ -91,7 +91,7 @@ token_trie.insert("else", "Else")
 token_trie.insert("enum", "Enum")
 token_trie.insert("loop", "Loop")
 token_trie.insert("over", "Over")
-token_trie.insert("true", "Boolean", ChestnutBoolean(True))
+token_trie.insert("true", "Boolean", CHESTNUT_TRUE)
 token_trie.insert("with", "With")
 token_trie.insert("when", "When")
 
@@ -142,6 +142,7 @@ token_trie.insert(":", "Colon")
 token_trie.insert(",", "Comma")
 token_trie.insert("/", "Division")
 token_trie.insert("[", "LBrace")
+token_trie.insert("{", "LCurly")
 token_trie.insert("(", "LParen")
 token_trie.insert("<", "Lt")
 token_trie.insert(">", "Gt")
@@ -149,6 +150,7 @@ token_trie.insert("*", "Multiplication")
 token_trie.insert("!", "Not")
 token_trie.insert(".", "Period")
 token_trie.insert("]", "RBrace")
+token_trie.insert("}", "RCurly")
 token_trie.insert(")", "RParen")
 token_trie.insert("-", "Subtraction")
 token_trie.insert(";", "Semicolon")
@@ -394,9 +396,9 @@ def is_identifier(c):
     symbol_blacklist = [
         ord("."), ord("="), ord("+"), ord("-"), ord("/"),
         ord("*"), ord("%"), ord("^"), ord("("), ord(")"),
-        ord("["), ord("]"), ord(","), ord(":"), ord("!"),
-        ord("<"), ord(">"), ord("#"), ord('"'), ord("~"),
-        ord("|"), ord(";"),
+        ord("["), ord("]"), ord("{"), ord("}"), ord(","),
+        ord(":"), ord("!"), ord("<"), ord(">"), ord("#"),
+        ord('"'), ord("~"), ord("|"), ord(";"),
         ord("\u200b"), ord("\u200c"), ord("\u200d"), ord("\u2060"),
         ord("\u200e"), ord("\u200f"), ord("\u202a"), ord("\u202b"),
         ord("\u202c"), ord("\u202d"), ord("\u202e"), ord("\u00a0"),
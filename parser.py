@@ -96,6 +96,11 @@ class ShadowStatementNode:
         return self.label.data
 
 class LoopindexExpressionNode():
+    # Scopes between the innermost one and the root scope of the loop this
+    # reads the index of, set by the Analyzer when the loop is in the same
+    # function body.
+    address = None
+
     def __repr__(self):
         return "LoopindexExpressionNode"
 
@@ -153,6 +158,10 @@ class ElseStatementNode:
         return "else"
 
 class BaseFn:
+    # Names the body may look up in the scopes of its callers, set by the
+    # Analyzer. None if the function wasn't analyzed.
+    free_names = None
+
     def __init__(self, parameters, statements, return_types=None, brings=[], alias=None, shape=[]):
         self.parameters = parameters
         self.statements = statements
@@ -252,7 +261,12 @@ class OtherwiseStatementNode:
     def get_name(self):
         return "otherwise"
 
-class UntilStatementNode:
+class BaseLoop:
+    # Set by the Analyzer when nothing in the body can keep a reference to
+    # the scope of a pass, so one scope can be reused for every pass.
+    reuse_scope = False
+
+class UntilStatementNode(BaseLoop):
     def __init__(self, condition, statements):
         self.condition = condition
         self.statements = statements
@@ -263,7 +277,7 @@ class UntilStatementNode:
     def get_name(self):
         return "until"
 
-class WhileStatementNode:
+class WhileStatementNode(BaseLoop):
     def __init__(self, condition, statements):
         self.condition = condition
         self.statements = statements
@@ -274,7 +288,7 @@ class WhileStatementNode:
     def get_name(self):
         return "while"
 
-class ForStatementNode:
+class ForStatementNode(BaseLoop):
     def __init__(self, subject, identifier, statements):
         self.subject = subject
         self.identifier = identifier
@@ -286,7 +300,7 @@ class ForStatementNode:
     def get_name(self):
         return "for"
 
-class LoopStatementNode:
+class LoopStatementNode(BaseLoop):
     def __init__(self, statements):
         self.statements = statements
 
@@ -314,6 +328,16 @@ class TupleLiteralNode:
     def get_name(self):
         return "Tuple"
 
+class MapLiteralNode:
+    def __init__(self, keys, values):
+        self.keys = keys
+        self.values = values
+    def __repr__(self):
+        return f"MapLiteralNode({list(zip(self.keys, self.values))})"
+
+    def get_name(self):
+        return "Map"
+
 class IndexAccessNode:
     def __init__(self, target, index):
         self.target = target
@@ -365,6 +389,12 @@ class TernaryExpressionNode():
         return f"TernaryExpressionNode(<{self.condition}>, <{self.left}>, <{self.right}>)"
 
 class CallStatementNode:
+    # Set by the Analyzer on the call of a `return f(...)` statement in a
+    # function body, outside of any loop.
+    tail = False
+    # The evaluator's InlineCache for this call site, made on first use.
+    inline_cache = None
+
     def __init__(self, identifier, params):
         self.identifier = identifier
         self.params = params
@@ -401,6 +431,9 @@ class StructPropertyNode():
         return f"StructPropertyNode(<{self.identifier}>, <{self.value_type}>, <{self.attributes}>)"
 
 class PropertyAccessNode():
+    # The evaluator's InlineCache for this access, made on first use.
+    inline_cache = None
+
     def __init__(self, identifier, property_identifier):
         self.identifier = identifier
         self.property_identifier = property_identifier
@@ -409,6 +442,9 @@ class PropertyAccessNode():
         return f"PropertyAccessNode(<{self.identifier}>, <{self.property_identifier}>)"
 
 class PropertyAssignmentNode():
+    # The evaluator's InlineCache for this assignment, made on first use.
+    inline_cache = None
+
     def __init__(self, identifier, property_identifier, op, value_expression):
         self.identifier = identifier
         self.property_identifier = property_identifier
@@ -557,12 +593,13 @@ class Parser:
                     self.consume() # Negative number
                     negative = -1
                 val = self.consume()
-                val.data.value = val.data.value * negative
-                if val.data.value in values_used:
-                    raise SyntaxException(f"Cannot reuse Integer for enum value {val.data}", item)
-                values_used.append(val.data.value)
-                last_used = val.data.value
-                items[item.data] = ChestnutInteger(val.data.value)
+                # Literal values are shared, so the sign is applied to a copy.
+                value = val.data.value * negative
+                if value in values_used:
+                    raise SyntaxException(f"Cannot reuse Integer for enum value {value}", item)
+                values_used.append(value)
+                last_used = value
+                items[item.data] = ChestnutInteger(value)
             else:
                 use_index = last_used + 1
                 while use_index in values_used:
@@ -1233,6 +1270,33 @@ class Parser:
         self.consume() # Consume the right brace.
         return ListLiteralNode(elements)
 
+    def parse_map_literal(self):
+        self.consume() # Consume {
+
+        keys = []
+        values = []
+        if self.check_label("RCurly"):
+            self.consume()
+            return MapLiteralNode(keys, values)
+
+        while True:
+            keys.append(self.parse_expression())
+            if not self.check_label("Colon"):
+                raise SyntaxException(f"Expect ':' after a key in a map literal", self.peek())
+            self.consume()
+            values.append(self.parse_expression())
+            if not self.check_label("Comma"):
+                break
+            self.consume()
+            if self.check_label("RCurly"):
+                raise SyntaxException(f"Unexpected trailing comma in map", self.peek())
+
+        if not self.check_label("RCurly"):
+            raise SyntaxException(f"Expect '}}' at the end of a map literal", self.peek())
+
+        self.consume() # Consume }
+        return MapLiteralNode(keys, values)
+
     def parse_index_access(self, target):
         self.consume() # Consume [
 
@@ -1356,12 +1420,14 @@ class Parser:
         elif self.check_label("String"):
             return ChestnutString(self.consume())
         elif self.check_label("Null"):
-            return ChestnutNull(self.consume())
+            self.consume()
+            return CHESTNUT_NULL
         elif self.check_label("NaN"):
             self.consume()
             return CHESTNUT_NAN
         elif self.check_label("Undefined"):
-            return ChestnutUndefined(self.consume())
+            self.consume()
+            return CHESTNUT_UNDEFINED
 
 
         elif token and token.label == "Fn":
@@ -1397,6 +1463,8 @@ class Parser:
                 return identifier
         elif self.check_label("LBrace"):
             return self.parse_list_literal()
+        elif self.check_label("LCurly"):
+            return self.parse_map_literal()
         elif self.check_label('LParen'):
             return self.parse_paren_expression()
         else:
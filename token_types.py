@@ -1,4 +1,8 @@
 class Token:
+    # Scopes between the innermost one and the scope declaring this
+    # identifier, set by the Analyzer when it can be resolved statically.
+    address = None
+
     def __init__(self, label, data, line, column, filename="unset"):
         self.label = label
         self.data = data
@@ -0,0 +1,677 @@
+import hashlib
+import os
+import pickle
+import sys
+
+from analyzer import Analyzer, DYNAMIC_LOOKUP_NODES, INDEX_ASSIGNMENT_OPERATIONS, statement_labels
+from bytecode import LITERAL_TYPES, negate, logical_not, bitwise_not, spread
+from evaluator import *
+
+CHESTNUT_HOME = os.path.dirname(os.path.realpath(__file__))
+
+# Binary operations whose evaluator handler is exactly the Python operator.
+PYTHON_OPERATORS = {
+    "Eq": "==",
+    "Neq": "!=",
+    "Lte": "<=",
+    "Lt": "<",
+    "Gt": ">",
+    "Gte": ">=",
+    "BitwiseAnd": "&",
+    "BitwiseOr": "|",
+    "BitwiseXor": "^",
+    "BitwiseShiftLeft": "<<",
+    "BitwiseShiftRight": ">>",
+    "Addition": "+",
+    "Subtraction": "-",
+    "Multiplication": "*",
+    "Modulo": "%",
+    "Exponent": "**",
+    # Python's and/or short-circuit and result in an operand like Chestnut's.
+    "And": "and",
+    "Or": "or",
+}
+
+# The name of the Evaluator's handler for each binary operation, from the
+# table its instances bind.
+BINARY_HANDLERS = Evaluator.handler_attributes("_handle_binary_")
+
+UNARY_FUNCTIONS = {
+    "Subtraction": "negate",
+    "Not": "logical_not",
+    "BitwiseNot": "bitwise_not",
+    "Spread": "spread",
+}
+
+ASSIGNMENT_OPERATORS = {
+    "Assignment": "=",
+    "Addassign": "+=",
+    "Subassign": "-=",
+    "Mulassign": "*=",
+    "Divassign": "/=",
+}
+
+# Runtime support for generated modules.
+
+def node_at(ast, path):
+    """
+        Follows a path of list indexes and attribute names from the program.
+    """
+    node = ast
+    for step in path:
+        if isinstance(step, int):
+            node = node[step]
+        else:
+            node = getattr(node, step)
+    return node
+
+def function_nodes(node, path=()):
+    """
+        Yields (node, path) for every function, struct method and anonymous
+        function in a syntax tree, including nested ones.
+    """
+    if isinstance(node, DYNAMIC_LOOKUP_NODES):
+        yield node, path
+    if isinstance(node, (list, tuple)):
+        for i, item in enumerate(node):
+            yield from function_nodes(item, path + (i,))
+    elif hasattr(node, "__dict__") and not isinstance(node, (Token, ChestnutAny)):
+        for name, item in vars(node).items():
+            yield from function_nodes(item, path + (name,))
+
+def source_digest(source):
+    return hashlib.sha256(source.encode("utf-8")).hexdigest()
+
+def call(ev, node, entered, callable, *args):
+    # entered is the result of ev.enter_call(), passed first so the call depth
+    # is raised before the callee and arguments are evaluated.
+    finalized_args = []
+    for value in args:
+        if isinstance(value, SpreadArgs):
+            finalized_args.extend(value.args)
+        else:
+            finalized_args.append(value)
+    return ev.invoke(node, callable, finalized_args)
+
+def tail_call(ev, node, entered, callable, *args):
+    # Like call, for `return f(...)`: the run_frame the body returns to makes
+    # the call, in place of the body's frame if it can.
+    finalized_args = []
+    for value in args:
+        if isinstance(value, SpreadArgs):
+            finalized_args.extend(value.args)
+        else:
+            finalized_args.append(value)
+    return TailCall(node, callable, finalized_args)
+
+def unwind(ev, base):
+    del ev.scopes[base:]
+
+class TranspiledEvaluator(Evaluator):
+    """
+        Runs the function bodies of a transpiled module as the Python
+        functions generated for them. Everything else, including bodies the
+        module doesn't cover, runs on the Evaluator.
+    """
+
+    def __init__(self, libraries):
+        # Maps the real path of each library module to the digest of the
+        # source it was transpiled from, its pickled syntax tree and the
+        # build function of its bodies.
+        self.libraries = libraries
+        self.compiled_bodies = {}
+        super().__init__()
+
+    def load_module(self, path):
+        library = self.libraries.get(os.path.realpath(path))
+        if library is None:
+            return super().load_module(path)
+        with open(path) as module:
+            source = module.read()
+        digest, pickled_ast, build = library
+        if source_digest(source) != digest:
+            # A module edited since it was transpiled is interpreted instead.
+            return super().load_module(path)
+        ast = pickle.loads(pickled_ast)
+        self.compiled_bodies.update(build(self, ast))
+        return ast
+
+    def run_function_body(self, func):
+        body = self.compiled_bodies.get(func.statement)
+        if body is None:
+            return super().run_function_body(func)
+        return body()
+
+def run(pickled_ast, build, libraries, args):
+    """
+        Entry point of a transpiled module. Syntax trees are shipped pickled
+        so declarations and interpreted statements can use them without
+        lexing and parsing the program again.
+    """
+    ast = pickle.loads(pickled_ast)
+    evaluator = TranspiledEvaluator(libraries)
+    evaluator.compiled_bodies.update(build(evaluator, ast))
+    with RecursionLimit(evaluator):
+        for node in ast:
+            evaluator.evaluate(node)
+        if not evaluator.call_main(args):
+            print("No main function defined.")
+
+class FunctionTranspiler:
+    """
+        Generates the Python function for one Chestnut function body. Scopes
+        are pushed and popped exactly where the Evaluator does, names the
+        Analyzer proved private to the body become Python locals, and nodes
+        without a translation are evaluated by the interpreter.
+    """
+
+    def __init__(self, module, statement, local_names):
+        self.module = module
+        self.statement_node = statement
+        self.local_names = local_names
+        self.lines = []
+        self.depth = 1
+        # Suffixes of the loops enclosing the current statement in this body.
+        self.loops = []
+        self.counter = 0
+
+    def emit(self, line):
+        self.lines.append("    " * self.depth + line)
+
+    def next_id(self):
+        self.counter += 1
+        return self.counter
+
+    def reference(self, path):
+        return self.module.reference(path)
+
+    def local(self, name):
+        return f"l_{name}"
+
+    def transpile(self, name, path):
+        self.emit(f"def {name}():")
+        self.depth += 1
+        params = [ p.name.data for p in self.statement_node.parameters if p.name.data in self.local_names ]
+        if len(params) > 0:
+            self.emit("scope = scopes[-1]")
+            for param in params:
+                self.emit(f"{self.local(param)} = scope[{param!r}]")
+        self.statements(self.statement_node.statements, path + ("statements",))
+        self.emit("return None")
+        self.depth -= 1
+        return self.lines
+
+    def statements(self, statements, path):
+        for i, statement in enumerate(statements):
+            self.statement(statement, path + (i,))
+
+    def block(self, statements, path):
+        self.depth += 1
+        self.scoped_statements(statements, path)
+        self.depth -= 1
+
+    def scoped_statements(self, statements, path):
+        self.emit("ev.push_scope()")
+        self.statements(statements, path)
+        if not self.terminated():
+            self.emit("ev.pop_scope()")
+
+    def terminated(self):
+        # True when the last line emitted at the current depth leaves the
+        # block, so code after it would never run.
+        line = self.lines[-1]
+        indent = "    " * self.depth
+        if not line.startswith(indent) or line[len(indent)] == " ":
+            return False
+        return line.split()[0] in ("return", "break", "continue")
+
+    def statement(self, node, path):
+        method = self.statement_dispatch.get(node.__class__)
+        if method is None:
+            self.execute(path)
+        else:
+            method(self, node, path)
+
+    def execute(self, path):
+        self.emit(f"ev.evaluate({self.reference(path)})")
+
+    def statement_ExpressionStatementNode(self, node, path):
+        expression = node.expression
+        expression_path = path + ("expression",)
+        if isinstance(expression, IndexAssignNode) and expression.op.label in INDEX_ASSIGNMENT_OPERATIONS:
+            n = self.reference(expression_path)
+            target = self.expression(expression.identifier, expression_path + ("identifier",))
+            index = self.expression(expression.index, expression_path + ("index",))
+            value = self.expression(expression.value, expression_path + ("value",))
+            self.emit(f"_t = ev.index_assignment_target({n}, {target})")
+            self.emit(f"_i = ev.index_assignment_index({n}, _t, {index})")
+            self.emit(f"_t[_i] {ASSIGNMENT_OPERATORS[expression.op.label]} {value}")
+        else:
+            self.emit(self.expression(expression, expression_path))
+
+    def statement_LetStatementNode(self, node, path):
+        n = self.reference(path)
+        labels = statement_labels(node)
+        expression = self.expression(node.expression, path + ("expression",))
+        if not any(label.data in self.local_names for label in labels):
+            self.emit(f"ev.bind_let(ev.let_labels({n}), {expression})")
+            return
+        self.emit(f"ev.let_labels({n})")
+        if len(labels) == 1:
+            self.emit(f"{self.local(labels[0].data)} = ev.let_values(1, {expression})[0]")
+            return
+        self.emit(f"_v = ev.let_values({len(labels)}, {expression})")
+        for i, label in enumerate(labels):
+            if label.data in self.local_names:
+                self.emit(f"{self.local(label.data)} = _v[{i}]")
+            else:
+                self.emit(f"scopes[-1][{label.data!r}] = _v[{i}]")
+
+    def statement_ConstantStatementNode(self, node, path):
+        expression = self.expression(node.expression, path + ("expression",))
+        self.emit(f"ev.bind_constant(ev.constant_labels({self.reference(path)}), {expression})")
+
+    def statement_ShadowStatementNode(self, node, path):
+        expression = self.expression(node.expression, path + ("expression",))
+        self.emit(f"ev.bind_shadow(ev.shadow_labels({self.reference(path)}), {expression})")
+
+    def statement_AssignStatementNode(self, node, path):
+        expression = self.expression(node.expression, path + ("expression",))
+        name = node.identifier.data
+        if name not in self.local_names:
+            n = self.reference(path)
+            self.emit(f"ev.bind_assignment({n}, ev.assignment_scope({n}), {expression})")
+            return
+        # Constants are never locals, so a local can always be assigned.
+        operator = ASSIGNMENT_OPERATORS.get(node.op.label)
+        if operator is None:
+            # The evaluator ignores unknown assignment operations.
+            self.emit(expression)
+        else:
+            self.emit(f"{self.local(name)} {operator} {expression}")
+
+    def statement_ReturnStatementNode(self, node, path):
+        try:
+            returns_value = Evaluator.returns_value(node)
+        except Exception:
+            # Let the evaluator raise the same error when the return runs.
+            self.execute(path)
+            return
+        if isinstance(node.expression, CallStatementNode) and node.expression.tail:
+            self.emit(f"return {self.call(node.expression, path + ('expression',), 'tail_call')}")
+        elif returns_value:
+            self.emit(f"return ReturnValue({self.expression(node.expression, path + ('expression',))})")
+        else:
+            self.emit("return ReturnValue(None)")
+
+    def statement_BreakStatementNode(self, node, path):
+        if len(self.loops) == 0:
+            # Outside of a loop in this body the signal ends the call, which
+            # reports it as an error.
+            self.emit("return BREAK_LOOP")
+            return
+        self.emit(f"unwind(ev, _base{self.loops[-1]})")
+        self.emit("break")
+
+    def statement_ContinueStatementNode(self, node, path):
+        if len(self.loops) == 0:
+            self.emit("return CONTINUE_LOOP")
+            return
+        self.next_loop_index(self.loops[-1])
+        self.emit(f"unwind(ev, _base{self.loops[-1]})")
+        self.emit("continue")
+
+    def statement_IfStatementNode(self, node, path):
+        condition = self.expression(node.condition_expression, path + ("condition_expression",))
+        self.emit(f"if {condition}:")
+        self.block(node.block_statements, path + ("block_statements",))
+        for i, elif_block in enumerate(node.elif_blocks):
+            elif_path = path + ("elif_blocks", i)
+            condition = self.expression(elif_block.condition_expression, elif_path + ("condition_expression",))
+            self.emit(f"elif {condition}:")
+            self.block(elif_block.block_statements, elif_path + ("block_statements",))
+        if node.else_block:
+            self.emit("else:")
+            self.block(node.else_block.block_statements, path + ("else_block", "block_statements"))
+
+    def statement_CaseStatementNode(self, node, path):
+        subject = f"_s{self.next_id()}"
+        self.emit(f"{subject} = {self.expression(node.subject, path + ('subject',))}")
+        keyword = "if"
+        for i, when_block in enumerate(node.when_blocks):
+            when_path = path + ("when_blocks", i)
+            conditions = [ f"{subject} == {self.expression(c, when_path + ('conditions', j))}"
+                for j, c in enumerate(when_block.conditions) ]
+            self.emit(f"{keyword} {' or '.join(f'({c})' for c in conditions)}:")
+            self.block(when_block.statements, when_path + ("statements",))
+            keyword = "elif"
+        if node.otherwise:
+            otherwise_path = path + ("otherwise", "statements")
+            if keyword == "if":
+                self.scoped_statements(node.otherwise.statements, otherwise_path)
+            else:
+                self.emit("else:")
+                self.block(node.otherwise.statements, otherwise_path)
+
+    def next_loop_index(self, loop):
+        self.emit(f"_loop{loop}.index += 1")
+
+    def loop(self, node, path, header, subject=None):
+        """
+            Emits a loop with the Evaluator's scope layout: a root scope that
+            holds the loop's LoopState and a scope for every pass of the body.
+            header is called with the loop's id once the root scope exists.
+        """
+        k = self.next_id()
+        self.emit("ev.push_scope()")
+        if subject is not None:
+            self.emit(f"_subject{k} = {subject}")
+        self.emit(f"_loop{k} = LoopState(scopes[-1], {node.reuse_scope})")
+        self.emit(f"_base{k} = len(scopes)")
+        self.loops.append(k)
+        self.emit(header(k))
+        self.depth += 1
+        self.emit(f"ev.push_pass_scope(_loop{k})")
+        if isinstance(node, ForStatementNode) and node.identifier.data not in self.local_names:
+            self.emit(f"scopes[-1][{node.identifier.data!r}] = _element{k}")
+        self.statements(node.statements, path + ("statements",))
+        if not self.terminated():
+            self.emit("ev.pop_scope()")
+            self.next_loop_index(k)
+        self.depth -= 1
+        self.loops.pop()
+        self.emit("ev.pop_scope()")
+        self.emit(f"del _loop{k}.root[\"loop index\"]")
+
+    def statement_LoopStatementNode(self, node, path):
+        self.loop(node, path, lambda k: "while True:")
+
+    def statement_WhileStatementNode(self, node, path):
+        condition_path = path + ("condition",)
+        self.loop(node, path, lambda k: f"while {self.expression(node.condition, condition_path)}:")
+
+    def statement_UntilStatementNode(self, node, path):
+        condition_path = path + ("condition",)
+        self.loop(node, path, lambda k:
+            f"while _loop{k}.index == 0 or not {self.expression(node.condition, condition_path)}:")
+
+    def statement_ForStatementNode(self, node, path):
+        # The subject is evaluated before the new loop index exists.
+        subject = self.expression(node.subject, path + ("subject",))
+        name = node.identifier.data
+        def header(k):
+            element = self.local(name) if name in self.local_names else f"_element{k}"
+            return f"for {element} in _subject{k}:"
+        self.loop(node, path, header, subject)
+
+    def expression(self, node, path):
+        """
+            Returns Python source computing the value of an expression node.
+        """
+        if node.__class__ in LITERAL_TYPES:
+            return self.module.constant(path)
+        if isinstance(node, Token) and node.label == "Identifier":
+            if node.data in self.local_names:
+                return self.local(node.data)
+            return f"ev.visit_Token({self.reference(path)})"
+        method = self.expression_dispatch.get(node.__class__)
+        if method is None:
+            return f"ev.evaluate({self.reference(path)})"
+        return method(self, node, path)
+
+    def expression_BinaryOperationNode(self, node, path):
+        label = node.op.label
+        handler = BINARY_HANDLERS.get(label)
+        if handler is None:
+            return f"ev.evaluate({self.reference(path)})"
+        left = self.expression(node.left, path + ("left",))
+        right = self.expression(node.right, path + ("right",))
+        operator = PYTHON_OPERATORS.get(label)
+        if operator is None:
+            return f"ev.{handler}({left}, {right})"
+        return f"({left} {operator} {right})"
+
+    def expression_UnaryOperationNode(self, node, path):
+        function = UNARY_FUNCTIONS.get(node.op.label)
+        if function is None:
+            # outer and unshadow inspect the scopes rather than a value.
+            return f"ev.evaluate({self.reference(path)})"
+        return f"{function}({self.expression(node.right, path + ('right',))})"
+
+    def expression_TernaryExpressionNode(self, node, path):
+        condition = self.expression(node.condition, path + ("condition",))
+        left = self.expression(node.left, path + ("left",))
+        right = self.expression(node.right, path + ("right",))
+        return f"({left} if {condition} else {right})"
+
+    def expression_UseExpressionNode(self, node, path):
+        left = self.expression(node.left, path + ("left",))
+        right = self.expression(node.right, path + ("right",))
+        if node.condition is not None:
+            condition = self.expression(node.condition, path + ("condition",))
+            return f"({right} if {condition} else {left})"
+        value = f"_u{self.next_id()}"
+        return f"({right} if isinstance(({value} := {left}), ChestnutNull) else {value})"
+
+    def elements(self, node, path):
+        return [ self.expression(e, path + ("elements", i)) for i, e in enumerate(node.elements) ]
+
+    def expression_ListLiteralNode(self, node, path):
+        return f"ChestnutList([{', '.join(self.elements(node, path))}])"
+
+    def expression_TupleLiteralNode(self, node, path):
+        elements = self.elements(node, path)
+        return f"ChestnutTuple(({''.join(e + ', ' for e in elements)}))"
+
+    def expression_MapLiteralNode(self, node, path):
+        keys = [ self.expression(k, path + ("keys", i)) for i, k in enumerate(node.keys) ]
+        values = [ self.expression(v, path + ("values", i)) for i, v in enumerate(node.values) ]
+        return f"ChestnutMap([{', '.join(f'({k}, {v})' for k, v in zip(keys, values))}])"
+
+    def expression_IndexAccessNode(self, node, path):
+        target = self.expression(node.target, path + ("target",))
+        index = self.expression(node.index, path + ("index",))
+        return f"ev.index_value({target}, {index})"
+
+    def expression_CallStatementNode(self, node, path):
+        return self.call(node, path, "call")
+
+    def call(self, node, path, helper):
+        callee = self.expression(node.identifier, path + ("identifier",))
+        args = [ self.expression(p, path + ("params", i)) for i, p in enumerate(node.params) ]
+        return f"{helper}(ev, {', '.join([self.reference(path), 'ev.enter_call()', callee] + args)})"
+
+    def expression_LoopindexExpressionNode(self, node, path):
+        if len(self.loops) == 0:
+            return f"ev.evaluate({self.reference(path)})"
+        return f"ChestnutInteger(_loop{self.loops[-1]}.index)"
+
+def build_dispatch_table(transpiler_class, prefix):
+    # Bind every <prefix><ClassName> method to its node class once, as the
+    # Evaluator does its visitors, so transpiling a node is one dict lookup.
+    dispatch = {}
+    for attr in dir(transpiler_class):
+        if not attr.startswith(prefix):
+            continue
+        node_class = globals().get(attr[len(prefix):])
+        if isinstance(node_class, type):
+            dispatch[node_class] = getattr(transpiler_class, attr)
+    return dispatch
+
+FunctionTranspiler.statement_dispatch = build_dispatch_table(FunctionTranspiler, "statement_")
+FunctionTranspiler.expression_dispatch = build_dispatch_table(FunctionTranspiler, "expression_")
+
+class ModuleTranspiler:
+    """
+        Generates the build function for one parsed Chestnut module. The build
+        function locates the nodes the generated code needs in a fresh parse
+        of the module and returns its transpiled bodies keyed by their
+        function statements.
+    """
+
+    def __init__(self, ast):
+        self.ast = ast
+        self.references = {}
+        self.constants = {}
+        self.preamble = []
+
+    def reference(self, path):
+        name = self.references.get(path)
+        if name is None:
+            name = f"_n{len(self.references)}"
+            self.references[path] = name
+            self.preamble.append(f"{name} = node_at(ast, {path!r})")
+        return name
+
+    def constant(self, path):
+        name = self.constants.get(path)
+        if name is None:
+            name = f"_c{len(self.constants)}"
+            self.constants[path] = name
+            self.preamble.append(f"{name} = ev.evaluate({self.reference(path)})")
+        return name
+
+    def function_name(self, statement, index):
+        name = "anonymous"
+        if isinstance(statement, StructFnStatementNode):
+            name = f"{statement.target_struct.paramtype.data}_{statement.name.data}"
+        elif isinstance(statement, FnStatementNode):
+            name = statement.name.data
+        if not name.isidentifier():
+            name = "body"
+        return f"fn_{name}_{index}"
+
+    def transpile(self, build_name, analyzer, dynamic_names):
+        functions = []
+        for index, (statement, path) in enumerate(function_nodes(self.ast)):
+            local_names = analyzer.analyze_function(statement).local_names(dynamic_names)
+            name = self.function_name(statement, index)
+            lines = FunctionTranspiler(self, statement, local_names).transpile(name, path)
+            functions.append((self.reference(path), name, lines))
+
+        module = [
+            f"def {build_name}(ev, ast):",
+            "    scopes = ev.scopes",
+        ]
+        module.extend("    " + line for line in self.preamble)
+        for _, _, lines in functions:
+            module.append("")
+            module.extend(lines)
+        module.append("")
+        module.append("    return {")
+        module.extend(f"        {node}: {name}," for node, name, _ in functions)
+        module.append("    }")
+        return module
+
+class Transpiler:
+    """
+        Translates a Chestnut program into a Python module. Every function,
+        struct method and anonymous function of the program, the core library
+        and the modules they import becomes a Python function; the rest of
+        the program is declared by the Evaluator when the module runs.
+    """
+
+    def __init__(self, filename, source):
+        self.filename = filename
+        self.ast = self.parse(source, filename)
+
+    @staticmethod
+    def parse(source, filename):
+        ast = Parser(lex(source, filename)).parse_program()
+        analyzer = Analyzer()
+        for node in ast:
+            analyzer.analyze(node)
+        return ast
+
+    def libraries(self):
+        """
+            Returns (path, source, ast) for the core library and every module
+            imported at the top level of the program or of those modules.
+        """
+        libraries = []
+        seen = set()
+        pending = ["lib/core.nuts"] + [ node.location.data for node in self.ast if isinstance(node, ImportStatementNode) ]
+        while len(pending) > 0:
+            path = os.path.realpath(Evaluator.resolve_module_path(pending.pop()))
+            if path in seen:
+                continue
+            seen.add(path)
+            with open(path) as module:
+                source = module.read()
+            ast = self.parse(source, path)
+            libraries.append((path, source, ast))
+            pending.extend(node.location.data for node in ast if isinstance(node, ImportStatementNode))
+        return libraries
+
+    def transpile(self):
+        """
+            Returns the source of the Python module.
+        """
+        libraries = self.libraries()
+        analyzer = Analyzer()
+        dynamic_names = analyzer.dynamic_names([self.ast] + [ ast for _, _, ast in libraries ])
+
+        module = [
+            f"# Generated by `chestnut compile` from {self.filename}. Do not edit.",
+            "import os",
+            "import sys",
+            "",
+            f"sys.path.insert(0, os.environ.get(\"CHESTNUT_HOME\", {CHESTNUT_HOME!r}))",
+            "",
+            "from transpiler import *",
+            "",
+            f"AST = {pickle.dumps(self.ast, pickle.HIGHEST_PROTOCOL)!r}",
+            "",
+        ]
+        module.extend(ModuleTranspiler(self.ast).transpile("build", analyzer, dynamic_names))
+        for i, (_, _, ast) in enumerate(libraries):
+            module.append("")
+            module.extend(ModuleTranspiler(ast).transpile(f"build_library_{i}", analyzer, dynamic_names))
+        module.append("")
+        module.append("LIBRARIES = {")
+        for i, (path, source, ast) in enumerate(libraries):
+            pickled_ast = pickle.dumps(ast, pickle.HIGHEST_PROTOCOL)
+            module.append(f"    {path!r}: ({source_digest(source)!r}, {pickled_ast!r}, build_library_{i}),")
+        module.extend([
+            "}",
+            "",
+            "def main(argv=None):",
+            "    run(AST, build, LIBRARIES, sys.argv[1:] if argv is None else argv)",
+            "",
+            "if __name__ == \"__main__\":",
+            "    main()",
+            "",
+        ])
+        return "\n".join(module)
+
+def compile_command(argv):
+    """
+        Implements `chestnut compile foo.nuts [-o foo_nuts.py]`. Returns the
+        process exit status.
+    """
+    source_path = None
+    output_path = None
+    while len(argv) > 0:
+        arg = argv.pop(0)
+        if arg == "-o":
+            if len(argv) == 0:
+                print("Missing output path after -o")
+                return 1
+            output_path = argv.pop(0)
+        elif source_path is None:
+            source_path = arg
+        else:
+            print(f"Unexpected argument {arg}")
+            return 1
+    if source_path is None:
+        print("Usage: chestnut compile foo.nuts [-o foo_nuts.py]")
+        return 1
+    if output_path is None:
+        root, _ = os.path.splitext(source_path)
+        output_path = f"{root}_nuts.py"
+
+    with open(source_path) as source:
+        module = Transpiler(source_path, source.read()).transpile()
+    with open(output_path, "w") as output:
+        output.write(module)
+    return 0
@@ -0,0 +1,284 @@
+from bytecode import *
+from evaluator import *
+
+class LoopBlock(LoopState):
+    """
+        Runtime state for a loop that is executing inside a CodeObject.
+    """
+
+    __slots__ = ("base_scopes", "stack_depth", "top", "body", "exit", "iterator")
+
+    def __init__(self, root_scope, base_scopes, stack_depth, targets, iterator=None):
+        self.top, self.body, self.exit, reuse_scope = targets
+        super().__init__(root_scope, reuse_scope)
+        self.base_scopes = base_scopes
+        self.stack_depth = stack_depth
+        self.iterator = iterator
+
+class VirtualMachine(Evaluator):
+    """
+        Runs function bodies as bytecode on a value stack instead of walking
+        their syntax trees. Declarations, top level statements and the call
+        protocol are shared with the Evaluator, so both engines see the same
+        scopes, overloads and structs. Calls between bytecode bodies are run
+        on an explicit stack of frames instead of recursing in Python.
+    """
+
+    # Calls made by bytecode don't use the Python stack, so they are only
+    # bounded by this limit and memory.
+    DEFAULT_MAX_CALL_DEPTH = 100000
+
+    def __init__(self):
+        self.code_objects = {}
+        super().__init__()
+
+    def python_recursion_limit(self):
+        # Only nodes left to the tree-walking evaluator recurse in Python.
+        # They get the stack the tree engine has at its default call depth.
+        depth = min(self.max_call_depth, Evaluator.DEFAULT_MAX_CALL_DEPTH)
+        return depth * PYTHON_FRAMES_PER_CALL
+
+    def compile(self, statement):
+        code = self.code_objects.get(statement)
+        if code is None:
+            code = BytecodeCompiler(self).compile_function(statement)
+            self.code_objects[statement] = code
+        return code
+
+    def run_function_body(self, func):
+        return self.execute(self.compile(func.statement))
+
+    def unwind_loop(self, block, stack):
+        del stack[block.stack_depth:]
+        del self.scopes[block.base_scopes:]
+
+    def execute(self, code):
+        """
+            Runs a CodeObject. Returns the Signal that ended it, or None if it
+            ran to completion.
+
+            Chestnut functions it calls run in the same loop: the caller's
+            frame, code, program counter, value stack and loop blocks are
+            saved on the callers stack until the callee returns, so call
+            depth doesn't grow the Python stack.
+        """
+        instructions = code.instructions
+        constants = code.constants
+        scopes = self.scopes
+        alias_names = self.alias_names
+        stack = []
+        blocks = []
+        # The Frame of the running callee. The frame of the code execute
+        # was started with belongs to invoke.
+        frame = None
+        callers = []
+        pc = 0
+        while True:
+            opcode, arg = instructions[pc]
+            pc += 1
+            # Opcodes are tested roughly in the order of how often they run.
+            if opcode == LOAD_NAME:
+                label = arg.data
+                address = arg.address
+                if address is not None and label not in alias_names:
+                    value = scopes[-1 - address][label]
+                else:
+                    for scope in reversed(scopes):
+                        if label in scope:
+                            value = scope[label]
+                            break
+                    else:
+                        raise Exception(f"Couldn't find symbol {label} at line {arg.line}, column {arg.column}")
+                if isinstance(value, BringVariable):
+                    value = value.__getitem__(None)
+                stack.append(value)
+            elif opcode == BINARY_OP:
+                right = stack.pop()
+                stack[-1] = arg(stack[-1], right)
+            elif opcode == LOAD_CONST:
+                stack.append(constants[arg])
+            elif opcode == LOAD_LOOP_INDEX:
+                stack.append(ChestnutInteger(blocks[-1].index))
+            elif opcode == ASSIGNMENT_SCOPE:
+                stack.append(self.assignment_scope(arg))
+            elif opcode == BIND_ASSIGNMENT:
+                value = stack.pop()
+                self.bind_assignment(arg, stack.pop(), value)
+            elif opcode == JUMP:
+                pc = arg
+            elif opcode == NEXT_ITERATION:
+                # The pass scope is never the global one, so this skips
+                # pop_scope's check.
+                scopes.pop()
+                blocks[-1].index += 1
+            elif opcode == PUSH_PASS_SCOPE:
+                scope = blocks[-1].pass_scope
+                if scope is None:
+                    scopes.append({})
+                else:
+                    scope.clear()
+                    scopes.append(scope)
+            elif opcode == POP_JUMP_IF_FALSE:
+                if not stack.pop():
+                    pc = arg
+            elif opcode == ENTER_CALL:
+                self.enter_call()
+            elif opcode == CALL or opcode == TAIL_CALL:
+                node, argc = arg
+                finalized_args = []
+                if argc > 0:
+                    for value in stack[-argc:]:
+                        if isinstance(value, SpreadArgs):
+                            finalized_args.extend(value.args)
+                        else:
+                            finalized_args.append(value)
+                    del stack[-argc:]
+                callable = stack.pop()
+                if opcode == TAIL_CALL and frame is None:
+                    # The frame of this code belongs to run_frame, which
+                    # makes the call in its place.
+                    return TailCall(node, callable, finalized_args)
+                callee = self.call_frame(node, callable, finalized_args)
+                if isinstance(callee, Frame):
+                    # Run the callee in this loop rather than recursing, and
+                    # resume here when it returns. A tail call that replaces
+                    # the running frame returns straight to its caller.
+                    if opcode == CALL or not self.replace_frame(frame, callee):
+                        callers.append((frame, code, pc, stack, blocks))
+                    frame = callee
+                    code = self.compile(callee.function.statement)
+                    instructions = code.instructions
+                    constants = code.constants
+                    pc = 0
+                    stack = []
+                    blocks = []
+                else:
+                    stack.append(callee)
+            elif opcode == RETURN_VALUE or opcode == RETURN_NONE:
+                signal = ReturnValue(stack.pop()) if opcode == RETURN_VALUE else None
+                if len(callers) == 0:
+                    return signal
+                value = self.return_from(frame, signal)
+                frame, code, pc, stack, blocks = callers.pop()
+                instructions = code.instructions
+                constants = code.constants
+                stack.append(value)
+            elif opcode == INDEX:
+                index = stack.pop()
+                stack[-1] = self.index_value(stack[-1], index)
+            elif opcode == LET_LABELS:
+                stack.append(self.let_labels(arg))
+            elif opcode == BIND_LET:
+                value = stack.pop()
+                self.bind_let(stack.pop(), value)
+            elif opcode == FOR_ITER:
+                identifier, exit = arg
+                try:
+                    element = next(blocks[-1].iterator)
+                except StopIteration:
+                    pc = exit
+                else:
+                    self.push_pass_scope(blocks[-1])
+                    scopes[-1][identifier.data] = element
+            elif opcode == POP_JUMP_IF_TRUE:
+                if stack.pop():
+                    pc = arg
+            elif opcode == JUMP_IF_FIRST_PASS:
+                if blocks[-1].index == 0:
+                    pc = arg
+            elif opcode == POP:
+                stack.pop()
+            elif opcode == EVAL:
+                stack.append(self.evaluate(arg))
+            elif opcode == EXEC:
+                signal = self.evaluate(arg)
+                if isinstance(signal, Signal):
+                    # Only break or continue outside of a loop in this body,
+                    # which return_from reports.
+                    if len(callers) == 0:
+                        return signal
+                    self.return_from(frame, signal)
+            elif opcode == LOAD_PROPERTY:
+                stack[-1] = self.property_value(arg, stack[-1])
+            elif opcode == INDEX_TARGET:
+                index = stack.pop()
+                target = self.index_assignment_target(arg, stack[-1])
+                stack.append(self.index_assignment_index(arg, target, index))
+            elif opcode == STORE_INDEX:
+                value = stack.pop()
+                index = stack.pop()
+                stack[-1] = self.bind_index(arg, stack[-1], index, value)
+            elif opcode == PROPERTY_SLOT:
+                stack.append(self.property_slot(arg, stack[-1]))
+            elif opcode == STORE_PROPERTY:
+                value = stack.pop()
+                slot = stack.pop()
+                stack[-1] = self.bind_property(arg, stack[-1], slot, value)
+            elif opcode == UNARY_OP:
+                stack[-1] = arg(stack[-1])
+            elif opcode == PUSH_SCOPE:
+                self.push_scope()
+            elif opcode == POP_SCOPE:
+                self.pop_scope()
+            elif opcode == JUMP_IF_FALSE_OR_POP:
+                if stack[-1]:
+                    stack.pop()
+                else:
+                    pc = arg
+            elif opcode == JUMP_IF_TRUE_OR_POP:
+                if stack[-1]:
+                    pc = arg
+                else:
+                    stack.pop()
+            elif opcode == JUMP_IF_NOT_NULL:
+                if isinstance(stack[-1], ChestnutNull):
+                    stack.pop()
+                else:
+                    pc = arg
+            elif opcode == CASE_MATCH:
+                value = stack.pop()
+                if stack[-1] == value:
+                    pc = arg
+            elif opcode == BUILD_LIST:
+                elements = stack[len(stack) - arg:]
+                del stack[len(stack) - arg:]
+                stack.append(ChestnutList(elements))
+            elif opcode == BUILD_TUPLE:
+                elements = tuple(stack[len(stack) - arg:])
+                del stack[len(stack) - arg:]
+                stack.append(ChestnutTuple(elements))
+            elif opcode == BUILD_MAP:
+                items = stack[len(stack) - 2 * arg:]
+                del stack[len(stack) - 2 * arg:]
+                stack.append(ChestnutMap(zip(items[::2], items[1::2])))
+            elif opcode == SHADOW_LABELS:
+                stack.append(self.shadow_labels(arg))
+            elif opcode == BIND_SHADOW:
+                value = stack.pop()
+                self.bind_shadow(stack.pop(), value)
+            elif opcode == CONSTANT_LABELS:
+                stack.append(self.constant_labels(arg))
+            elif opcode == BIND_CONSTANT:
+                value = stack.pop()
+                self.bind_constant(stack.pop(), value)
+            elif opcode == SETUP_LOOP:
+                self.push_scope()
+                blocks.append(LoopBlock(scopes[-1], len(scopes), len(stack), arg))
+            elif opcode == SETUP_FOR:
+                subject = stack.pop()
+                blocks.append(LoopBlock(scopes[-1], len(scopes), len(stack), arg, iter(subject)))
+            elif opcode == BREAK:
+                block = blocks[-1]
+                self.unwind_loop(block, stack)
+                pc = block.exit
+            elif opcode == CONTINUE:
+                block = blocks[-1]
+                block.index += 1
+                self.unwind_loop(block, stack)
+                pc = block.top
+            elif opcode == END_LOOP:
+                block = blocks.pop()
+                self.pop_scope()
+                del block.root["loop index"]
+            else:
+                raise InternalException(f"Unknown opcode {opcode} in {code}")